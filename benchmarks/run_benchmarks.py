@@ -0,0 +1,231 @@
+"""
+Benchmarks for the simulation hot paths.
+
+Runs Simulation.run over a matrix of time_step, time_max and stage chain
+depth, and reports steps/sec, peak memory, and the time per step spent in
+physics, logging (RocketLog.add), output (log file writing) and reporting
+(Simulation.report). Results are written as JSON and can be compared
+against a saved baseline.
+
+From the repo root:
+  $ python3 benchmarks/run_benchmarks.py --output results.json
+  $ python3 benchmarks/run_benchmarks.py --baseline results.json --threshold 0.1
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+  os.path.abspath(__file__))), 'src'))
+
+import rocket_log as rl
+import rocket_log_writer as rlw
+from rocket_component import HeadRocketComponent, RocketComponentDecorator
+from simulation import Simulation
+
+
+SECTIONS = ('logging', 'output', 'report')
+
+
+class SectionTimer:
+  """
+  Wraps methods so the wall time spent inside them is accumulated per
+  section. Nested calls into the same section are only counted once.
+  """
+
+  def __init__(self) -> None:
+    self.totals = dict.fromkeys(SECTIONS, 0.0)
+    self._depth = dict.fromkeys(SECTIONS, 0)
+    self._patched = []
+
+
+  def wrap(self, owner, name: str, section: str) -> None:
+    original = getattr(owner, name)
+    timer = self
+
+    def wrapper(*args, **kwargs):
+      timer._depth[section] += 1
+      start = time.perf_counter()
+      try:
+        return original(*args, **kwargs)
+      finally:
+        timer._depth[section] -= 1
+        if timer._depth[section] == 0:
+          timer.totals[section] += time.perf_counter() - start
+
+    self._patched.append((owner, name, original))
+    setattr(owner, name, wrapper)
+
+
+  def __enter__(self) -> 'SectionTimer':
+    self.wrap(rl.RocketLog, 'add', 'logging')
+    self.wrap(rl.RocketLog, 'output', 'output')
+    self.wrap(rlw.RocketLogWriter, 'close', 'output')
+    self.wrap(Simulation, 'report', 'report')
+    return self
+
+
+  def __exit__(self, *exc_info) -> None:
+    for owner, name, original in reversed(self._patched):
+      setattr(owner, name, original)
+    self._patched = []
+
+
+def build_rocket(depth: int):
+  """
+  Build a stack of `depth` rocket components
+
+  :param int depth: 1 for a single HeadRocketComponent, each extra level
+  wraps it in a RocketComponentDecorator
+  :return RocketComponent: the bottom stage
+  """
+  rocket_component = HeadRocketComponent(depth - 1)
+  for id in range(depth - 2, -1, -1):
+    rocket_component = RocketComponentDecorator(rocket_component, id)
+  return rocket_component
+
+
+def run_case(time_step: float, time_max: float, depth: int,
+  repeat: int = 5) -> dict:
+  """
+  Benchmark one configuration. The time per step split is taken from the
+  fastest of `repeat` runs, and steps/sec is reported for the fastest and
+  the median run; peak memory is measured in a separate run under
+  tracemalloc.
+
+  :return dict: results for the case
+  """
+  steps = len(np.arange(time_step, time_max + time_step, time_step))
+  best = None
+  totals = []
+  with tempfile.TemporaryDirectory() as directory:
+    for _ in range(repeat):
+      simulation = Simulation(build_rocket(depth), time_max=time_max,
+        time_step=time_step, log_directory=directory)
+      with SectionTimer() as timer, \
+        contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        simulation.run()
+        total = time.perf_counter() - start
+      totals.append(total)
+      if best is None or total < best[0]:
+        best = (total, dict(timer.totals))
+
+    simulation = Simulation(build_rocket(depth), time_max=time_max,
+      time_step=time_step, log_directory=directory)
+    tracemalloc.start()
+    try:
+      with contextlib.redirect_stdout(io.StringIO()):
+        simulation.run()
+      peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+      tracemalloc.stop()
+
+  total, sections = best
+  sections['physics'] = total - sum(sections.values())
+  return {
+    'case': f'time_step={time_step},time_max={time_max},depth={depth}',
+    'time_step': time_step,
+    'time_max': time_max,
+    'depth': depth,
+    'steps': steps,
+    'seconds': total,
+    'steps_per_second': steps / total,
+    'steps_per_second_median': steps / float(np.median(totals)),
+    'steps_per_second_runs': [steps / seconds for seconds in totals],
+    'time_per_step': {name: seconds / steps
+      for name, seconds in sections.items()},
+    'peak_memory_bytes': peak_memory,
+  }
+
+
+def median_steps_per_second(result: dict) -> float:
+  """
+  :param dict result: results for a case, see run_case
+  :return float: median steps/sec over the case's repeats
+  """
+  return result.get('steps_per_second_median', result['steps_per_second'])
+
+
+def compare(results: list, baseline: list, threshold: float) -> list:
+  """
+  Find cases whose steps/sec dropped by more than threshold. The median of
+  each case's repeats is compared, so a single slow or fast run does not
+  decide the result; results saved without a median fall back to the
+  fastest run.
+
+  :param list results: current results
+  :param list baseline: saved results
+  :param float threshold: allowed fractional slowdown, e.g. 0.1 for 10%
+  :return list: (case, baseline steps/sec, current steps/sec)
+  """
+  saved = {result['case']: result for result in baseline}
+  regressions = []
+  for result in results:
+    if result['case'] not in saved:
+      continue
+    before = median_steps_per_second(saved[result['case']])
+    after = median_steps_per_second(result)
+    if after < before * (1 - threshold):
+      regressions.append((result['case'], before, after))
+  return regressions
+
+
+### MAIN ###
+def main(argv=None):
+  parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+  parser.add_argument('--time-steps', type=float, nargs='+',
+    default=[1, 0.1, 0.01])
+  parser.add_argument('--time-maxes', type=float, nargs='+', default=[50, 100])
+  parser.add_argument('--depths', type=int, nargs='+', default=[1, 3])
+  parser.add_argument('--repeat', type=int, default=5,
+    help='runs per case, the median is compared against the baseline')
+  parser.add_argument('--output', default='benchmark_results.json',
+    help='JSON file to write the results to')
+  parser.add_argument('--baseline', default=None,
+    help='JSON results to compare against')
+  parser.add_argument('--threshold', type=float, default=0.1,
+    help='allowed fractional drop in steps/sec before failing')
+  args = parser.parse_args(argv)
+
+  results = []
+  for depth in args.depths:
+    for time_max in args.time_maxes:
+      for time_step in args.time_steps:
+        result = run_case(time_step, time_max, depth, repeat=args.repeat)
+        results.append(result)
+        per_step = ', '.join(f'{name} {seconds * 1e6:.1f}us'
+          for name, seconds in result['time_per_step'].items())
+        print(f"{result['case']}: {result['steps_per_second']:.0f} steps/s "
+          f"(median {result['steps_per_second_median']:.0f}), "
+          f"peak {result['peak_memory_bytes'] / 2**20:.1f} MiB, {per_step}")
+
+  with open(args.output, 'w') as file:
+    json.dump({
+      'python': platform.python_version(),
+      'platform': platform.platform(),
+      'results': results,
+    }, file, indent=2)
+
+  if args.baseline:
+    with open(args.baseline) as file:
+      baseline = json.load(file)['results']
+    regressions = compare(results, baseline, args.threshold)
+    for case, before, after in regressions:
+      print(f'REGRESSION {case}: {before:.0f} -> {after:.0f} steps/s')
+    if regressions:
+      return 1
+  return 0
+
+
+if __name__ == '__main__':
+  sys.exit(main())
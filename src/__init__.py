@@ -1,21 +1,92 @@
+import importlib
+import importlib.abc
+import importlib.util
 import sys
 
-# Order must conform to DAG (Directed Acyclic Graph)
+# Modules import each other by their bare names (`import rocket_log`), as when
+# run from inside src/. Importing `src.X` makes the bare name `X`, imported
+# from a module of this package, resolve to the same module object, so nothing
+# is loaded twice. Bare imports from outside the package are left to the
+# other finders, so names like `scheduler` or `vector` are not claimed.
+#
+# Modules are only imported when first used, so physics-only runs never pay
+# for pandas (logs as DataFrames, sweeps) or scipy (adaptive integration).
+MODULES = (
+  'atmosphere',
+  'position',
+  'vector',
+  'instrumentation',
+  'ensemble_statistics',
+  'flight_summary',
+  'force_model',
+  'progress_reporter',
+  'stage_table',
+  'trajectory_query',
+  'trajectory_store',
+  'rocket_log_writer',
+  'recording_policy',
+  'rocket_log',
+  'rocket_component',
+  'adaptive_integrator',
+  'analytic_phase',
+  'scheduler',
+  'batch_simulation',
+  'result_cache',
+  'simulation',
+  'sweep',
+  'optimizer',
+  'monte_carlo',
+)
 
-import src.atmosphere as atmosphere
-sys.modules['atmosphere'] = atmosphere
 
-import src.position as position
-sys.modules['position'] = position
+class _AliasLoader(importlib.abc.Loader):
+  """
+  Loads a bare module name as the matching src submodule
+  """
 
-import src.vector as vector
-sys.modules['vector'] = vector
+  def create_module(self, spec):
+    return importlib.import_module(f'{__name__}.{spec.name}')
 
-import src.rocket_log as rocket_log
-sys.modules['rocket_log'] = rocket_log
 
-import src.rocket_component as rocket_component
-sys.modules['rocket_component'] = rocket_component
+  def exec_module(self, module) -> None:
+    # Already executed by create_module
+    pass
 
-import src.simulation as simulation
-sys.modules['simulation'] = simulation
\ No newline at end of file
+
+
+class _AliasFinder(importlib.abc.MetaPathFinder):
+  """
+  Resolves the bare names of src modules
+  """
+
+  def find_spec(self, fullname, path, target=None):
+    if fullname in MODULES and _imported_from_package():
+      return importlib.util.spec_from_loader(fullname, _AliasLoader())
+    return None
+
+
+
+def _imported_from_package() -> bool:
+  """
+  :return bool: whether the import being resolved was started by a module of
+  this package, skipping the frames of the import machinery
+  """
+  frame = sys._getframe(1)
+  while frame is not None:
+    name = frame.f_globals.get('__name__', '')
+    if name != __name__ and not name.startswith('importlib'):
+      return name.startswith(f'{__name__}.')
+    frame = frame.f_back
+  return False
+
+
+
+def __getattr__(name: str):
+  # `import src; src.simulation` imports the submodule on first access
+  if name in MODULES:
+    return importlib.import_module(f'{__name__}.{name}')
+  raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+if not any(isinstance(finder, _AliasFinder) for finder in sys.meta_path):
+  sys.meta_path.insert(0, _AliasFinder())
@@ -0,0 +1,170 @@
+import numpy as np
+import scipy.integrate as integrate
+
+from position import CartesianPosition
+from vector import Vector
+
+
+class AdaptiveIntegrator:
+  """
+  Integrates a single body RocketComponent with scipy's error controlled
+  solve_ivp instead of fixed forward Euler steps.
+
+  The state vector is [pos_x, pos_y, velocity_x, velocity_y, mass_fuel]. Its
+  derivative is built from the component's own force models. Fuel
+  depletion ends the burn phase, ground impact ends the flight, and apogee is
+  recorded; all three are located exactly by the solver's event detection,
+  so the coast phase can take large steps.
+  """
+
+  def __init__(self, rocket_component, rtol: float = 1e-6,
+    atol: float = 1e-6, method: str = 'RK45',
+    max_step: float = np.inf) -> None:
+    """
+    :param RocketComponent rocket_component: component to integrate
+    :param float rtol: relative tolerance of solve_ivp
+    :param float atol: absolute tolerance of solve_ivp
+    :param str method: solve_ivp method
+    :param float max_step: largest step solve_ivp may take
+    """
+    if getattr(rocket_component, 'rocket_component', None) is not None:
+      raise ValueError(
+        'Adaptive integration only supports single body rocket components')
+    self.rocket_component = rocket_component
+    self.rtol = rtol
+    self.atol = atol
+    self.method = method
+    self.max_step = max_step
+    self.events = [] # (name, time) in the order they happened
+
+
+  def get_state(self) -> np.ndarray:
+    """
+    :return np.ndarray: the component's current state vector
+    """
+    rocket_component = self.rocket_component
+    return np.array([
+      rocket_component.position.x,
+      rocket_component.position.y,
+      rocket_component.velocity.x,
+      rocket_component.velocity.y,
+      rocket_component.mass_fuel,
+    ])
+
+
+  def set_state(self, state: np.ndarray, burning: bool) -> None:
+    """
+    Set the component's position, velocity, fuel, atmosphere and forces to
+    match a state vector
+
+    :param np.ndarray state: state vector
+    :param bool burning: whether the engine is producing momentum thrust
+    """
+    self.rocket_component.set_state(CartesianPosition(state[0], state[1]),
+      Vector(x=state[2], y=state[3]), state[4],
+      percent_thrust=1 if burning else 0)
+
+
+  def derivative(self, time: float, state: np.ndarray, burning: bool) \
+    -> np.ndarray:
+    """
+    Right hand side of the equations of motion
+
+    :param float time: current time
+    :param np.ndarray state: state vector
+    :param bool burning: whether the engine is producing momentum thrust
+    :return np.ndarray: time derivative of the state vector
+    """
+    self.set_state(state, burning)
+    rocket_component = self.rocket_component
+    force = rocket_component.sum_forces()
+    mass = rocket_component.get_total_mass()
+    return np.array([
+      state[2],
+      state[3],
+      force.x / mass,
+      force.y / mass,
+      -rocket_component.fuel_flow_rate if burning else 0.0,
+    ])
+
+
+  def run(self, time: float, time_max: float, output_times, on_output,
+    on_event=None) -> float:
+    """
+    Integrate from time to time_max
+
+    :param float time: start time, the component must hold its state at
+    this time
+    :param float time_max: end time
+    :param output_times: increasing times after `time` to report the state at
+    :param on_output: called as on_output(time) after the component is set to
+    the state at each output time
+    :param on_event: called as on_event(name, time) after the component is
+    set to the state at each event, in time order with the output times
+    :return float: the time integration stopped, earlier than time_max on
+    ground impact
+    """
+    output_times = np.asarray(output_times, dtype=np.float64)
+    output_index = 0
+    state = self.get_state()
+    burning = state[4] > 0 and self.rocket_component.fuel_flow_rate > 0
+
+    def burnout(t, y, burning):
+      return y[4]
+    burnout.terminal = True
+    burnout.direction = -1
+
+    def apogee(t, y, burning):
+      return y[3]
+    apogee.direction = -1
+
+    def impact(t, y, burning):
+      return y[1]
+    impact.terminal = True
+    impact.direction = -1
+
+    events = [burnout, apogee, impact] if burning else [apogee, impact]
+    while time < time_max:
+      solution = integrate.solve_ivp(self.derivative, (time, time_max), state,
+        method=self.method, events=events, dense_output=True, args=(burning,),
+        rtol=self.rtol, atol=self.atol, max_step=self.max_step)
+      if solution.status == -1:
+        raise RuntimeError(solution.message)
+
+      # Report every output time and event reached by this phase
+      end_time = solution.t[-1]
+      phase_events = sorted(((event_time, event.__name__)
+        for event, event_times in zip(events, solution.t_events)
+        for event_time in event_times))
+      reports = phase_events.copy() if on_event is not None else []
+      while output_index < len(output_times) and \
+        output_times[output_index] <= end_time:
+        reports.append((output_times[output_index], None))
+        output_index += 1
+      # Events sort before an output at the same time
+      reports.sort(key=lambda report: (report[0], report[1] is None))
+      for report_time, name in reports:
+        self.set_state(solution.sol(report_time), burning)
+        if name is None:
+          on_output(report_time)
+        else:
+          on_event(name, report_time)
+
+      self.events.extend((name, event_time)
+        for event_time, name in phase_events)
+      self.events.sort(key=lambda event: event[1])
+
+      time = end_time
+      state = solution.y[:, -1]
+      if solution.status == 1 and len(solution.t_events[-1]):
+        # Ground impact
+        self.set_state(state, burning)
+        return time
+      if burning and solution.status == 1:
+        # Burnout, continue coasting
+        state[4] = 0
+        burning = False
+        events = [apogee, impact]
+
+    self.set_state(state, burning)
+    return time
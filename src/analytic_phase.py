@@ -0,0 +1,186 @@
+import math
+
+from force_model import GRAVITATIONAL_CONSTANT, MASS_EARTH, RADIUS_EARTH, \
+  GravityModel, ThrustModel
+from position import CartesianPosition
+from vector import Vector
+
+
+class AnalyticPhase:
+  """
+  Advances a single body RocketComponent with closed form solutions while its
+  active force models allow it: no drag, no lift, and an atmosphere that does
+  not change with altitude. Thrust is then a constant force along alpha, so a
+  burn follows the rocket equation and a coast is a constant acceleration
+  arc.
+
+  Gravity is the only force that varies, with altitude. Each jump is split
+  into segments over which gravity changes by at most gravity_tolerance
+  (relative), and every segment uses gravity at its mean altitude.
+  """
+
+  # Direction of the gravity force, see RocketComponent.calc_gravity_force
+  GRAVITY_X = math.cos(3 * math.pi / 2)
+  GRAVITY_Y = math.sin(3 * math.pi / 2)
+
+  def __init__(self, rocket_component, gravity_tolerance: float = 1e-3) \
+    -> None:
+    """
+    :param RocketComponent rocket_component: component to advance
+    :param float gravity_tolerance: largest relative change in gravity over a
+    single closed form segment
+    """
+    self.rocket_component = rocket_component
+    self.gravity_tolerance = gravity_tolerance
+
+
+  def is_applicable(self) -> bool:
+    """
+    Whether the component's forces currently admit the closed form solution
+
+    :return bool: True if it may be advanced with `advance`
+    """
+    rocket_component = self.rocket_component
+    atmosphere = rocket_component.atmosphere
+    # Default gravity and thrust, every other force model dropped out
+    force_models = rocket_component.force_models
+    return getattr(rocket_component, 'rocket_component', None) is None and \
+      getattr(atmosphere, 'constant', False) and \
+      type(force_models.get('gravity')) is GravityModel and \
+      type(force_models.get('thrust')) is ThrustModel and \
+      all(model.is_zero(rocket_component)
+        for name, model in force_models.items()
+        if name not in ('gravity', 'thrust'))
+
+
+  def gravity(self, altitude: float) -> float:
+    """
+    :param float altitude: altitude
+    :return float: gravitational acceleration, see calc_gravity_force
+    """
+    return GRAVITATIONAL_CONSTANT * MASS_EARTH / \
+      ((RADIUS_EARTH + altitude) ** 2)
+
+
+  def propagate(self, state: tuple, duration: float, gravity: float) -> tuple:
+    """
+    Closed form state after `duration` with constant gravity
+
+    :param tuple state: (pos_x, pos_y, velocity_x, velocity_y, mass_fuel)
+    :param float duration: must not extend past burnout while burning
+    :param float gravity: gravitational acceleration
+    :return tuple: new state
+    """
+    rocket_component = self.rocket_component
+    pos_x, pos_y, velocity_x, velocity_y, mass_fuel = state
+    alpha = rocket_component.alpha
+    flow_rate = rocket_component.fuel_flow_rate if mass_fuel > 0 else 0
+    thrust = flow_rate * rocket_component.velocity_exhaust + \
+      (rocket_component.atmosphere.pressure -
+        rocket_component.pressure_exhaust) * rocket_component.area_exhaust
+    mass_start = rocket_component.mass_structure + mass_fuel
+
+    if flow_rate > 0:
+      # Rocket equation
+      mass_end = mass_start - flow_rate * duration
+      log_ratio = math.log(mass_start / mass_end)
+      delta_velocity = thrust / flow_rate * log_ratio
+      delta_position = thrust / flow_rate * \
+        (duration - mass_end / flow_rate * log_ratio)
+    else:
+      delta_velocity = thrust / mass_start * duration
+      delta_position = delta_velocity * duration / 2
+
+    gravity_velocity = gravity * duration
+    gravity_position = gravity * duration ** 2 / 2
+    return (
+      pos_x + velocity_x * duration + delta_position * math.cos(alpha) +
+        gravity_position * self.GRAVITY_X,
+      pos_y + velocity_y * duration + delta_position * math.sin(alpha) +
+        gravity_position * self.GRAVITY_Y,
+      velocity_x + delta_velocity * math.cos(alpha) +
+        gravity_velocity * self.GRAVITY_X,
+      velocity_y + delta_velocity * math.sin(alpha) +
+        gravity_velocity * self.GRAVITY_Y,
+      max(0.0, mass_fuel - flow_rate * duration),
+    )
+
+
+  def _segment(self, state: tuple, duration: float) -> tuple:
+    """
+    Largest segment no longer than duration whose gravity change is within
+    tolerance, with gravity taken at the segment's mean altitude
+
+    :return tuple: (segment duration, gravity used)
+    """
+    gravity_start = self.gravity(state[1])
+    while True:
+      end = self.propagate(state, duration, gravity_start)
+      gravity_end = self.gravity(end[1])
+      if abs(gravity_end - gravity_start) <= \
+        self.gravity_tolerance * gravity_start:
+        return duration, self.gravity((state[1] + end[1]) / 2)
+      duration /= 2
+
+
+  def _find_crossing(self, state: tuple, duration: float, gravity: float,
+    index: int) -> float:
+    """
+    Bisect for the time state[index] falls through zero within a segment
+    """
+    low, high = 0.0, duration
+    for _ in range(60):
+      middle = (low + high) / 2
+      if self.propagate(state, middle, gravity)[index] > 0:
+        low = middle
+      else:
+        high = middle
+    return high
+
+
+  def advance(self, time: float, time_target: float) -> tuple:
+    """
+    Jump the component towards time_target, stopping early at burnout,
+    apogee or ground impact. The component's state is set to the state at
+    the returned time.
+
+    :param float time: current time
+    :param float time_target: time to reach
+    :return tuple: (time reached, event name or None)
+    """
+    rocket_component = self.rocket_component
+    state = (rocket_component.position.x, rocket_component.position.y,
+      rocket_component.velocity.x, rocket_component.velocity.y,
+      rocket_component.mass_fuel)
+    event = None
+
+    while time < time_target and event is None:
+      duration = time_target - time
+      burning = state[4] > 0 and rocket_component.fuel_flow_rate > 0
+      if burning:
+        burnout = state[4] / rocket_component.fuel_flow_rate
+        if burnout <= duration:
+          duration, event = burnout, 'burnout'
+      segment, gravity = self._segment(state, duration)
+      if segment < duration:
+        event = None
+      end = self.propagate(state, segment, gravity)
+
+      # Events inside the segment
+      if state[3] > 0 and end[3] <= 0:
+        segment = self._find_crossing(state, segment, gravity, 3)
+        event = 'apogee'
+      elif state[1] > 0 and end[1] <= 0:
+        segment = self._find_crossing(state, segment, gravity, 1)
+        event = 'impact'
+      if event in ('apogee', 'impact'):
+        end = self.propagate(state, segment, gravity)
+
+      if event == 'burnout':
+        end = end[:4] + (0.0,)
+      state = end
+      time += segment
+
+    rocket_component.set_state(CartesianPosition(state[0], state[1]),
+      Vector(x=state[2], y=state[3]), state[4])
+    return time, event
@@ -1,3 +1,8 @@
+import math
+
+import numpy as np
+
+
 class Atmosphere:
   """
   The atmosphere class will set parameters for the environment in which the
@@ -9,6 +14,9 @@ class Atmosphere:
   # Current Example: constant, simplified atmosphere
   # Constant values pulled from sea level at 15C
 
+  # True when every property is independent of altitude
+  constant = True
+
   def __init__(self, altitude: float) -> None:
     """
     :param float altitude: current section of the atmosphere to calculate data for
@@ -77,7 +85,256 @@ class Atmosphere:
       self.viscosity = self.calc_viscosity(altitude)
 
 
-    
+
+class StandardAtmosphere(Atmosphere):
+  """
+  U.S. Standard Atmosphere, 1976. Properties are precomputed on a fine
+  altitude grid the first time the model is used, so each query is a linear
+  interpolation. Every calc_* method also accepts a NumPy array of altitudes.
+
+  The 1976 model defines seven layers up to 86 km geometric altitude. Above
+  that the atmosphere is treated as isothermal at the 86 km temperature,
+  which is negligible for drag. Altitudes outside the grid are clamped.
+  """
+
+  constant = False
+
+  # Model constants
+  GRAVITY_SEA_LEVEL = 9.80665 # m/s^2
+  RADIUS_EARTH = 6356766.0 # m, effective radius for geopotential altitude
+  GAS_CONSTANT = 8.31432 # N*m/(mol*K)
+  MOLAR_MASS = 0.0289644 # kg/mol
+  SUTHERLAND_BETA = 1.458 * 10**-6 # kg/(s*m*K^1/2)
+  SUTHERLAND_S = 110.4 # K
+
+  # Layer bases: geopotential altitude (m), lapse rate (K/m)
+  LAYERS = (
+    (0.0, -0.0065),
+    (11000.0, 0.0),
+    (20000.0, 0.001),
+    (32000.0, 0.0028),
+    (47000.0, 0.0),
+    (51000.0, -0.0028),
+    (71000.0, -0.002),
+  )
+  TEMPERATURE_SEA_LEVEL = 288.15 # K
+  PRESSURE_SEA_LEVEL = 101325.0 # kg/m/s^2
+  ISOTHERMAL_ALTITUDE = 86000.0 # m, geometric
+
+  # Lookup grid, geometric altitude (m)
+  ALTITUDE_MIN = -5000.0
+  ALTITUDE_MAX = 1000000.0
+  ALTITUDE_STEP = 50.0
+
+  _tables = None
+
+  @classmethod
+  def build_tables(cls) -> dict:
+    """
+    Evaluate the model on the lookup grid
+
+    :return dict: 'altitude' and each property as NumPy arrays
+    """
+    count = int(round((cls.ALTITUDE_MAX - cls.ALTITUDE_MIN) /
+      cls.ALTITUDE_STEP)) + 1
+    altitude = cls.ALTITUDE_MIN + cls.ALTITUDE_STEP * np.arange(count)
+
+    def geopotential(z):
+      return cls.RADIUS_EARTH * z / (cls.RADIUS_EARTH + z)
+
+    g_m_r = cls.GRAVITY_SEA_LEVEL * cls.MOLAR_MASS / cls.GAS_CONSTANT
+    height = geopotential(np.minimum(altitude, cls.ISOTHERMAL_ALTITUDE))
+    temperature = np.empty(count)
+    pressure = np.empty(count)
+
+    base_temperature = cls.TEMPERATURE_SEA_LEVEL
+    base_pressure = cls.PRESSURE_SEA_LEVEL
+    bases = [layer[0] for layer in cls.LAYERS[1:]] + [np.inf]
+    for (base, lapse), top in zip(cls.LAYERS, bases):
+      in_layer = (height >= base) & (height < top) if base > 0 \
+        else height < top
+      delta = height[in_layer] - base
+      if lapse == 0:
+        temperature[in_layer] = base_temperature
+        pressure[in_layer] = base_pressure * \
+          np.exp(-g_m_r * delta / base_temperature)
+      else:
+        temperature[in_layer] = base_temperature + lapse * delta
+        pressure[in_layer] = base_pressure * \
+          (base_temperature / temperature[in_layer]) ** (g_m_r / lapse)
+
+      # Conditions at the base of the next layer
+      if np.isfinite(top):
+        if lapse == 0:
+          next_pressure = base_pressure * \
+            math.exp(-g_m_r * (top - base) / base_temperature)
+        else:
+          next_temperature = base_temperature + lapse * (top - base)
+          next_pressure = base_pressure * \
+            (base_temperature / next_temperature) ** (g_m_r / lapse)
+          base_temperature = next_temperature
+        base_pressure = next_pressure
+
+    # Isothermal extension above ISOTHERMAL_ALTITUDE
+    above = altitude > cls.ISOTHERMAL_ALTITUDE
+    pressure[above] *= np.exp(-g_m_r / temperature[above] * (
+      geopotential(altitude[above]) - geopotential(cls.ISOTHERMAL_ALTITUDE)))
+
+    gravity = cls.GRAVITY_SEA_LEVEL * \
+      (cls.RADIUS_EARTH / (cls.RADIUS_EARTH + altitude)) ** 2
+    density = pressure * cls.MOLAR_MASS / (cls.GAS_CONSTANT * temperature)
+    viscosity = cls.SUTHERLAND_BETA * temperature ** 1.5 / \
+      (temperature + cls.SUTHERLAND_S)
+
+    return {
+      'altitude': altitude,
+      'density': density, # kg/m^3
+      'gravity': gravity, # m/s^2
+      'pressure': pressure, # kg/m/s^2
+      'temperature': temperature - 273.15, # C
+      'viscosity': viscosity, # kg/m/s
+    }
+
+
+  @classmethod
+  def get_tables(cls) -> dict:
+    """
+    Lookup tables, built on first use
+
+    :return dict: see build_tables, plus '<property>_list' copies used for
+    scalar lookups
+    """
+    if cls._tables is None:
+      tables = cls.build_tables()
+      for name in ('density', 'gravity', 'pressure', 'temperature',
+        'viscosity'):
+        tables[f'{name}_list'] = tables[name].tolist()
+      StandardAtmosphere._tables = tables
+    return cls._tables
+
+
+  def _locate(self, altitude: float) -> tuple:
+    """
+    Grid index and interpolation fraction for a scalar altitude
+    """
+    position = (altitude - self.ALTITUDE_MIN) / self.ALTITUDE_STEP
+    last = len(self.get_tables()['altitude']) - 1
+    if position <= 0:
+      return 0, 0.0
+    if position >= last:
+      return last - 1, 1.0
+    index = int(position)
+    return index, position - index
+
+
+  def _lookup(self, name: str, altitude):
+    """
+    Interpolate one property at a scalar or array of altitudes
+    """
+    tables = self.get_tables()
+    if np.ndim(altitude):
+      return np.interp(altitude, tables['altitude'], tables[name])
+    index, fraction = self._locate(altitude)
+    values = tables[f'{name}_list']
+    return values[index] + fraction * (values[index + 1] - values[index])
+
+
+  def calc_density(self, altitude):
+    return self._lookup('density', altitude)
+
+
+  def calc_gravity(self, altitude):
+    return self._lookup('gravity', altitude)
+
+
+  def calc_pressure(self, altitude):
+    return self._lookup('pressure', altitude)
+
+
+  def calc_temperature(self, altitude):
+    return self._lookup('temperature', altitude)
+
+
+  def calc_viscosity(self, altitude):
+    return self._lookup('viscosity', altitude)
+
+
+  def update(self, altitude: float) -> None:
+    """
+    Interpolate every property at once, locating the altitude in the grid a
+    single time
+
+    :param float altitude: altitude to calc data at
+    """
+    index, fraction = self._locate(altitude)
+    tables = self.get_tables()
+    for name in ('density', 'gravity', 'pressure', 'temperature',
+      'viscosity'):
+      values = tables[f'{name}_list']
+      setattr(self, name,
+        values[index] + fraction * (values[index + 1] - values[index]))
+
+
+
+class ScaledAtmosphere(Atmosphere):
+  """
+  Another atmosphere model with its density scaled by a constant factor, to
+  perturb the atmosphere of a single run, e.g. in a Monte Carlo dispersion.
+  Pass it as a RocketComponent's atmosphere_model through functools.partial:
+
+    partial(ScaledAtmosphere, model=StandardAtmosphere, density_scale=1.05)
+  """
+
+  def __init__(self, altitude: float, model: type = Atmosphere,
+    density_scale: float = 1.0) -> None:
+    """
+    :param float altitude: current section of the atmosphere to calculate data for
+    :param type model: atmosphere model to perturb
+    :param float density_scale: factor applied to the model's density
+    """
+    self.model = model(altitude)
+    self.density_scale = density_scale
+    self.constant = getattr(self.model, 'constant', False)
+    super().__init__(altitude)
+
+
+  def calc_density(self, altitude):
+    return self.model.calc_density(altitude) * self.density_scale
+
+
+  def calc_gravity(self, altitude):
+    return self.model.calc_gravity(altitude)
+
+
+  def calc_pressure(self, altitude):
+    return self.model.calc_pressure(altitude)
+
+
+  def calc_temperature(self, altitude):
+    return self.model.calc_temperature(altitude)
+
+
+  def calc_viscosity(self, altitude):
+    return self.model.calc_viscosity(altitude)
+
+
+  def update(self, altitude: float) -> None:
+    """
+    Let the model update itself, so its own fast path is used, then scale
+    the density
+
+    :param float altitude: altitude to calc data at
+    """
+    model = self.model
+    model.update(altitude)
+    self.density = model.density * self.density_scale
+    self.gravity = model.gravity
+    self.pressure = model.pressure
+    self.temperature = model.temperature
+    self.viscosity = model.viscosity
+
+
+
 ### MAIN ###
 def main():
   pass
@@ -0,0 +1,217 @@
+import math
+
+import numpy as np
+
+from atmosphere import Atmosphere
+from force_model import GRAVITATIONAL_CONSTANT, MASS_EARTH, RADIUS_EARTH
+
+
+class BatchSimulation:
+  """
+  Simulates many single body rockets at once. Every per-rocket property is
+  held in a NumPy array of length n, and each time step advances all of the
+  rockets with a handful of array operations.
+
+  The physics follow RocketComponent.update: the drag, gravity, lift and
+  thrust forces are evaluated from the current state, the average mass over
+  the step gives the acceleration, then velocity and position are advanced
+  with the explicit update. Rockets that run out of fuel part way through a
+  step get the same partial thrust as
+  RocketComponent.calc_percent_thrust_and_leftover_time.
+  """
+
+  # Properties that may be given per rocket, with RocketComponent's defaults
+  PARAMETERS = {
+    'position_x': 0.0, # m
+    'position_y': 0.0, # m
+    'velocity_x': 0.0, # m/s
+    'velocity_y': 0.0, # m/s
+    'alpha': math.pi / 2, # rad
+    'mass_fuel': 375000.0, # kg
+    'fuel_flow_rate': 1450.0, # kg/s
+    'mass_structure': 25000.0, # kg
+    'length': 70.0, # m
+    'width': 5.2, # m
+    'pressure_exhaust': 70927.5, # N/m^2
+    'velocity_exhaust': 3000.0 * 9, # m/s
+    'drag_coefficient': 0.75,
+    'lift_coefficient': 0.0,
+  }
+
+  # Arrays kept for every recorded step
+  RECORDED = ['position_x', 'position_y', 'velocity_x', 'velocity_y',
+    'mass_fuel']
+
+  def __init__(self, n: int = None, time_max=100, time_step=1, record=True,
+    atmosphere: Atmosphere = None, **parameters) -> None:
+    """
+    Initializes the batch
+
+    Parameters:
+      n: int
+        Number of rockets, inferred from the parameter arrays if omitted
+      time_max: float
+        Max time of simulation, defaults to 100
+      time_step: float
+        Amount of time to past each iteration of the simulation
+      record: bool
+        Keep the state of every rocket after every step
+      atmosphere: Atmosphere
+        Atmosphere model queried with arrays of altitudes
+      **parameters:
+        Scalars or length n arrays for any key of PARAMETERS
+    """
+    unknown = set(parameters) - set(self.PARAMETERS)
+    if unknown:
+      raise ValueError(f'Unknown parameters: {sorted(unknown)}')
+
+    if n is None:
+      sizes = {np.size(value) for value in parameters.values()
+        if np.ndim(value) > 0}
+      if len(sizes) > 1:
+        raise ValueError(f'Parameter arrays have different lengths: {sizes}')
+      n = sizes.pop() if sizes else 1
+    self.n = n
+
+    for name, default in self.PARAMETERS.items():
+      value = np.array(parameters.get(name, default), dtype=np.float64)
+      setattr(self, name, np.broadcast_to(value, (n,)).copy())
+
+    # Direction cosines of thrust (alpha), lift (alpha + pi/2) and drag
+    # (alpha + pi), fixed for the run like the ForceModel directions. They
+    # are computed with math, as ForceModel.direction does, so each rocket
+    # matches a scalar Simulation bit for bit.
+    self.directions = {
+      name: (np.array([math.cos(angle + offset) for angle in self.alpha]),
+        np.array([math.sin(angle + offset) for angle in self.alpha]))
+      for name, offset in (('thrust', 0), ('lift', math.pi / 2),
+        ('drag', math.pi))
+    }
+
+    self.time = 0 # unit seconds
+    self.time_max = time_max # unit seconds
+    self.time_step = time_step # unit: seconds
+    self.atmosphere = atmosphere if atmosphere is not None \
+      else Atmosphere(0)
+
+    self.record = record
+    self.times = [self.time]
+    self.history = {name: [getattr(self, name).copy()]
+      for name in self.RECORDED} if record else None
+
+
+  @classmethod
+  def from_rocket_components(cls, rocket_components: list, **kwargs) \
+    -> 'BatchSimulation':
+    """
+    Build a batch from the current state of single body RocketComponents
+
+    :param list rocket_components: components to copy properties from
+    :return BatchSimulation: batch with one rocket per component
+    """
+    parameters = {name: [] for name in cls.PARAMETERS}
+    for rocket_component in rocket_components:
+      if getattr(rocket_component, 'rocket_component', None) is not None:
+        raise ValueError('BatchSimulation only supports single body rockets')
+      values = {
+        'position_x': rocket_component.position.x,
+        'position_y': rocket_component.position.y,
+        'velocity_x': rocket_component.velocity.x,
+        'velocity_y': rocket_component.velocity.y,
+      }
+      for name, values_list in parameters.items():
+        values_list.append(values[name] if name in values
+          else getattr(rocket_component, name))
+    return cls(n=len(rocket_components), **parameters, **kwargs)
+
+
+  def step(self, time_step: float) -> None:
+    """
+    Advance every rocket by time_step
+
+    :param float time_step: duration of the step
+    """
+    # Squared from the magnitude, like velocity.r ** 2 in the force models
+    speed_squared = np.sqrt(self.velocity_x ** 2 + self.velocity_y ** 2) ** 2
+    density = self.atmosphere.calc_density(self.position_y)
+    pressure = self.atmosphere.calc_pressure(self.position_y)
+
+    # Portion of a full step's fuel that is left, per rocket
+    fuel_per_step = self.fuel_flow_rate * time_step
+    percent_thrust = np.minimum(np.divide(self.mass_fuel, fuel_per_step,
+      out=np.zeros(self.n), where=fuel_per_step > 0), 1)
+
+    # Forces, see RocketComponent.calc_*_force
+    drag = self.drag_coefficient * density * \
+      (math.pi * (self.width / 2) ** 2) * speed_squared / 2
+    mass_total = self.mass_fuel + self.mass_structure
+    gravity = GRAVITATIONAL_CONSTANT * MASS_EARTH * mass_total \
+      / ((RADIUS_EARTH + self.position_y) ** 2)
+    lift = self.lift_coefficient * density * (self.length * self.width) * \
+      speed_squared / 2
+    thrust = percent_thrust * (self.fuel_flow_rate * self.velocity_exhaust) + \
+      (pressure - self.pressure_exhaust) * (math.pi * (self.width / 2) ** 2)
+
+    gravity_theta = 3 * math.pi / 2
+    thrust_cos, thrust_sin = self.directions['thrust']
+    lift_cos, lift_sin = self.directions['lift']
+    drag_cos, drag_sin = self.directions['drag']
+    force_x = thrust * thrust_cos + lift * lift_cos + drag * drag_cos + \
+      gravity * math.cos(gravity_theta)
+    force_y = thrust * thrust_sin + lift * lift_sin + drag * drag_sin + \
+      gravity * math.sin(gravity_theta)
+
+    # Acceleration from the average mass over the step
+    new_mass_fuel = np.maximum(0, self.mass_fuel - fuel_per_step)
+    mass_avg = mass_total + (new_mass_fuel - self.mass_fuel) / 2
+
+    self.velocity_x = self.velocity_x + force_x / mass_avg * time_step
+    self.velocity_y = self.velocity_y + force_y / mass_avg * time_step
+    self.position_x = self.position_x + self.velocity_x * time_step
+    self.position_y = self.position_y + self.velocity_y * time_step
+    self.mass_fuel = new_mass_fuel
+
+
+  def run(self) -> dict:
+    """
+    Run every rocket from the current time to time_max
+
+    :return dict: see results
+    """
+    for time in np.arange((self.time + self.time_step),
+      (self.time_max + self.time_step), self.time_step):
+      self.time = time
+      self.step(self.time_step)
+      if self.record:
+        self.times.append(time)
+        for name, values in self.history.items():
+          values.append(getattr(self, name).copy())
+    return self.results()
+
+
+  def results(self) -> dict:
+    """
+    State of the batch. With record enabled each value is a (steps, n)
+    array, otherwise the current (n,) arrays are returned.
+
+    :return dict: 'time' and each name in RECORDED
+    """
+    if not self.record:
+      results = {name: getattr(self, name) for name in self.RECORDED}
+      results['time'] = np.array(self.time)
+      return results
+    results = {name: np.stack(values) for name, values in self.history.items()}
+    results['time'] = np.array(self.times)
+    return results
+
+
+  def trajectory(self, index: int) -> dict:
+    """
+    Recorded history of one rocket
+
+    :param int index: rocket index
+    :return dict: 'time' and each name in RECORDED as (steps,) arrays
+    """
+    results = self.results()
+    return {name: values if name == 'time' else values[..., index]
+      for name, values in results.items()}
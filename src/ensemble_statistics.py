@@ -0,0 +1,215 @@
+import numpy as np
+
+
+class RunningMoments:
+  """
+  Running mean and variance of many samples of an array, in O(1) memory.
+  Batches are reduced with NumPy and merged with Chan's parallel form of
+  Welford's algorithm, which stays accurate when the mean is large compared
+  to the spread.
+  """
+
+  def __init__(self, shape: tuple) -> None:
+    """
+    :param tuple shape: shape of one sample
+    """
+    self.count = 0
+    self.mean = np.zeros(shape)
+    self._m2 = np.zeros(shape) # sum of squared deviations from the mean
+
+
+  def update(self, samples: np.ndarray) -> None:
+    """
+    :param np.ndarray samples: (k,) + shape array of k samples
+    """
+    count = len(samples)
+    if count == 0:
+      return
+    mean = samples.mean(axis=0)
+    m2 = ((samples - mean) ** 2).sum(axis=0)
+    total = self.count + count
+    delta = mean - self.mean
+    self.mean = self.mean + delta * (count / total)
+    self._m2 = self._m2 + m2 + delta ** 2 * (self.count * count / total)
+    self.count = total
+
+
+  @property
+  def variance(self) -> np.ndarray:
+    """
+    Sample variance, NaN with fewer than two samples
+    """
+    if self.count < 2:
+      return np.full_like(self.mean, np.nan)
+    return self._m2 / (self.count - 1)
+
+
+  @property
+  def std(self) -> np.ndarray:
+    return np.sqrt(self.variance)
+
+
+
+class P2Quantiles:
+  """
+  Streaming estimates of several quantiles of every element of an array,
+  with the P-square algorithm (Jain and Chlamtac, 1985). Each quantile of
+  each element keeps five markers, so memory is O(1) in the number of
+  samples; all markers are updated together with array operations.
+  """
+
+  def __init__(self, shape: tuple, quantiles=(0.05, 0.5, 0.95)) -> None:
+    """
+    :param tuple shape: shape of one sample
+    :param quantiles: probabilities to estimate, between 0 and 1
+    """
+    self.quantiles = tuple(quantiles)
+    self.shape = tuple(shape)
+    self.count = 0
+    self._first = [] # the first five samples, before the markers exist
+
+    probabilities = np.array(self.quantiles).reshape(
+      (1, -1) + (1,) * len(self.shape))
+    # Marker heights, actual and desired positions, each (5, quantiles) +
+    # shape
+    self._heights = None
+    self._positions = None
+    self._desired = np.concatenate([np.zeros_like(probabilities),
+      2 * probabilities, 4 * probabilities, 2 + 2 * probabilities,
+      np.full_like(probabilities, 4)]) + \
+      np.zeros((5, len(self.quantiles)) + self.shape)
+    self._increments = np.concatenate([np.zeros_like(probabilities),
+      probabilities / 2, probabilities, (1 + probabilities) / 2,
+      np.ones_like(probabilities)])
+
+
+  def update(self, sample: np.ndarray) -> None:
+    """
+    :param np.ndarray sample: one sample, shaped like `shape`
+    """
+    sample = np.asarray(sample, dtype=np.float64)
+    self.count += 1
+    if self._heights is None:
+      self._first.append(sample)
+      if len(self._first) == 5:
+        heights = np.sort(np.stack(self._first), axis=0)
+        self._heights = np.repeat(heights[:, None], len(self.quantiles),
+          axis=1)
+        self._positions = np.zeros_like(self._heights) + \
+          np.arange(5.0).reshape((5,) + (1,) * (self._heights.ndim - 1))
+        self._first = []
+      return
+
+    heights = self._heights
+    positions = self._positions
+    x = np.broadcast_to(sample, heights.shape[1:])
+
+    # Extend the extreme markers, then find the cell holding the sample
+    np.minimum(heights[0], x, out=heights[0])
+    np.maximum(heights[4], x, out=heights[4])
+    cell = np.minimum((x[None] >= heights[1:]).sum(axis=0), 3)
+    positions += np.arange(5).reshape(
+      (5,) + (1,) * (heights.ndim - 1)) > cell[None]
+    self._desired += self._increments
+
+    # Move the middle markers towards their desired positions
+    for i in (1, 2, 3):
+      offset = self._desired[i] - positions[i]
+      gap_above = positions[i + 1] - positions[i]
+      gap_below = positions[i - 1] - positions[i]
+      move = ((offset >= 1) & (gap_above > 1)) | \
+        ((offset <= -1) & (gap_below < -1))
+      if not move.any():
+        continue
+      step = np.sign(offset)
+      parabolic = heights[i] + step / (positions[i + 1] - positions[i - 1]) * (
+        (positions[i] - positions[i - 1] + step) *
+        (heights[i + 1] - heights[i]) / gap_above +
+        (positions[i + 1] - positions[i] - step) *
+        (heights[i] - heights[i - 1]) / -gap_below)
+      neighbour = np.where(step > 0, heights[i + 1], heights[i - 1])
+      neighbour_position = np.where(step > 0, positions[i + 1],
+        positions[i - 1])
+      linear = heights[i] + step * (neighbour - heights[i]) / \
+        (neighbour_position - positions[i])
+      height = np.where((heights[i - 1] < parabolic) &
+        (parabolic < heights[i + 1]), parabolic, linear)
+      heights[i] = np.where(move, height, heights[i])
+      positions[i] = np.where(move, positions[i] + step, positions[i])
+
+
+  def estimates(self) -> dict:
+    """
+    :return dict: quantile -> array shaped like `shape`, exact while fewer
+    than five samples were seen, NaN without samples
+    """
+    if self._heights is None:
+      if not self._first:
+        return {quantile: np.full(self.shape, np.nan)
+          for quantile in self.quantiles}
+      first = np.stack(self._first)
+      return {quantile: np.quantile(first, quantile, axis=0)
+        for quantile in self.quantiles}
+    return {quantile: self._heights[2, index].copy()
+      for index, quantile in enumerate(self.quantiles)}
+
+
+
+class EnsembleStatistics:
+  """
+  Per time bin statistics of a set of quantities over an ensemble of runs:
+  mean, standard deviation and quantiles, reduced as runs arrive so memory
+  does not grow with the number of runs
+  """
+
+  def __init__(self, times: np.ndarray, quantities: tuple,
+    quantiles=(0.05, 0.5, 0.95)) -> None:
+    """
+    :param np.ndarray times: bin times
+    :param tuple quantities: names of the quantities
+    :param quantiles: probabilities of the quantile estimates
+    """
+    self.times = np.asarray(times, dtype=np.float64)
+    self.quantities = tuple(quantities)
+    shape = (len(self.times), len(self.quantities))
+    self.moments = RunningMoments(shape)
+    self.quantile_sketch = P2Quantiles(shape, quantiles)
+    self.failed = 0 # runs with non finite values, left out
+
+
+  @property
+  def count(self) -> int:
+    return self.moments.count
+
+
+  def update(self, samples: np.ndarray) -> None:
+    """
+    Add a batch of runs. Runs are added one at a time, so the same runs in
+    the same order give exactly the same statistics however they are
+    batched.
+
+    :param np.ndarray samples: (runs, times, quantities) array
+    """
+    finite = np.isfinite(samples).all(axis=(1, 2))
+    self.failed += int((~finite).sum())
+    for sample in samples[finite]:
+      self.moments.update(sample[None])
+      self.quantile_sketch.update(sample)
+
+
+  def to_dataframe(self):
+    """
+    :return pd.DataFrame: one row per bin, 'time' then for each quantity
+    its mean, std and quantiles, e.g. 'pos_y_mean', 'pos_y_std', 'pos_y_p50'
+    """
+    import pandas as pd
+    columns = {'time': self.times}
+    mean = self.moments.mean
+    std = self.moments.std
+    estimates = self.quantile_sketch.estimates()
+    for index, quantity in enumerate(self.quantities):
+      columns[f'{quantity}_mean'] = mean[:, index]
+      columns[f'{quantity}_std'] = std[:, index]
+      for quantile, values in estimates.items():
+        columns[f'{quantity}_p{quantile * 100:g}'] = values[:, index]
+    return pd.DataFrame(columns)
@@ -0,0 +1,160 @@
+import math
+
+
+class FlightSummary:
+  """
+  Key figures of a flight, aggregated online from the states a rocket
+  component is observed in (every update and every logged row), so no
+  trajectory has to be kept. Memory is O(1): only the previous state and the
+  running extrema are stored.
+
+  Burnout, apogee and ground impact are interpolated between the two
+  observed states around them: burnout from the fuel flow rate, position and
+  velocity linearly, and the apogee from a constant acceleration over the
+  step.
+  """
+
+  FIELDS = (
+    'apogee', # max pos_y, m
+    'apogee_time',
+    'max_q', # max dynamic pressure, 1/2 density velocity^2, N/m^2
+    'max_q_time',
+    'max_velocity', # max velocity magnitude, m/s
+    'max_velocity_time',
+    'burnout_time', # NaN if fuel remains
+    'burnout_altitude',
+    'burnout_velocity',
+    'impact_time', # NaN if still flying
+    'impact_range', # pos_x distance from the first observed state, m
+    'impact_velocity',
+  )
+
+  def __init__(self) -> None:
+    self.apogee = -math.inf
+    self.apogee_time = math.nan
+    self.max_q = -math.inf
+    self.max_q_time = math.nan
+    self.max_velocity = -math.inf
+    self.max_velocity_time = math.nan
+    self.burnout_time = math.nan
+    self.burnout_altitude = math.nan
+    self.burnout_velocity = math.nan
+    self.impact_time = math.nan
+    self.impact_range = math.nan
+    self.impact_velocity = math.nan
+
+    self.start_x = None # pos_x of the first observed state
+    # Previous observed state: time, pos_x, pos_y, velocity_x, velocity_y,
+    # mass_fuel
+    self._previous = None
+
+
+  def observe(self, rocket_component, time: float, events=()) -> None:
+    """
+    Add the current state of a rocket component. States after the impact
+    are ignored.
+
+    :param RocketComponent rocket_component: component to observe
+    :param float time: simulation time of its state
+    :param tuple events: events that happened at this state, e.g. found
+    exactly by the adaptive integrator, used if not already interpolated
+    """
+    if not math.isnan(self.impact_time):
+      return
+    x = rocket_component.position.x
+    y = rocket_component.position.y
+    velocity_x = rocket_component.velocity.x
+    velocity_y = rocket_component.velocity.y
+    mass_fuel = rocket_component.mass_fuel
+    speed = math.hypot(velocity_x, velocity_y)
+
+    if self.start_x is None:
+      self.start_x = x
+    previous = self._previous
+    self._previous = (time, x, y, velocity_x, velocity_y, mass_fuel)
+    # Nothing to interpolate over a repeated state, e.g. a separation row, or
+    # a step that was redone
+    if previous is not None and time > previous[0]:
+      self._interpolate(rocket_component, previous, self._previous)
+
+    if 'burnout' in events and math.isnan(self.burnout_time):
+      self.burnout_time = time
+      self.burnout_altitude = y
+      self.burnout_velocity = speed
+    if 'impact' in events and math.isnan(self.impact_time):
+      self.impact_time = time
+      self.impact_range = abs(x - self.start_x)
+      self.impact_velocity = speed
+    if self.impact_time < time:
+      # The step ended below ground, the extrema only see it up to the impact
+      time, y, speed = self.impact_time, 0.0, self.impact_velocity
+
+    if y > self.apogee:
+      self.apogee = y
+      self.apogee_time = time
+    if speed > self.max_velocity:
+      self.max_velocity = speed
+      self.max_velocity_time = time
+    q = rocket_component.atmosphere.density * speed ** 2 / 2
+    if q > self.max_q:
+      self.max_q = q
+      self.max_q_time = time
+
+
+  def restore(self, other: 'FlightSummary') -> None:
+    """
+    Return to the figures of an earlier copy, e.g. to drop the states of a
+    step that is redone
+
+    :param FlightSummary other: copy.copy of this summary
+    """
+    self.__dict__.update(other.__dict__)
+
+
+  def _interpolate(self, rocket_component, previous: tuple,
+    current: tuple) -> None:
+    """
+    Find the burnout, apogee and impact between two observed states
+
+    :param tuple previous: earlier state, see _previous
+    :param tuple current: later state
+    """
+    time_0, x_0, y_0, velocity_x_0, velocity_y_0, mass_fuel_0 = previous
+    time, x, y, velocity_x, velocity_y, mass_fuel = current
+    span = time - time_0
+
+    def at(fraction):
+      # Time, pos_x, pos_y and speed a fraction of the way into the step
+      return (time_0 + fraction * span,
+        x_0 + fraction * (x - x_0),
+        y_0 + fraction * (y - y_0),
+        math.hypot(velocity_x_0 + fraction * (velocity_x - velocity_x_0),
+          velocity_y_0 + fraction * (velocity_y - velocity_y_0)))
+
+    if mass_fuel_0 > 0 and mass_fuel <= 0 and math.isnan(self.burnout_time):
+      # Fuel runs out mass_fuel_0 / fuel_flow_rate into the step, the
+      # remaining mass is clamped at 0
+      fuel_flow_rate = rocket_component.fuel_flow_rate
+      fraction = min(1.0, mass_fuel_0 / (fuel_flow_rate * span)) \
+        if fuel_flow_rate > 0 else 1.0
+      self.burnout_time, _, self.burnout_altitude, self.burnout_velocity = \
+        at(fraction)
+
+    if velocity_y_0 > 0 and velocity_y <= 0:
+      step = span * velocity_y_0 / (velocity_y_0 - velocity_y)
+      altitude = y_0 + velocity_y_0 * step / 2
+      if altitude > self.apogee:
+        self.apogee = altitude
+        self.apogee_time = time_0 + step
+
+    if y_0 > 0 and y <= 0 and math.isnan(self.impact_time):
+      self.impact_time, impact_x, _, self.impact_velocity = \
+        at(y_0 / (y_0 - y))
+      self.impact_range = abs(impact_x - self.start_x)
+
+
+  def as_dict(self) -> dict:
+    """
+    :return dict: FIELDS -> value
+    """
+    return {field: getattr(self, field) for field in self.FIELDS}
@@ -0,0 +1,224 @@
+from abc import ABC, abstractmethod
+import math
+
+from vector import Vector
+
+
+GRAVITATIONAL_CONSTANT = 6.674 * (10 ** -11)  # m^3/kg*s
+MASS_EARTH = 5.9722 * (10 ** 24)  # kg
+RADIUS_EARTH = 6.371 * (10 ** 6)  # m
+
+
+class ForceModel(ABC):
+  """
+  One force acting on a RocketComponent. A model is built for a component
+  by RocketComponent.build_force_models, and precomputes everything that only
+  depends on the component's parameters then, so `calc` only does the work
+  that depends on the state.
+
+  Models that report `is_constant` are computed once and left out of the
+  per step pipeline; models that report `is_zero` are also left out of the
+  force sum. Both are asked again whenever the pipeline is rebuilt, e.g.
+  after burnout.
+  """
+
+  # RocketComponent attribute the force is stored in, and logged from
+  attribute = None
+
+  def __init__(self, rocket_component) -> None:
+    """
+    :param RocketComponent rocket_component: component the force acts on
+    """
+
+
+  @abstractmethod
+  def calc(self, rocket_component, percent_thrust: float = 1) -> Vector:
+    """
+    :param RocketComponent rocket_component: component in its current state
+    :param float percent_thrust: engine setting for this step, 0 to 1
+    :return Vector: the force
+    """
+
+
+  def is_constant(self, rocket_component) -> bool:
+    """
+    :return bool: True if the force will not change for the rest of the
+    run, whatever the state
+    """
+    return False
+
+
+  def is_zero(self, rocket_component) -> bool:
+    """
+    :return bool: True if the force is zero for the rest of the run
+    """
+    return False
+
+
+  @staticmethod
+  def direction(theta: float) -> tuple:
+    """
+    :param float theta: angle of a force with a fixed direction
+    :return tuple: (theta, cos theta, sin theta), see Vector.from_direction
+    """
+    return (theta, math.cos(theta), math.sin(theta))
+
+
+
+class AerodynamicForceModel(ForceModel):
+  """
+  coefficient * density * area * velocity^2 / 2 along a fixed direction.
+  Zero, and dropped from the pipeline, if the coefficient is 0 or the
+  atmosphere is a constant vacuum.
+  """
+
+  def __init__(self, rocket_component) -> None:
+    self.coefficient = self.get_coefficient(rocket_component)
+    self.area = self.get_area(rocket_component)
+    self.theta, self.cos_theta, self.sin_theta = self.direction(
+      self.get_theta(rocket_component))
+
+
+  @abstractmethod
+  def get_coefficient(self, rocket_component) -> float:
+    pass
+
+
+  @abstractmethod
+  def get_area(self, rocket_component) -> float:
+    pass
+
+
+  @abstractmethod
+  def get_theta(self, rocket_component) -> float:
+    pass
+
+
+  def calc(self, rocket_component, percent_thrust: float = 1) -> Vector:
+    force = self.coefficient * rocket_component.atmosphere.density * \
+      self.area * rocket_component.velocity.r ** 2 / 2
+    return Vector.from_direction(force, self.theta, self.cos_theta,
+      self.sin_theta)
+
+
+  def is_constant(self, rocket_component) -> bool:
+    return self.is_zero(rocket_component)
+
+
+  def is_zero(self, rocket_component) -> bool:
+    atmosphere = rocket_component.atmosphere
+    return self.coefficient == 0 or \
+      (getattr(atmosphere, 'constant', False) and atmosphere.density == 0)
+
+
+
+class DragModel(AerodynamicForceModel):
+  """
+  Drag over the cross section, opposite to alpha
+  """
+
+  attribute = 'drag_force'
+
+  def get_coefficient(self, rocket_component) -> float:
+    return rocket_component.drag_coefficient
+
+
+  def get_area(self, rocket_component) -> float:
+    return math.pi * (rocket_component.width / 2) ** 2
+
+
+  def get_theta(self, rocket_component) -> float:
+    return rocket_component.alpha + math.pi
+
+
+
+class LiftModel(AerodynamicForceModel):
+  """
+  Lift over the side area, perpendicular to alpha
+  """
+
+  attribute = 'lift_force'
+
+  def get_coefficient(self, rocket_component) -> float:
+    return rocket_component.lift_coefficient
+
+
+  def get_area(self, rocket_component) -> float:
+    return rocket_component.length * rocket_component.width
+
+
+  def get_theta(self, rocket_component) -> float:
+    return math.pi / 2 + rocket_component.alpha
+
+
+
+class GravityModel(ForceModel):
+  """
+  Newtonian gravity of the Earth on the component and everything it carries
+  """
+
+  attribute = 'gravity_force'
+
+  def __init__(self, rocket_component) -> None:
+    self.gravitational_parameter = GRAVITATIONAL_CONSTANT * MASS_EARTH
+    self.theta, self.cos_theta, self.sin_theta = self.direction(
+      3 * math.pi / 2)
+
+
+  def calc(self, rocket_component, percent_thrust: float = 1) -> Vector:
+    gravity = self.gravitational_parameter * rocket_component.get_total_mass() \
+      / ((RADIUS_EARTH + rocket_component.position.y) ** 2)
+    return Vector.from_direction(gravity, self.theta, self.cos_theta,
+      self.sin_theta)
+
+
+
+class ThrustModel(ForceModel):
+  """
+  Momentum thrust, scaled by the engine setting, plus pressure thrust from
+  the difference between ambient and exhaust pressure, along alpha. Once no
+  momentum thrust is possible in a constant atmosphere, the thrust is
+  constant and dropped from the pipeline.
+  """
+
+  attribute = 'thrust_force'
+
+  def __init__(self, rocket_component) -> None:
+    self.momentum_thrust = rocket_component.fuel_flow_rate * \
+      rocket_component.velocity_exhaust
+    self.pressure_exhaust = rocket_component.pressure_exhaust
+    self.area_exhaust = rocket_component.area_exhaust
+    self.theta, self.cos_theta, self.sin_theta = self.direction(
+      rocket_component.alpha)
+
+
+  def calc(self, rocket_component, percent_thrust: float = 1) -> Vector:
+    if percent_thrust < 0 or percent_thrust > 1:
+      raise ValueError
+
+    momentum_thrust = percent_thrust * self.momentum_thrust
+    pressure_thrust = (rocket_component.atmosphere.pressure -
+      self.pressure_exhaust) * self.area_exhaust
+    thrust_force = momentum_thrust + pressure_thrust
+    return Vector.from_direction(thrust_force, self.theta, self.cos_theta,
+      self.sin_theta)
+
+
+  def is_constant(self, rocket_component) -> bool:
+    return (rocket_component.mass_fuel <= 0 or self.momentum_thrust == 0) and \
+      getattr(rocket_component.atmosphere, 'constant', False)
+
+
+  def is_zero(self, rocket_component) -> bool:
+    return self.is_constant(rocket_component) and \
+      rocket_component.atmosphere.pressure == self.pressure_exhaust
+
+
+
+# Default force models by name, in the order the forces are summed
+FORCE_MODELS = {
+  'thrust': ThrustModel,
+  'lift': LiftModel,
+  'drag': DragModel,
+  'gravity': GravityModel,
+}
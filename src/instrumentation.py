@@ -0,0 +1,102 @@
+from collections import defaultdict
+import time
+
+import vector
+
+
+class Instrumentation:
+  """
+  Collects cumulative wall time per stage of a simulation step, call counts,
+  and other counters.
+
+  Simulation and RocketComponent.update only report into an Instrumentation
+  when one is attached (their `instrumentation` attribute is not None), so
+  leaving it off costs a None check per stage.
+
+  Stages are timed with laps: `lap()` starts timing, and each
+  `lap('stage')` adds the time since the previous lap to that stage.
+  """
+
+  def __init__(self) -> None:
+    self.timings = defaultdict(float) # seconds per stage
+    self.calls = defaultdict(int) # laps per stage
+    self.counts = defaultdict(int) # other counters
+    self._mark = time.perf_counter()
+    # Vector allocation count and flag when counting started, see
+    # start_allocation_count
+    self._allocation_start = None
+
+
+  def lap(self, stage: str = None) -> None:
+    """
+    Add the time since the previous lap to a stage
+
+    :param str stage: stage to charge, None to only restart timing
+    """
+    now = time.perf_counter()
+    if stage is not None:
+      self.timings[stage] += now - self._mark
+      self.calls[stage] += 1
+    self._mark = now
+
+
+  def add_time(self, stage: str, seconds: float) -> None:
+    """
+    Charge an externally measured duration to a stage
+
+    :param str stage: stage to charge
+    :param float seconds: duration
+    """
+    self.timings[stage] += seconds
+    self.calls[stage] += 1
+
+
+  def count(self, name: str, amount: int = 1) -> None:
+    """
+    Increase a counter
+
+    :param str name: counter name
+    :param int amount: amount to add
+    """
+    self.counts[name] += amount
+
+
+  def start_allocation_count(self) -> None:
+    """
+    Start counting Vector allocations. Vectors are only counted while an
+    Instrumentation has counting switched on.
+    """
+    self._allocation_start = (vector.allocations, vector.count_allocations)
+    vector.count_allocations = True
+
+
+  def stop_allocation_count(self) -> None:
+    """
+    Add the Vectors allocated since start_allocation_count to the
+    'vector_allocations' counter and restore the previous counting setting
+    """
+    if self._allocation_start is None:
+      return
+    allocations, count_allocations = self._allocation_start
+    self._allocation_start = None
+    vector.count_allocations = count_allocations
+    self.count('vector_allocations', vector.allocations - allocations)
+
+
+  def reset(self) -> None:
+    self.timings.clear()
+    self.calls.clear()
+    self.counts.clear()
+    self._mark = time.perf_counter()
+
+
+  def as_dict(self) -> dict:
+    """
+    :return dict: {'time': seconds per stage, 'calls': calls per stage,
+    'counts': other counters}
+    """
+    return {
+      'time': dict(self.timings),
+      'calls': dict(self.calls),
+      'counts': dict(self.counts),
+    }
@@ -0,0 +1,274 @@
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import itertools
+import math
+import os
+
+import numpy as np
+
+from atmosphere import Atmosphere, ScaledAtmosphere, StandardAtmosphere
+from ensemble_statistics import EnsembleStatistics
+from progress_reporter import CallbackReporter
+from recording_policy import GETTERS
+from rocket_component import HeadRocketComponent
+from simulation import Simulation
+
+
+# RocketComponent attributes a dispersion may vary, plus 'density_scale', the
+# factor applied to the atmosphere's density
+DISPERSION_PARAMETERS = (
+  'mass_fuel',
+  'mass_structure',
+  'fuel_flow_rate',
+  'velocity_exhaust',
+  'drag_coefficient',
+  'lift_coefficient',
+  'alpha',
+  'density_scale',
+)
+
+# Distribution name -> sampler(rng, a, b)
+DISTRIBUTIONS = {
+  'normal': lambda rng, mean, std: rng.normal(mean, std),
+  'uniform': lambda rng, low, high: rng.uniform(low, high),
+  'triangular': lambda rng, low, high: rng.triangular(low, (low + high) / 2,
+    high),
+}
+
+# 1% of the default HeadRocketComponent values, 5% on the atmosphere and
+# drag, and a few milliradians of launch angle
+DEFAULT_DISPERSIONS = {
+  'mass_fuel': ('normal', 375000, 3750),
+  'velocity_exhaust': ('normal', 27000, 270),
+  'drag_coefficient': ('normal', 0.75, 0.0375),
+  'alpha': ('normal', math.pi / 2, 0.005),
+  'density_scale': ('normal', 1.0, 0.05),
+}
+
+# Logged quantities reduced per time bin by default, see GETTERS
+DEFAULT_QUANTITIES = ('pos_x', 'pos_y', 'velocity_r', 'mass_fuel')
+
+
+def sample_parameters(index: int, seed: int, dispersions: dict) -> dict:
+  """
+  Draw the dispersed inputs of one run. Every run has its own random stream,
+  child `index` of the seed's SeedSequence, so a run's inputs depend only on
+  the seed and its index, not on how runs are split across workers.
+
+  :param int index: run number
+  :param int seed: seed of the study
+  :param dict dispersions: parameter -> (distribution, a, b), see
+  DISTRIBUTIONS
+  :return dict: parameter -> value, in the order of dispersions
+  """
+  rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(index,)))
+  parameters = {}
+  for name, (distribution, a, b) in dispersions.items():
+    parameters[name] = float(DISTRIBUTIONS[distribution](rng, a, b))
+  return parameters
+
+
+def simulate_bins(parameters: dict, bin_times: np.ndarray,
+  quantities: tuple = DEFAULT_QUANTITIES, time_max: float = 100,
+  time_step: float = 1, atmosphere_model: type = Atmosphere) -> np.ndarray:
+  """
+  Simulate one rocket without a log, keeping only its state at the bin
+  times, linearly interpolated between the steps around each
+
+  :param dict parameters: values for any of DISPERSION_PARAMETERS
+  :param np.ndarray bin_times: sorted times to sample the state at
+  :param tuple quantities: columns to sample, see GETTERS
+  :param float time_max: max time of the simulation
+  :param float time_step: time step of the simulation
+  :param type atmosphere_model: unperturbed atmosphere
+  :return np.ndarray: (bins, quantities) array, NaN past the end of the run
+  """
+  unknown = set(parameters) - set(DISPERSION_PARAMETERS)
+  if unknown:
+    raise ValueError(f'Unknown dispersion parameters: {sorted(unknown)}')
+
+  atmosphere = partial(ScaledAtmosphere, model=atmosphere_model,
+    density_scale=parameters.get('density_scale', 1.0))
+  rocket_component = HeadRocketComponent(0, keep_log=False,
+    atmosphere_model=atmosphere)
+  for name, value in parameters.items():
+    if name != 'density_scale':
+      setattr(rocket_component, name, value)
+
+  getters = [GETTERS[quantity] for quantity in quantities]
+  samples = np.full((len(bin_times), len(quantities)), math.nan)
+  previous = [None, None] # time and values of the previous report
+  next_bin = [0]
+  # Tolerance for floating point drift, the step times are accumulated and
+  # the last one may fall just short of a bin at time_max
+  epsilon = 1e-9 * max(1, time_step)
+
+  def record(time, rocket_components):
+    values = np.array([getter(rocket_component) for getter in getters])
+    previous_time, previous_values = previous
+    index = next_bin[0]
+    while index < len(bin_times) and bin_times[index] <= time + epsilon:
+      bin_time = bin_times[index]
+      if previous_time is None or time == previous_time or \
+        bin_time >= time:
+        samples[index] = values
+      elif bin_time >= previous_time:
+        weight = (bin_time - previous_time) / (time - previous_time)
+        samples[index] = previous_values + weight * (values - previous_values)
+      index += 1
+    next_bin[0] = index
+    previous[0] = time
+    previous[1] = values
+
+  simulation = Simulation(rocket_component, time_max=time_max,
+    time_step=time_step, reporter=CallbackReporter(record))
+  try:
+    simulation.run()
+  except (OverflowError, ZeroDivisionError):
+    # Diverged run, the statistics leave out runs with NaN
+    samples[:] = math.nan
+  return samples
+
+
+def _run_chunk(start: int, stop: int, seed: int, dispersions: dict,
+  bin_times: np.ndarray, quantities: tuple, time_max: float, time_step: float,
+  atmosphere_model: type) -> np.ndarray:
+  """
+  Worker: simulate runs start to stop
+
+  :return np.ndarray: (runs, bins, quantities) array
+  """
+  return np.stack([
+    simulate_bins(sample_parameters(index, seed, dispersions), bin_times,
+      quantities, time_max, time_step, atmosphere_model)
+    for index in range(start, stop)
+  ])
+
+
+def monte_carlo(runs: int, dispersions: dict = None, seed: int = 0,
+  time_max: float = 100, time_step: float = 1, bin_width: float = None,
+  quantities: tuple = DEFAULT_QUANTITIES, quantiles=(0.05, 0.5, 0.95),
+  atmosphere_model: type = Atmosphere, max_workers: int = None,
+  chunk_size: int = 256) -> EnsembleStatistics:
+  """
+  Dispersion study: simulate `runs` rockets with randomly dispersed inputs
+  across a process pool, and reduce their states into per time bin means,
+  standard deviations and quantile estimates as chunks of runs complete.
+  Only the statistics and the chunks in flight are held, so memory does not
+  grow with the number of runs. The result depends only on the inputs and
+  the seed, not on max_workers or chunk_size.
+
+  :param int runs: number of runs
+  :param dict dispersions: parameter -> (distribution, a, b), defaults to
+  DEFAULT_DISPERSIONS
+  :param int seed: seed of the study, see sample_parameters
+  :param float time_max: max time of each simulation
+  :param float time_step: time step of each simulation
+  :param float bin_width: seconds between bins, defaults to time_step
+  :param tuple quantities: columns to reduce, see GETTERS
+  :param quantiles: probabilities of the quantile estimates
+  :param type atmosphere_model: unperturbed atmosphere
+  :param int max_workers: number of processes, defaults to the CPU count
+  :param int chunk_size: runs per task
+  :return EnsembleStatistics: statistics per bin, see to_dataframe
+  """
+  if dispersions is None:
+    dispersions = DEFAULT_DISPERSIONS
+  unknown = set(dispersions) - set(DISPERSION_PARAMETERS)
+  if unknown:
+    raise ValueError(f'Unknown dispersion parameters: {sorted(unknown)}')
+  unknown = set(quantities) - set(GETTERS)
+  if unknown:
+    raise ValueError(f'Unknown quantities: {sorted(unknown)}')
+  for distribution, _, _ in dispersions.values():
+    if distribution not in DISTRIBUTIONS:
+      raise ValueError(f'Unknown distribution: {distribution}')
+
+  if bin_width is None:
+    bin_width = time_step
+  # Tolerance for floating point drift, so time_max itself is included
+  bin_times = bin_width * np.arange(
+    math.floor(time_max / bin_width + 1e-9) + 1)
+  statistics = EnsembleStatistics(bin_times, quantities, quantiles)
+
+  worker = partial(_run_chunk, seed=seed, dispersions=dispersions,
+    bin_times=bin_times, quantities=tuple(quantities), time_max=time_max,
+    time_step=time_step, atmosphere_model=atmosphere_model)
+  workers = max_workers or os.cpu_count() or 1
+  starts = iter(range(0, runs, chunk_size))
+  with ProcessPoolExecutor(max_workers=max_workers) as executor:
+    # Chunks are reduced in run order, so the statistics see the runs in the
+    # same order however the work is split. At most two chunks per worker
+    # are in flight, so finished chunks cannot pile up in memory.
+    in_flight = deque()
+    for start in itertools.islice(starts, 2 * workers):
+      in_flight.append(executor.submit(worker, start,
+        min(start + chunk_size, runs)))
+    while in_flight:
+      samples = in_flight.popleft().result()
+      start = next(starts, None)
+      if start is not None:
+        in_flight.append(executor.submit(worker, start,
+          min(start + chunk_size, runs)))
+      statistics.update(samples)
+  return statistics
+
+
+### MAIN ###
+def main(argv=None):
+  parser = argparse.ArgumentParser(
+    description='Monte Carlo dispersion study with per time bin statistics')
+  parser.add_argument('--runs', type=int, default=1000,
+    help='number of runs')
+  parser.add_argument('--seed', type=int, default=0,
+    help='seed of the study')
+  parser.add_argument('--disperse', nargs=4, action='append', default=None,
+    metavar=('PARAMETER', 'DISTRIBUTION', 'A', 'B'),
+    help='dispersion of one parameter, e.g. "mass_fuel normal 375000 3750", '
+    'replaces the defaults; repeat for several parameters')
+  parser.add_argument('--time-max', type=float, default=100,
+    help='max time of each simulation')
+  parser.add_argument('--time-step', type=float, default=1,
+    help='time step of each simulation')
+  parser.add_argument('--bin-width', type=float, default=None,
+    help='seconds between bins, defaults to the time step')
+  parser.add_argument('--quantities', nargs='+', default=DEFAULT_QUANTITIES,
+    help='logged columns to reduce')
+  parser.add_argument('--quantiles', type=float, nargs='+',
+    default=(0.05, 0.5, 0.95), help='quantiles to estimate')
+  parser.add_argument('--standard-atmosphere', action='store_true',
+    help='disperse around the 1976 standard atmosphere instead of the '
+    'constant one')
+  parser.add_argument('--workers', type=int, default=None,
+    help='number of worker processes')
+  parser.add_argument('--chunk-size', type=int, default=256,
+    help='runs per task')
+  parser.add_argument('--output', default=None,
+    help='CSV file to write, printed if omitted')
+  args = parser.parse_args(argv)
+
+  dispersions = None
+  if args.disperse:
+    dispersions = {name: (distribution, float(a), float(b))
+      for name, distribution, a, b in args.disperse}
+  statistics = monte_carlo(args.runs, dispersions, seed=args.seed,
+    time_max=args.time_max, time_step=args.time_step,
+    bin_width=args.bin_width, quantities=tuple(args.quantities),
+    quantiles=args.quantiles,
+    atmosphere_model=StandardAtmosphere if args.standard_atmosphere
+      else Atmosphere,
+    max_workers=args.workers, chunk_size=args.chunk_size)
+
+  results = statistics.to_dataframe()
+  if args.output:
+    results.to_csv(args.output, index=False)
+  else:
+    print(results.to_string(index=False))
+  print(f'{statistics.count} runs, {statistics.failed} failed')
+  return statistics
+
+
+if __name__ == '__main__':
+  main()
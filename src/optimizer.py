@@ -0,0 +1,271 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import functools
+import math
+import os
+import time
+
+import numpy as np
+import scipy.optimize as optimize
+
+from sweep import STAGE_PARAMETERS, SUMMARY_FIELDS, SWEEP_PARAMETERS, \
+  summarize_run
+
+
+# Objectives to minimize, called as objective(summary, parameters, **options)
+# with summary a dict of SUMMARY_FIELDS and parameters the candidate values
+def max_apogee(summary: dict, parameters: dict) -> float:
+  """
+  Highest apogee
+  """
+  return -summary['apogee']
+
+
+def target_burnout(summary: dict, parameters: dict,
+  target_altitude: float = None, target_velocity: float = None) -> float:
+  """
+  Altitude and/or velocity at burnout closest to the targets, relative
+  squared error. Runs that do not burn out score worst.
+  """
+  if math.isnan(summary['burnout_time']):
+    return math.inf
+  error = 0.0
+  if target_altitude is not None:
+    error += ((summary['burnout_altitude'] - target_altitude) /
+      target_altitude) ** 2
+  if target_velocity is not None:
+    error += ((summary['burnout_velocity'] - target_velocity) /
+      target_velocity) ** 2
+  return error
+
+
+def min_fuel(summary: dict, parameters: dict, target_altitude: float = None,
+  penalty: float = 1e3) -> float:
+  """
+  Least fuel, over every stage, that still reaches target_altitude. Falling
+  short is charged `penalty` kg per meter.
+  """
+  mass_fuel = parameters.get('mass_fuel', 375000) + \
+    sum(parameters.get(name, 0) for name in STAGE_PARAMETERS) - \
+    summary['final_mass_fuel']
+  shortfall = max(0.0, target_altitude - summary['apogee']) \
+    if target_altitude is not None else 0.0
+  return mass_fuel + penalty * shortfall
+
+
+OBJECTIVES = {
+  'max_apogee': max_apogee,
+  'target_burnout': target_burnout,
+  'min_fuel': min_fuel,
+}
+
+# Objective -> options of which at least one must be given
+REQUIRED_OPTIONS = {
+  'target_burnout': ('target_altitude', 'target_velocity'),
+  'min_fuel': ('target_altitude',),
+}
+
+
+def evaluate(x: tuple, names: tuple, objective: str, options: dict,
+  fixed: dict, time_max: float) -> float:
+  """
+  Worker: simulate one candidate and score it
+
+  :param tuple x: candidate values ordered like names
+  :param tuple names: SWEEP_PARAMETERS being optimized
+  :param str objective: key of OBJECTIVES
+  :param dict options: keyword arguments of the objective
+  :param dict fixed: parameters held constant
+  :param float time_max: max time of each simulation
+  :return float: objective value, lower is better
+  """
+  parameters = dict(fixed, **dict(zip(names, x)))
+  summary = dict(zip(SUMMARY_FIELDS, summarize_run(parameters, time_max)))
+  value = OBJECTIVES[objective](summary, parameters, **options)
+  return value if math.isfinite(value) else np.finfo(np.float64).max
+
+
+
+class CachingMap:
+  """
+  Map-like callable for differential_evolution's `workers`: evaluates a
+  population across a process pool, skipping candidates already evaluated.
+  """
+
+  def __init__(self, executor: ProcessPoolExecutor, chunksize: int = 1) \
+    -> None:
+    """
+    :param ProcessPoolExecutor executor: pool to evaluate on, None to
+    evaluate in this process
+    :param int chunksize: candidates sent to a worker at once
+    """
+    self.executor = executor
+    self.chunksize = chunksize
+    self.cache = {} # candidate tuple -> objective value
+    self.evaluations = 0
+    self.cache_hits = 0
+
+
+  def __call__(self, function, candidates) -> list:
+    keys = [tuple(float(value) for value in candidate)
+      for candidate in candidates]
+    missing = list(dict.fromkeys(key for key in keys if key not in self.cache))
+    self.cache_hits += len(keys) - len(missing)
+    if missing:
+      if self.executor is None:
+        values = map(function, missing)
+      else:
+        values = self.executor.map(function, missing,
+          chunksize=self.chunksize)
+      self.cache.update(zip(missing, values))
+      self.evaluations += len(missing)
+    return [self.cache[key] for key in keys]
+
+
+
+def optimize_trajectory(bounds: dict, objective: str = 'max_apogee',
+  time_max: float = 100, fixed: dict = None, max_workers: int = None,
+  maxiter: int = 50, popsize: int = 15, tol: float = 0.01, seed=None,
+  **options) -> dict:
+  """
+  Search RocketComponent parameters with scipy's differential evolution, a
+  derivative free method that evaluates a whole population per generation.
+  Populations are spread over a process pool and every evaluated candidate
+  is cached, so repeated points cost nothing.
+
+  :param dict bounds: parameter name (see SWEEP_PARAMETERS) -> (low, high),
+  e.g. the fuel load of the head and of each stage below it
+  :param str objective: one of OBJECTIVES
+  :param float time_max: max time of each simulation
+  :param dict fixed: parameters held constant
+  :param int max_workers: number of processes, defaults to the CPU count,
+  1 to evaluate in this process
+  :param int maxiter: max generations
+  :param int popsize: population size multiplier, see differential_evolution
+  :param float tol: relative convergence tolerance
+  :param seed: random seed
+  :param options: keyword arguments of the objective, e.g. target_altitude
+  :return dict: best 'parameters' and 'value', 'history' (one dict per
+  generation), 'evaluations', 'cache_hits', 'seconds',
+  'evaluations_per_second', 'success' and 'message'
+  """
+  if objective not in OBJECTIVES:
+    raise ValueError(f'Unknown objective {objective!r}, expected one of '
+      f'{sorted(OBJECTIVES)}')
+  unknown = (set(bounds) | set(fixed or {})) - set(SWEEP_PARAMETERS)
+  if unknown:
+    raise ValueError(f'Unknown parameters: {sorted(unknown)}')
+  required = REQUIRED_OPTIONS.get(objective, ())
+  if required and all(options.get(name) is None for name in required):
+    raise ValueError(f'Objective {objective!r} needs '
+      f'{" or ".join(required)}')
+
+  names = tuple(bounds)
+  function = functools.partial(evaluate, names=names, objective=objective,
+    options=options, fixed=dict(fixed or {}), time_max=time_max)
+  history = []
+  start = time.perf_counter()
+
+  executor = ProcessPoolExecutor(max_workers=max_workers) \
+    if max_workers != 1 else None
+  # About four chunks per process and generation
+  population = popsize * len(names)
+  workers = CachingMap(executor, chunksize=max(1,
+    population // (4 * (max_workers or os.cpu_count() or 1))))
+
+  def callback(xk, convergence=None):
+    # The best candidate was evaluated in its generation, so its value is
+    # normally cached
+    x = tuple(float(value) for value in xk)
+    value = workers.cache[x] if x in workers.cache else function(x)
+    history.append({
+      'generation': len(history) + 1,
+      'value': float(value),
+      'parameters': dict(zip(names, x)),
+      'convergence': float(convergence) if convergence is not None
+        else math.nan,
+      'evaluations': workers.evaluations,
+      'seconds': time.perf_counter() - start,
+    })
+
+  try:
+    result = optimize.differential_evolution(function,
+      [bounds[name] for name in names], maxiter=maxiter, popsize=popsize,
+      tol=tol, seed=seed, workers=workers, updating='deferred',
+      polish=False, callback=callback)
+  finally:
+    if executor is not None:
+      executor.shutdown()
+
+  seconds = time.perf_counter() - start
+  return {
+    'parameters': dict(zip(names, map(float, result.x))),
+    'value': float(result.fun),
+    'history': history,
+    'evaluations': workers.evaluations,
+    'cache_hits': workers.cache_hits,
+    'seconds': seconds,
+    'evaluations_per_second': workers.evaluations / seconds,
+    'success': bool(result.success),
+    'message': result.message,
+  }
+
+
+### MAIN ###
+def main(argv=None):
+  parser = argparse.ArgumentParser(
+    description='Optimize RocketComponent parameters in parallel')
+  for name in SWEEP_PARAMETERS:
+    parser.add_argument(f'--{name.replace("_", "-")}', dest=name, type=float,
+      nargs='+', metavar='VALUE',
+      help=f'LOW HIGH bounds of {name} to search, or one fixed value')
+  parser.add_argument('--objective', choices=sorted(OBJECTIVES),
+    default='max_apogee')
+  parser.add_argument('--target-altitude', type=float, default=None)
+  parser.add_argument('--target-velocity', type=float, default=None)
+  parser.add_argument('--time-max', type=float, default=100,
+    help='max time of each simulation')
+  parser.add_argument('--workers', type=int, default=None,
+    help='number of worker processes')
+  parser.add_argument('--maxiter', type=int, default=50,
+    help='max generations')
+  parser.add_argument('--popsize', type=int, default=15,
+    help='population size multiplier')
+  parser.add_argument('--seed', type=int, default=None)
+  args = parser.parse_args(argv)
+
+  bounds, fixed = {}, {}
+  for name in SWEEP_PARAMETERS:
+    values = getattr(args, name)
+    if values is None:
+      continue
+    if len(values) == 1:
+      fixed[name] = values[0]
+    elif len(values) == 2:
+      bounds[name] = tuple(values)
+    else:
+      parser.error(f'--{name.replace("_", "-")} takes LOW HIGH or one value')
+  if not bounds:
+    parser.error('give LOW HIGH bounds for at least one parameter')
+
+  options = {}
+  if args.target_altitude is not None:
+    options['target_altitude'] = args.target_altitude
+  if args.target_velocity is not None and args.objective == 'target_burnout':
+    options['target_velocity'] = args.target_velocity
+
+  result = optimize_trajectory(bounds, objective=args.objective,
+    time_max=args.time_max, fixed=fixed, max_workers=args.workers,
+    maxiter=args.maxiter, popsize=args.popsize, seed=args.seed, **options)
+
+  for entry in result['history']:
+    print(f"generation {entry['generation']}: {entry['value']:.6g} "
+      f"({entry['evaluations']} evaluations, {entry['seconds']:.1f}s)")
+  print(f"best {result['value']:.6g} at {result['parameters']}")
+  print(f"{result['evaluations']} evaluations, {result['cache_hits']} cache "
+    f"hits, {result['evaluations_per_second']:.1f} evaluations/s")
+  return result
+
+
+if __name__ == '__main__':
+  main()
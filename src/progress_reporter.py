@@ -0,0 +1,123 @@
+from abc import ABC, abstractmethod
+import sys
+import time as clock
+
+
+class ProgressReporter(ABC):
+  """
+  Receives the simulation state after every step. Reporters format lazily,
+  only when they actually emit something, so suppressed output costs a
+  method call per step.
+  """
+
+  @abstractmethod
+  def report(self, time: float, rocket_components: list) -> None:
+    """
+    :param float time: simulation time
+    :param list rocket_components: components to report on
+    """
+
+
+  def finish(self, time: float, rocket_components: list) -> None:
+    """
+    Called once when the simulation ends
+
+    :param float time: final simulation time
+    :param list rocket_components: components to report on
+    """
+
+
+  @staticmethod
+  def format(time: float, rocket_components: list) -> str:
+    """
+    :return str: one line per rocket component
+    """
+    return '\n'.join(f'{time}: {rocket_component.string_info()}'
+      for rocket_component in rocket_components)
+
+
+
+class PrintReporter(ProgressReporter):
+  """
+  Prints every step
+  """
+
+  def __init__(self, stream=None) -> None:
+    """
+    :param stream: file to write to, defaults to sys.stdout at report time
+    """
+    self.stream = stream
+
+
+  def report(self, time: float, rocket_components: list) -> None:
+    print(self.format(time, rocket_components), file=self.stream)
+
+
+
+class SilentReporter(ProgressReporter):
+  """
+  Reports nothing
+  """
+
+  def report(self, time: float, rocket_components: list) -> None:
+    pass
+
+
+
+class RateLimitedReporter(ProgressReporter):
+  """
+  Prints at most `rate` reports per second of wall time, plus the final
+  state
+  """
+
+  def __init__(self, rate: float = 1, stream=None) -> None:
+    """
+    :param float rate: reports per second
+    :param stream: file to write to, defaults to sys.stdout at report time
+    """
+    if rate <= 0:
+      raise ValueError('rate must be positive')
+    self.interval = 1 / rate
+    self.stream = stream
+    self._next = None # wall clock time of the next report
+    self._reported = None # simulation time of the last report
+
+
+  def report(self, time: float, rocket_components: list) -> None:
+    now = clock.monotonic()
+    if self._next is not None and now < self._next:
+      return
+    self._next = now + self.interval
+    self._reported = time
+    print(self.format(time, rocket_components), file=self.stream)
+
+
+  def finish(self, time: float, rocket_components: list) -> None:
+    if self._reported != time:
+      print(self.format(time, rocket_components), file=self.stream)
+    (self.stream or sys.stdout).flush()
+
+
+
+class CallbackReporter(ProgressReporter):
+  """
+  Hands every report to a callback
+  """
+
+  def __init__(self, callback, on_finish=None) -> None:
+    """
+    :param callback: called as callback(time, rocket_components)
+    :param on_finish: called as on_finish(time, rocket_components) when the
+    simulation ends, None to skip
+    """
+    self.callback = callback
+    self.on_finish = on_finish
+
+
+  def report(self, time: float, rocket_components: list) -> None:
+    self.callback(time, rocket_components)
+
+
+  def finish(self, time: float, rocket_components: list) -> None:
+    if self.on_finish is not None:
+      self.on_finish(time, rocket_components)
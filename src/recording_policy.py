@@ -0,0 +1,140 @@
+from abc import ABC, abstractmethod
+from operator import attrgetter
+
+from rocket_log import RocketLog
+
+
+# Component attribute behind each RocketLog column, used by OnChange
+GETTERS = {column: attrgetter(attribute)
+  for column, attribute in RocketLog.ATTRIBUTES.items() if column != 'id'}
+
+
+class RecordingPolicy(ABC):
+  """
+  Decides which steps a RocketLog records. The first row and rows marked
+  with events (burnout, separation, apogee, impact) are always recorded; the
+  policy is asked about every other row.
+  """
+
+  @abstractmethod
+  def should_record(self, rocket_component, time: float) -> bool:
+    """
+    :param RocketComponent rocket_component: component about to be logged
+    :param float time: simulation time of its state
+    :return bool: True to record the row
+    """
+
+
+  def recorded(self, rocket_component, time: float) -> None:
+    """
+    Called after every recorded row, including forced ones
+
+    :param RocketComponent rocket_component: component that was logged
+    :param float time: simulation time of the row
+    """
+
+
+
+class EveryNthStep(RecordingPolicy):
+  """
+  Records one step out of every n
+  """
+
+  def __init__(self, n: int) -> None:
+    """
+    :param int n: steps between recorded rows
+    """
+    if n < 1:
+      raise ValueError('n must be at least 1')
+    self.n = n
+    self._steps = 0 # since the last recorded row
+
+
+  def should_record(self, rocket_component, time: float) -> bool:
+    self._steps += 1
+    return self._steps >= self.n
+
+
+  def recorded(self, rocket_component, time: float) -> None:
+    self._steps = 0
+
+
+
+class EveryInterval(RecordingPolicy):
+  """
+  Records a step once `interval` seconds of simulation time have passed
+  since the last recorded row
+  """
+
+  def __init__(self, interval: float) -> None:
+    """
+    :param float interval: simulation seconds between recorded rows
+    """
+    self.interval = interval
+    self._last_time = None
+    # Tolerance for floating point drift when comparing times
+    self._epsilon = 1e-9 * max(1, interval)
+
+
+  def should_record(self, rocket_component, time: float) -> bool:
+    return self._last_time is None or \
+      time - self._last_time >= self.interval - self._epsilon
+
+
+  def recorded(self, rocket_component, time: float) -> None:
+    self._last_time = time
+
+
+
+class OnChange(RecordingPolicy):
+  """
+  Records a step once any watched column has changed by at least its
+  threshold since the last recorded row
+  """
+
+  def __init__(self, **thresholds) -> None:
+    """
+    :param thresholds: absolute change per RocketLog column name, see
+    GETTERS, e.g. OnChange(pos_y=100, velocity_r=10)
+    """
+    unknown = set(thresholds) - set(GETTERS)
+    if unknown:
+      raise ValueError(f'Unknown columns {sorted(unknown)}, expected some of '
+        f'{sorted(GETTERS)}')
+    self.thresholds = [(GETTERS[column], threshold)
+      for column, threshold in thresholds.items()]
+    self._last_values = None
+
+
+  def should_record(self, rocket_component, time: float) -> bool:
+    if self._last_values is None:
+      return True
+    return any(abs(getter(rocket_component) - last_value) >= threshold
+      for (getter, threshold), last_value in
+      zip(self.thresholds, self._last_values))
+
+
+  def recorded(self, rocket_component, time: float) -> None:
+    self._last_values = [getter(rocket_component)
+      for getter, _ in self.thresholds]
+
+
+
+class AnyOf(RecordingPolicy):
+  """
+  Records a step if any of several policies would
+  """
+
+  def __init__(self, *policies: RecordingPolicy) -> None:
+    self.policies = policies
+
+
+  def should_record(self, rocket_component, time: float) -> bool:
+    # Ask every policy, so step counters stay in sync
+    return any([policy.should_record(rocket_component, time)
+      for policy in self.policies])
+
+
+  def recorded(self, rocket_component, time: float) -> None:
+    for policy in self.policies:
+      policy.recorded(rocket_component, time)
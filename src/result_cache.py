@@ -0,0 +1,393 @@
+import argparse
+from array import array
+import hashlib
+import io
+import json
+import os
+import pickle
+import shutil
+
+import numpy as np
+
+from vector import Vector
+
+
+# Attributes left out of cache keys and cached results, set up per run
+EXCLUDED_ATTRIBUTES = ('instrumentation', 'writer')
+
+_code_version = None
+
+
+def code_version(directory: str = None) -> str:
+  """
+  Hash of every module in a directory, so editing the simulation code
+  invalidates every cached result
+
+  :param str directory: directory to hash, defaults to this file's, whose
+  hash is computed once per process
+  :return str: hex digest
+  """
+  global _code_version
+  if directory is None and _code_version is not None:
+    return _code_version
+  digest = hashlib.sha256()
+  source_directory = directory or os.path.dirname(os.path.abspath(__file__))
+  for name in sorted(os.listdir(source_directory)):
+    if name.endswith('.py'):
+      digest.update(name.encode())
+      with open(os.path.join(source_directory, name), 'rb') as file:
+        digest.update(file.read())
+  if directory is None:
+    _code_version = digest.hexdigest()
+  return digest.hexdigest()
+
+
+def fingerprint(value, memo: dict = None):
+  """
+  Canonical, JSON serializable form of a value. Floats are written exactly
+  as hex, objects as their class and state, and objects seen before (e.g.
+  the components a StageTable points back to) as a reference to their first
+  occurrence.
+
+  :param value: value to describe
+  :param dict memo: id -> (index, object) of the objects described so far
+  :return: nested lists, strings and numbers
+  """
+  if memo is None:
+    memo = {}
+  if value is None or isinstance(value, (bool, str)):
+    return value
+  if isinstance(value, (int, np.integer)):
+    return int(value)
+  if isinstance(value, (float, np.floating)):
+    return float(value).hex()
+  if isinstance(value, (list, tuple)):
+    return [fingerprint(item, memo) for item in value]
+  if isinstance(value, dict):
+    return [[fingerprint(key, memo), fingerprint(item, memo)]
+      for key, item in sorted(value.items(), key=lambda item: repr(item[0]))]
+  if isinstance(value, np.ndarray):
+    return [str(value.dtype), fingerprint(value.tolist(), memo)]
+  if isinstance(value, array):
+    return [value.typecode, fingerprint(value.tolist(), memo)]
+  if isinstance(value, type):
+    return f'{value.__module__}.{value.__qualname__}'
+  if isinstance(value, Vector):
+    # r and theta are derived from x and y, and only cached once read
+    return ['Vector', fingerprint(value.x, memo), fingerprint(value.y, memo)]
+
+  if id(value) in memo:
+    return ['ref', memo[id(value)][0]]
+  # Holding on to the value keeps its id from being reused
+  memo[id(value)] = (len(memo), value)
+  # object.__getstate__ only exists from Python 3.11
+  getstate = getattr(value, '__getstate__', None)
+  state = getstate() if getstate is not None else \
+    getattr(value, '__dict__', None)
+  if state is None:
+    # No instance state, e.g. operator.attrgetter, described by how it
+    # pickles instead, leaving out the reconstructor
+    state = value.__reduce_ex__(pickle.HIGHEST_PROTOCOL)[1:]
+  elif isinstance(state, dict):
+    state = {name: item for name, item in state.items()
+      if name not in EXCLUDED_ATTRIBUTES}
+  return [fingerprint(type(value), memo), fingerprint(state, memo)]
+
+
+
+class _ResultPickler(pickle.Pickler):
+  """
+  Pickles references to the simulation's rocket components by index, so a
+  cached result can be loaded into a new simulation's own components
+  """
+
+  def __init__(self, file, rocket_components: list) -> None:
+    super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+    self._indices = {id(component): index
+      for index, component in enumerate(rocket_components)}
+
+
+  def persistent_id(self, obj):
+    return self._indices.get(id(obj))
+
+
+
+class _ResultUnpickler(pickle.Unpickler):
+
+  def __init__(self, file, rocket_components: list) -> None:
+    super().__init__(file)
+    self._rocket_components = rocket_components
+
+
+  def persistent_load(self, pid):
+    return self._rocket_components[pid]
+
+
+
+class ResultCache:
+  """
+  On-disk cache of finished simulations, keyed by a hash of everything that
+  determines a trajectory: the rocket components with their atmospheres and
+  recording policies, the Simulation's integration settings (see
+  Simulation.CACHE_SETTINGS) and the code version. Each entry is a pickle of
+  the final state, {key}.pkl, plus a copy of each log file the run wrote,
+  {key}.{index}.{extension}, so a hit only copies the files. When the
+  entries exceed max_bytes, the least recently used ones are evicted.
+  """
+
+  def __init__(self, directory: str = None,
+    max_bytes: int = 512 * 1024 ** 2) -> None:
+    """
+    :param str directory: cache directory, defaults to .result_cache next to
+    this file
+    :param int max_bytes: total size of the cached entries to keep
+    """
+    if directory is None:
+      directory = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+        '.result_cache')
+    self.directory = directory
+    self.max_bytes = max_bytes
+    self.hits = 0
+    self.misses = 0
+
+
+  def key(self, simulation) -> str:
+    """
+    :param Simulation simulation: simulation that has not run yet
+    :return str: hex digest of its inputs
+    """
+    inputs = {
+      'code_version': code_version(),
+      'rocket_components': simulation.rocket_components,
+      'settings': {name: getattr(simulation, name)
+        for name in simulation.CACHE_SETTINGS},
+    }
+    text = json.dumps(fingerprint(inputs), separators=(',', ':'))
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+  def path(self, key: str) -> str:
+    return os.path.join(self.directory, f'{key}.pkl')
+
+
+  def log_file_path(self, key: str, index: int, extension: str) -> str:
+    """
+    :param str key: see key
+    :param int index: rocket component index, see store
+    :param str extension: log file extension, e.g. '.jsonl'
+    :return str: path of the cached copy of a log file
+    """
+    return os.path.join(self.directory, f'{key}.{index}{extension}')
+
+
+  def __contains__(self, key: str) -> bool:
+    return os.path.exists(self.path(key))
+
+
+  def files(self) -> dict:
+    """
+    :return dict: key -> paths of its files, the pickle first
+    """
+    if not os.path.isdir(self.directory):
+      return {}
+    files = {}
+    for entry in sorted(os.scandir(self.directory),
+      key=lambda entry: (not entry.name.endswith('.pkl'), entry.name)):
+      if entry.name.endswith('.tmp'):
+        continue
+      files.setdefault(entry.name.split('.', 1)[0], []).append(entry.path)
+    return files
+
+
+  def entries(self) -> list:
+    """
+    :return list: (last use, size, key) of every entry, least recently used
+    first
+    """
+    entries = []
+    for key, paths in self.files().items():
+      try:
+        last_use = os.stat(self.path(key)).st_mtime
+        size = sum(os.path.getsize(path) for path in paths)
+      except FileNotFoundError:
+        # Being stored or removed
+        continue
+      entries.append((last_use, size, key))
+    return sorted(entries)
+
+
+  def __len__(self) -> int:
+    return len(self.entries())
+
+
+  def size(self) -> int:
+    """
+    :return int: total bytes of the cached entries
+    """
+    return sum(size for _, size, _ in self.entries())
+
+
+  def store(self, key: str, simulation, rocket_components: list) -> None:
+    """
+    Save the result of a finished simulation and a copy of its log files,
+    see store_log_files
+
+    :param str key: see key, computed before the run
+    :param Simulation simulation: the finished simulation, log outputs
+    closed
+    :param list rocket_components: every rocket component of the simulation
+    when the key was computed, see Simulation.get_all_rocket_components
+    """
+    buffer = io.BytesIO()
+    _ResultPickler(buffer, rocket_components).dump((
+      {name: getattr(simulation, name)
+        for name in simulation.RESULT_ATTRIBUTES},
+      [{name: value for name, value in vars(component).items()
+        if name not in EXCLUDED_ATTRIBUTES}
+        for component in rocket_components],
+    ))
+
+    os.makedirs(self.directory, exist_ok=True)
+    path = self.path(key)
+    temporary_path = f'{path}.tmp'
+    with open(temporary_path, 'wb') as file:
+      file.write(buffer.getbuffer())
+    self.store_log_files(key, simulation, rocket_components, evict=False)
+    # The pickle last, so an entry is only found once complete
+    os.replace(temporary_path, path)
+    self.evict()
+
+
+  def store_log_files(self, key: str, simulation, rocket_components: list,
+    evict: bool = True) -> None:
+    """
+    Keep a copy of the log files of a finished simulation that the entry
+    does not hold yet, e.g. those of a hit in another log format. Files a
+    background writer may have thinned, with backpressure 'drop', are not
+    kept.
+
+    :param str key: see key
+    :param Simulation simulation: the finished simulation, log outputs
+    closed
+    :param list rocket_components: see store
+    :param bool evict: evict entries over max_bytes afterwards
+    """
+    if simulation.log_background and simulation.log_backpressure == 'drop':
+      return
+    for index, component in enumerate(rocket_components):
+      rocket_log = component.rocket_log
+      if rocket_log is None or rocket_log.output_path is None or \
+        not os.path.exists(rocket_log.output_path):
+        continue
+      path = self.log_file_path(key, index,
+        os.path.splitext(rocket_log.output_path)[1])
+      if not os.path.exists(path):
+        shutil.copyfile(rocket_log.output_path, path)
+    if evict:
+      self.evict()
+
+
+  def load(self, key: str, simulation, rocket_components: list) -> bool:
+    """
+    Restore a cached result into a simulation and its rocket components
+
+    :param str key: see key
+    :param Simulation simulation: simulation the key was computed for
+    :param list rocket_components: its rocket components, see store
+    :return bool: True on a hit, False if nothing is cached
+    """
+    path = self.path(key)
+    try:
+      with open(path, 'rb') as file:
+        attributes, states = _ResultUnpickler(file, rocket_components).load()
+    except FileNotFoundError:
+      self.misses += 1
+      return False
+    # Mark it as recently used
+    os.utime(path)
+    self.hits += 1
+
+    for component, state in zip(rocket_components, states):
+      component.__dict__.update(state)
+    for name, value in attributes.items():
+      setattr(simulation, name, value)
+    return True
+
+
+  def copy_log_file(self, key: str, index: int, path: str) -> bool:
+    """
+    Copy the cached log file of a rocket component, if there is one in the
+    format of path
+
+    :param str key: see key
+    :param int index: rocket component index, see store
+    :param str path: file to write
+    :return bool: True if the file was copied
+    """
+    try:
+      shutil.copyfile(self.log_file_path(key, index,
+        os.path.splitext(path)[1]), path)
+    except FileNotFoundError:
+      return False
+    return True
+
+
+  def remove(self, key: str) -> bool:
+    """
+    Delete every file of an entry
+
+    :param str key: see key
+    :return bool: True if the entry existed
+    """
+    paths = self.files().get(key, [])
+    for path in paths:
+      try:
+        os.remove(path)
+      except FileNotFoundError:
+        pass
+    return bool(paths)
+
+
+  def evict(self) -> None:
+    """
+    Remove the least recently used entries until the cache fits in
+    max_bytes
+    """
+    entries = self.entries()
+    total = sum(size for _, size, _ in entries)
+    for _, size, key in entries:
+      if total <= self.max_bytes:
+        break
+      self.remove(key)
+      total -= size
+
+
+  def invalidate(self, key: str = None) -> int:
+    """
+    Remove one entry, or every entry
+
+    :param str key: entry to remove, None to clear the cache
+    :return int: number of entries removed
+    """
+    keys = [key] if key is not None else list(self.files())
+    return sum(self.remove(key) for key in keys)
+
+
+### MAIN ###
+def main(argv=None):
+  parser = argparse.ArgumentParser(description='Inspect the result cache')
+  parser.add_argument('--directory', default=None,
+    help='cache directory, defaults to src/.result_cache')
+  parser.add_argument('--clear', action='store_true',
+    help='remove every cached result')
+  args = parser.parse_args(argv)
+
+  cache = ResultCache(args.directory)
+  if args.clear:
+    print(f'removed {cache.invalidate()} entries')
+  else:
+    print(f'{len(cache)} entries, {cache.size()} bytes in {cache.directory}')
+
+
+if __name__ == '__main__':
+  main()
@@ -1,20 +1,66 @@
 from abc import ABC, abstractmethod
+import copy
 import math
 import os
 
-import scipy.integrate as integrate
-
 from atmosphere import Atmosphere
+from flight_summary import FlightSummary
+from force_model import FORCE_MODELS, GRAVITATIONAL_CONSTANT, MASS_EARTH, \
+  RADIUS_EARTH
 from position import CartesianPosition
 import rocket_log as rl
+import rocket_log_writer as rlw
+from stage_table import StageTable
 from vector import Vector
 
 
+
+class _ForceParameter:
+  """
+  Parameter the force models precompute from, see ForceModel. Setting it
+  drops the models, so the next force computation rebuilds them for the new
+  value.
+  """
+
+  def __set_name__(self, owner: type, name: str) -> None:
+    self.name = name
+    self.private_name = f'_{name}'
+
+
+  def __get__(self, instance, owner: type = None):
+    if instance is None:
+      return self
+    return getattr(instance, self.private_name)
+
+
+  def __set__(self, instance, value) -> None:
+    setattr(instance, self.private_name, value)
+    instance._force_models = None
+    instance._force_pipeline = None
+
+
+
 class RocketComponent(ABC):
-  
+
+  # Instrumentation to report update timings into, None to disable
+  instrumentation = None
+
+  # Parameters the default force models are built from
+  alpha = _ForceParameter()
+  width = _ForceParameter()
+  length = _ForceParameter()
+  fuel_flow_rate = _ForceParameter()
+  velocity_exhaust = _ForceParameter()
+  pressure_exhaust = _ForceParameter()
+  area_exhaust = _ForceParameter()
+  drag_coefficient = _ForceParameter()
+  lift_coefficient = _ForceParameter()
+
   def __init__(self, id, alpha=(math.pi / 2),
     position:CartesianPosition=CartesianPosition(0, 0),
-    velocity:Vector=Vector(x=0, y=0), keep_log=True) -> None:
+    velocity:Vector=Vector(x=0, y=0), keep_log=True,
+    atmosphere_model:type=Atmosphere, summarize=False,
+    force_models:dict=None, log_columns='full') -> None:
     
     self.id = id
 
@@ -24,7 +70,11 @@ class RocketComponent(ABC):
     self.velocity = velocity
 
     # Atmosphere Object
-    self.atmosphere = Atmosphere(self.position.y)
+    self.atmosphere = atmosphere_model(self.position.y)
+
+    # Stage Table row holding this component's masses
+    self.stage_table = StageTable()
+    self.stage_index = self.stage_table.add_stage(self)
 
     # Mass Properties (Falcon 9 ex.)
     self.mass_fuel = 375000  # kg
@@ -38,27 +88,129 @@ class RocketComponent(ABC):
     self.pressure_exhaust = 70927.5  # N/m^2
     self.velocity_exhaust = 3000 * 9 # m/s
 
-    # Forces
-    self.drag_force = self.calc_drag_force()  # N
-    self.gravity_force = self.calc_gravity_force()  # N
-    self.lift_force = self.calc_lift_force()  # N
-    self.thrust_force = self.calc_thrust_force()  # N
+    # Aerodynamic Properties
+    self.drag_coefficient = 0.75  # approximation, replace later
+    # self.lift_coefficient = 1.5 #approximation, replace later, assume vertical launch
+    self.lift_coefficient = 0 # temp to handle vertical launch
+
+    # Force Models, name -> ForceModel class, see force_model.py
+    self.force_model_classes = dict(FORCE_MODELS, **(force_models or {}))
+    self._force_models = None # name -> ForceModel, see force_models
+    self._force_pipeline = None # (model, attribute, label) computed each step
+    self._force_summands = None # attributes of the forces that are summed
 
-    # Rocket Log
-    self.rocket_log = rl.RocketLog() if keep_log else None
+    # Forces, drag_force, gravity_force, lift_force and thrust_force in N
+    self.build_force_models()
+
+    # Rocket Log, of a preset or list of columns, see RocketLog.PRESETS
+    self.rocket_log = rl.RocketLog(columns=log_columns) if keep_log else None
+
+    # Flight Summary, aggregated online, works without a log
+    self.flight_summary = FlightSummary() if summarize else None
+
+
+  # Mass Properties, stored in the stage table
+  @property
+  def mass_fuel(self) -> float:
+    return self.stage_table.mass_fuel[self.stage_index]
+
+
+  @mass_fuel.setter
+  def mass_fuel(self, value: float) -> None:
+    self.stage_table.set_mass_fuel(self.stage_index, value)
+
+
+  @property
+  def mass_structure(self) -> float:
+    return self.stage_table.mass_structure[self.stage_index]
+
+
+  @mass_structure.setter
+  def mass_structure(self, value: float) -> None:
+    self.stage_table.set_mass_structure(self.stage_index, value)
 
 
   # Force Functions
+  @property
+  def force_models(self) -> dict:
+    """
+    name -> ForceModel, built from force_model_classes for the current
+    parameters. Models precompute what only depends on parameters such as
+    width, drag_coefficient or alpha; setting one of those rebuilds them.
+    """
+    if self._force_models is None:
+      self._force_models = {name: model_class(self)
+        for name, model_class in self.force_model_classes.items()}
+    return self._force_models
+
+
+  def build_force_models(self) -> None:
+    """
+    Build the force models from force_model_classes and compute every force.
+    Call this again after changing a parameter a custom model precomputes
+    from; Simulation.run does so before every fresh run.
+    """
+    self._force_models = None
+    percent_thrust = 1 if self.mass_fuel > 0 else 0
+    self.build_force_pipeline(percent_thrust)
+    self.calc_forces(percent_thrust)
+
+
+  def set_force_model(self, name: str, model_class: type) -> None:
+    """
+    Replace or add a force model, e.g. a Mach dependent drag model for
+    'drag'. Forces other than drag, gravity, lift and thrust are stored in
+    the model's attribute and summed, but not logged.
+
+    :param str name: force name, see force_model.FORCE_MODELS
+    :param type model_class: ForceModel subclass
+    """
+    self.force_model_classes[name] = model_class
+    self.build_force_models()
+
+
+  def build_force_pipeline(self, percent_thrust: float) -> None:
+    """
+    Split the force models into those computed every step and constant ones,
+    which are computed once now. Forces that are zero for the rest of the run
+    are left out of sum_forces. update rebuilds the pipeline after burnout.
+
+    :param float percent_thrust: engine setting for constant forces
+    """
+    pipeline = []
+    summands = []
+    for model in self.force_models.values():
+      if model.is_constant(self):
+        setattr(self, model.attribute, model.calc(self, percent_thrust))
+      else:
+        pipeline.append((model, model.attribute, f'calc_{model.attribute}'))
+      if not model.is_zero(self):
+        summands.append(model.attribute)
+    self._force_pipeline = pipeline
+    self._force_summands = summands
+
+
+  def calc_forces(self, percent_thrust: float = 1, lap=None) -> None:
+    """
+    Compute the forces that change with the state
+
+    :param float percent_thrust: engine setting, between 0 and 1
+    :param lap: Instrumentation.lap, called after each force, None to skip
+    """
+    if self._force_pipeline is None:
+      self.build_force_pipeline(percent_thrust)
+    for model, attribute, label in self._force_pipeline:
+      setattr(self, attribute, model.calc(self, percent_thrust))
+      if lap is not None:
+        lap(label)
+
+
   def calc_drag_force(self) -> Vector:
     """
     calculate the drag force acting on the rocket
     :return Vector: drag
     """
-    drag_coefficient = 0.75  # approximation, replace later
-    drag_area = math.pi * (self.width / 2) ** 2
-    drag = drag_coefficient * self.atmosphere.density * drag_area * \
-      self.velocity.r ** 2 / 2
-    return Vector(r=drag, theta=self.alpha + math.pi)
+    return self.force_models['drag'].calc(self)
 
 
   def calc_gravity_force(self) -> Vector:
@@ -66,12 +218,7 @@ class RocketComponent(ABC):
     calculate the gravitational force acting on the rocket
     :return Vector: gravity
     """
-    gravitational_constant = 6.674 * (10 ** -11)  # m^3/kg*s
-    mass_earth = 5.9722 * (10 ** 24)  # kg
-    radius_earth = 6.371 * (10 ** 6)  # m
-    gravity = gravitational_constant * mass_earth * self.get_total_mass() \
-      / ((radius_earth + self.position.y) ** 2)
-    return Vector(r=gravity, theta=3 * math.pi / 2)
+    return self.force_models['gravity'].calc(self)
 
 
   def calc_lift_force(self) -> Vector:
@@ -79,12 +226,7 @@ class RocketComponent(ABC):
     calculate the lift force acting on the rocket
     :return Vector: lift
     """
-    # lift_coefficient = 1.5 #approximation, replace later, assume vertical launch
-    lift_coefficient = 0 # temp to handle vertical launch
-    lift_area = self.length * self.width
-    lift = lift_coefficient * self.atmosphere.density * lift_area * \
-      self.velocity.r ** 2 / 2
-    return Vector(r=lift, theta=math.pi/2 + self.alpha)
+    return self.force_models['lift'].calc(self)
     
 
   def calc_thrust_force(self, percent_thrust:float=1) -> Vector:
@@ -97,28 +239,22 @@ class RocketComponent(ABC):
     Return:
       Vector: thrust force
     """
-    if percent_thrust < 0 or percent_thrust > 1:
-      raise ValueError
-    
-    momentum_thrust = percent_thrust * \
-      (self.fuel_flow_rate * self.velocity_exhaust)
-    pressure_thrust = (self.atmosphere.pressure - self.pressure_exhaust) * \
-      self.area_exhaust
-    thrust_force = momentum_thrust + pressure_thrust
-    return Vector(r=thrust_force, theta=self.alpha)
+    return self.force_models['thrust'].calc(self, percent_thrust)
   
 
   def sum_forces(self) -> Vector:
     """
-    Returns the sum of force in both the x and y directions
+    Returns the sum of force in both the x and y directions, leaving out
+    forces that are zero for the rest of the run
     :return Vector object: the resultant force vector
     """
-    sum_forces_x = self.thrust_force.x + self.lift_force.x + \
-      self.drag_force.x + self.gravity_force.x
-    sum_forces_y = self.thrust_force.y + self.lift_force.y + \
-      self.drag_force.y + self.gravity_force.y
-
-    return Vector(x=sum_forces_x, y=sum_forces_y)
+    summands = self._force_summands
+    if not summands:
+      return Vector(x=0.0, y=0.0)
+    force = getattr(self, summands[0]).copy()
+    for attribute in summands[1:]:
+      force += getattr(self, attribute)
+    return force
 
 
   # Mass Functions
@@ -137,8 +273,7 @@ class RocketComponent(ABC):
     """
     Returns the total mass of this component and its children
     """
-    mass = self.mass_fuel + self.mass_structure
-    return mass
+    return self.stage_table.mass_cumulative[self.stage_index]
 
 
   # Spatial Functions
@@ -185,21 +320,103 @@ class RocketComponent(ABC):
 
 
   # Logging Functions
-  def log(self, time: float):
+  def log(self, time: float, events=()):
     """
     Log our RocketComponent with RocketLog
 
     :param float time: The current time
+    :param tuple events: names of events that happened at this state, these
+    rows are recorded regardless of the log's recording policy
     """
+    if self.flight_summary is not None:
+      self.flight_summary.observe(self, time, events)
     if self.rocket_log is not None:
-      return self.rocket_log.add(self, time)
+      return self.rocket_log.add(self, time, events)
     return None
+
+
+  def detect_events(self, mass_fuel: float, velocity: Vector,
+    position: CartesianPosition) -> list:
+    """
+    Events that happened between a previous state and the current one
+
+    :param float mass_fuel: previous fuel mass
+    :param Vector velocity: previous velocity
+    :param CartesianPosition position: previous position
+    :return list: names of the events, in the order 'burnout', 'apogee',
+    'impact'
+    """
+    events = []
+    if mass_fuel > 0 and self.mass_fuel <= 0:
+      events.append('burnout')
+    if velocity.y > 0 and self.velocity.y <= 0:
+      events.append('apogee')
+    if position.y > 0 and self.position.y <= 0:
+      events.append('impact')
+    return events
   
 
+  def log_output_path(self, fmt: str = 'jsonl', directory: str = None) \
+    -> str:
+    """
+    :param str fmt: output format, see open_log_output
+    :param str directory: output directory, defaults to this file's directory
+    :return str: path of the log file, rocket_component_{id}.{extension}
+    """
+    if directory is None:
+      directory = os.path.dirname(__file__)
+    extension = rlw.get_writer_class(fmt).extension
+    return os.path.join(directory, f'rocket_component_{self.id}.{extension}')
+
+
+  def open_log_output(self, fmt: str = 'jsonl', batch_size: int = 100,
+    flush_interval: float = None, directory: str = None,
+    background: bool = False, queue_size: int = 16,
+    backpressure: str = 'block') -> None:
+    """
+    Start streaming the RocketLog to rocket_component_{id}.{fmt}
+
+    :param str fmt: output format, 'jsonl', 'csv' or 'traj'
+    :param int batch_size: number of pending rows that triggers a flush
+    :param float flush_interval: seconds between flushes, None to disable
+    :param str directory: output directory, defaults to this file's directory
+    :param bool background: write on a separate thread
+    :param int queue_size: batches that may wait for the background thread
+    :param str backpressure: 'block' to wait for the background thread when
+    its queue is full, 'drop' to thin the rows instead
+    """
+    if self.rocket_log is None:
+      return
+    self.rocket_log.open_output(self.log_output_path(fmt, directory),
+      fmt=fmt, batch_size=batch_size, flush_interval=flush_interval,
+      background=background, queue_size=queue_size, backpressure=backpressure)
+
+
   def output_log(self):
-    self.rocket_log.data.to_json(
-      os.path.join(os.path.dirname(__file__), f'rocket_component_{self.id}.log'),
-      indent=4, orient='records')
+    """
+    Append the rows logged since the last call to the log file, opening it
+    with default settings if needed
+    """
+    if self.rocket_log is None:
+      return
+    if self.rocket_log.writer is None:
+      self.open_log_output()
+    self.rocket_log.output()
+
+
+  def close_log_output(self) -> None:
+    """
+    Flush and close the log file
+    """
+    if self.rocket_log is not None:
+      self.rocket_log.close_output()
+
+
+  def get_rocket_components(self) -> list:
+    """
+    :return list: this component and every component it carries, bottom first
+    """
+    return [self]
 
 
   def string_info(self) -> None:
@@ -232,22 +449,59 @@ class RocketComponent(ABC):
     return (percent_thrust, leftover_time)
   
 
-  def update(self, time: float, time_step: float, lazy=False) -> None:
+  def set_state(self, position: CartesianPosition, velocity: Vector,
+    mass_fuel: float, percent_thrust: float = None) -> None:
+    """
+    Jump to a state computed outside of update, refreshing the atmosphere and
+    the force vectors to match it
+
+    Args:
+      position CartesianPosition: new position
+      velocity Vector: new velocity
+      mass_fuel float: new fuel mass
+      percent_thrust float: thrust setting for thrust_force, defaults to full
+        thrust while fuel remains
+    """
+    self.position = position
+    self.velocity = velocity
+    self.mass_fuel = max(0, mass_fuel)
+    self.atmosphere.update(position.y)
+    if percent_thrust is None:
+      percent_thrust = 1 if self.mass_fuel > 0 else 0
+
+    # The state may jump anywhere, e.g. back before burnout
+    self.build_force_pipeline(percent_thrust)
+    self.calc_forces(percent_thrust)
+
+
+  def update(self, time: float, time_step: float, lazy=False,
+    previous: tuple = None) -> None:
     """
     Update rocket component with the new time and time_step
 
     Parameters:
       time float: Current time
       time_step float: The duration captured by this update
+      previous tuple: (mass_fuel, velocity, position) this component had
+        before a carrier synced its state into it, events are detected
+        against it. Defaults to the current state.
     """
+    # Instrumentation, see Instrumentation.lap
+    lap = None
+    if self.instrumentation is not None:
+      lap = self.instrumentation.lap
+      lap()
+
+    # Previous state, for event detection
+    if previous is None:
+      previous = self.event_state()
+    mass_fuel, velocity, position = previous
+
     percent_thrust, leftover_time = self.calc_percent_thrust_and_leftover_time(
       time_step)
 
-    # Calculate new force vectors
-    self.drag_force = self.calc_drag_force()
-    self.gravity_force = self.calc_gravity_force()
-    self.lift_force = self.calc_lift_force()
-    self.thrust_force = self.calc_thrust_force(percent_thrust=percent_thrust)
+    # Calculate new force vectors, see force_model.py
+    self.calc_forces(percent_thrust, lap)
     force = self.sum_forces()
 
     # Calculate new acceleration vector
@@ -259,15 +513,56 @@ class RocketComponent(ABC):
 
     # Set new value for remaining fuel mass
     self.mass_fuel = self.calc_new_fuel_mass(time_step)
+    if mass_fuel > 0 and self.mass_fuel <= 0:
+      # Burnout, thrust may drop out of the pipeline from the next step on
+      self._force_pipeline = None
+    if lap is not None:
+      lap('integration')
 
     # Set new atmostphere values
-    self.atmosphere.update(self.position.x)
+    self.atmosphere.update(self.position.y)
+    if lap is not None:
+      lap('atmosphere')
 
-    # Log
-    self.log(time)
+    # Log, events are always recorded
+    if self.rocket_log is not None:
+      self.log(time, self.detect_events(mass_fuel, velocity, position))
+    elif self.flight_summary is not None:
+      self.flight_summary.observe(self, time)
+    if lap is not None:
+      lap('log')
     return leftover_time
 
 
+  def event_state(self) -> tuple:
+    """
+    :return tuple: (mass_fuel, velocity, position), the state events are
+    detected against
+    """
+    return (self.mass_fuel, self.velocity, self.position)
+
+
+  def follow_carrier(self, time: float,
+    carrier: 'RocketComponentDecorator') -> None:
+    """
+    Take the carrier's state and forces for a step this component spent
+    carried, so it shows the stack as a whole. The step is only logged when
+    the log cannot follow the carrier's log, see RocketLog.follow, or the
+    flight summary has to observe it.
+
+    :param float time: current time
+    :param RocketComponentDecorator carrier: component carrying this one
+    """
+    rocket_log = self.rocket_log
+    if self.flight_summary is None and (rocket_log is None or
+      rocket_log.follow(carrier.rocket_log, self, time)):
+      carrier.sync_rocket_component()
+      return
+    mass_fuel, velocity, position = self.event_state()
+    carrier.sync_rocket_component()
+    self.log(time, self.detect_events(mass_fuel, velocity, position))
+
+
 
 # Concrete Components
 class HeadRocketComponent(RocketComponent):
@@ -276,43 +571,59 @@ class HeadRocketComponent(RocketComponent):
     super().__init__(*args, **kwargs)
 
 
-  def update(self, time: float, time_step: float, lazy=False) -> None:
+  def update(self, time: float, time_step: float, lazy=False,
+    previous: tuple = None) -> None:
     """
     Process for updating a HeadRocketComponent
 
     *Refer to superclass update function*
     """
-    super().update(time, time_step)
+    return super().update(time, time_step, previous=previous)
 
 
 # Abstract Decorator
 class RocketComponentDecorator(RocketComponent):
   
-  def __init__(self, rocket_component, altitude=0) -> None:
-    super().__init__(altitude)
-    self.rocket_component = rocket_component
+  def __init__(self, rocket_component, id=0, *args, **kwargs) -> None:
+    super().__init__(id, *args, **kwargs)
+    self.rocket_component = None
+    self.set_rocket_component(rocket_component)
 
   
-  def decouple_rocket_component(self) -> RocketComponent:
+  def decouple_rocket_component(self, time: float = None) -> RocketComponent:
     """
     Represent the decoupling of two rocket components
+    :param float time: current time, if given both components log a
+    'separation' row
     :return RocketComponent: The RocketComponent that this object decorates
     """
     # Save off RocketComponent to return
     rocket_component = self.rocket_component
+    if rocket_component is None:
+      return None
+    # The decoupled component continues from the current state on its own
+    self.sync_rocket_component()
+    # Rows they were carried for, before this component logs the separation
+    for component in rocket_component.get_rocket_components():
+      if component.rocket_log is not None:
+        component.rocket_log.unfollow()
+    rocket_component.atmosphere = copy.copy(self.atmosphere)
     # Remove decorator from self.rocket_component
+    self.stage_table.detach(rocket_component.stage_index)
     self.rocket_component = None
+    if time is not None:
+      self.log(time, ('separation',))
+      rocket_component.log(time, ('separation',))
     return rocket_component
 
 
-  def get_total_mass(self):
+  def open_log_output(self, *args, **kwargs) -> None:
     """
-    *Refer to superclass get_total_mass method*
+    *Refer to superclass open_log_output method*
     """
-    if self.rocket_component is None:
-      return super().get_total_mass()
-    else:
-      return super().get_total_mass() + self.rocket_component.get_total_mass()
+    super().open_log_output(*args, **kwargs)
+    if self.rocket_component:
+      self.rocket_component.open_log_output(*args, **kwargs)
 
 
   def output_log(self):
@@ -321,6 +632,25 @@ class RocketComponentDecorator(RocketComponent):
       self.rocket_component.output_log()
 
 
+  def close_log_output(self) -> None:
+    """
+    *Refer to superclass close_log_output method*
+    """
+    super().close_log_output()
+    if self.rocket_component:
+      self.rocket_component.close_log_output()
+
+
+  def get_rocket_components(self) -> list:
+    """
+    *Refer to superclass get_rocket_components method*
+    """
+    rocket_components = [self]
+    if self.rocket_component:
+      rocket_components += self.rocket_component.get_rocket_components()
+    return rocket_components
+
+
   def print(self):
     """
     Print RocketComponents
@@ -336,10 +666,43 @@ class RocketComponentDecorator(RocketComponent):
     :param RocketComponent rocket_component: The rocket component to be coupled
     with self
     """
+    if self.rocket_component is not None:
+      self.stage_table.detach(self.rocket_component.stage_index)
+      for component in self.rocket_component.get_rocket_components():
+        if component.rocket_log is not None:
+          component.rocket_log.unfollow()
     self.rocket_component = rocket_component
+    if rocket_component is not None:
+      self.stage_table.merge(rocket_component.stage_table)
+      self.stage_table.attach(self.stage_index, rocket_component.stage_index)
+
+
+  def sync_rocket_component(self) -> None:
+    """
+    Have the carried component copy this component's state. Carried
+    components ride along without being integrated.
+    """
+    self.rocket_component.atmosphere = self.atmosphere
+    self.rocket_component.position = self.position
+    self.rocket_component.velocity = self.velocity
+    self.rocket_component.drag_force = self.drag_force
+    self.rocket_component.thrust_force = self.thrust_force
+    self.rocket_component.gravity_force = self.gravity_force
+    self.rocket_component.lift_force = self.lift_force
   
 
-  def update(self, time: float, time_step: float, lazy=False) -> None:
+  def follow_carrier(self, time: float,
+    carrier: 'RocketComponentDecorator') -> None:
+    """
+    *Refer to superclass follow_carrier method*
+    """
+    super().follow_carrier(time, carrier)
+    if self.rocket_component is not None:
+      self.rocket_component.follow_carrier(time, self)
+
+
+  def update(self, time: float, time_step: float, lazy=False,
+    previous: tuple = None) -> None:
     """
     *Refer to superclass update method*
     """
@@ -347,20 +710,26 @@ class RocketComponentDecorator(RocketComponent):
     lowest stage on the vertical axis would be the decorator, and the head
     would be the highest.
     The decorator should first determine how the rocket is moving because it
-    has thrusters"""
+    has thrusters
+    The carried component is only integrated when this component leaves it
+    time to use. Otherwise it copies this component's state, and its log
+    gets a row for every step it was carried, see follow_carrier."""
+    left_over_time = time_step
     if not lazy:
-      left_over_time = super().update(time, time_step)
-    if self.rocket_component is not None:
-      # Have child copy self properties
-      self.rocket_component.atmosphere = self.atmosphere
-      self.rocket_component.position = self.position
-      self.rocket_component.velocity = self.velocity
-      self.rocket_component.drag_force = self.drag_force
-      self.rocket_component.thrust_force = self.thrust_force
-      self.rocket_component.gravity_force = self.gravity_force
-      self.rocket_component.lift_force = self.lift_force
-
-      self.rocket_component.update(time, left_over_time, lazy=lazy)
+      left_over_time = super().update(time, time_step, previous=previous)
+    rocket_component = self.rocket_component
+    if rocket_component is None:
+      return left_over_time
+    if left_over_time <= 0:
+      rocket_component.follow_carrier(time, self)
+      return left_over_time
+    # Events of the carried component are detected against its own state,
+    # not the state it is about to copy
+    carried_previous = rocket_component.event_state()
+    # Have child copy self properties
+    self.sync_rocket_component()
+    return rocket_component.update(time, left_over_time, lazy=lazy,
+      previous=carried_previous)
 
 
 
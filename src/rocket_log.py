@@ -1,91 +1,638 @@
-import importlib
-import pandas as pd
-import sys
-import rocket_component as rc
+from operator import attrgetter
+import os
+from typing import TYPE_CHECKING
+import numpy as np
+import rocket_log_writer as rlw
+import trajectory_query
+
+if TYPE_CHECKING:
+  import pandas as pd
+  import rocket_component as rc
+  from recording_policy import RecordingPolicy
 
 class RocketLog:
-  def __init__(self) -> None:
-
-    self.data = pd.DataFrame(columns=[
-      'id', # Unique rocket component identifier
-      'time', # time
-      'pos_x', # x position
-      'pos_y', # y position
-      'pos_z', # z position
-      'velocity_x', # x value of velocity
-      'velocity_y', # y value of velocity
-      'velocity_z',
-      'velocity_r', # magnitude of velocity
-      'velocity_theta', # angle of velocity
-      'mass_fuel', # mass of fuel
-      'mass_structure', # mass of structure
+
+  COLUMNS = [
+    'id', # Unique rocket component identifier
+    'time', # time
+    'pos_x', # x position
+    'pos_y', # y position
+    'pos_z', # z position
+    'velocity_x', # x value of velocity
+    'velocity_y', # y value of velocity
+    'velocity_z',
+    'velocity_r', # magnitude of velocity
+    'velocity_theta', # angle of velocity
+    'mass_fuel', # mass of fuel
+    'mass_structure', # mass of structure
+    'drag_force_x',
+    'drag_force_y',
+    'drag_force_r',
+    'drag_force_theta',
+    'gravity_force_x',
+    'gravity_force_y',
+    'gravity_force_r',
+    'gravity_force_theta',
+    'lift_force_x',
+    'lift_force_y',
+    'lift_force_r',
+    'lift_force_theta',
+    'thrust_force_x',
+    'thrust_force_y',
+    'thrust_force_r',
+    'thrust_force_theta',
+    'atm_density',
+    'atm_gravity',
+    'atm_pressure',
+    'atm_temperature',
+    'atm_viscosity'
+  ]
+
+  # Always logged, rows are located and attributed by them
+  REQUIRED_COLUMNS = ['id', 'time']
+
+  # Always 0, never stored, filled in when read or written
+  PLACEHOLDER_COLUMNS = ['pos_z', 'velocity_z']
+
+  # Named column selections
+  KINEMATICS = [
+    'id',
+    'time',
+    'pos_x',
+    'pos_y',
+    'velocity_x',
+    'velocity_y',
+    'mass_fuel',
+    'mass_structure',
+  ]
+  PRESETS = {
+    'kinematics': KINEMATICS,
+    'forces': KINEMATICS + [
       'drag_force_x',
       'drag_force_y',
-      'drag_force_r',
-      'drag_force_theta',
       'gravity_force_x',
       'gravity_force_y',
-      'gravity_force_r',
-      'gravity_force_theta',
       'lift_force_x',
       'lift_force_y',
-      'lift_force_r',
-      'lift_force_theta',
       'thrust_force_x',
       'thrust_force_y',
-      'thrust_force_r',
-      'thrust_force_theta',
-      'atm_density',
-      'atm_gravity',
-      'atm_pressure',
-      'atm_temperature',
-      'atm_viscosity'
-    ])
-
-
-  def add(self, rocket_component: 'rc.RocketComponent', time):
-    """
-    Add a RocketComponent data to the DataFrame
-
-    :param rocket_component: _description_
-    :type rocket_component: _type_
-    :param time: _description_
-    :type time: _type_
-    """
-    data = pd.DataFrame([{
-      'id': rocket_component.id,
-      'time': time,
-      'pos_x': rocket_component.position.x,
-      'pos_y': rocket_component.position.y,
-      'pos_z': 0,
-      'velocity_x': rocket_component.velocity.x,
-      'velocity_y': rocket_component.velocity.y,
-      'velocity_z': 0,
-      'velocity_r': rocket_component.velocity.r,
-      'velocity_theta': rocket_component.velocity.theta,
-      'mass_fuel': rocket_component.mass_fuel,
-      'mass_structure': rocket_component.mass_structure,
-      'drag_force_x': rocket_component.drag_force.x,
-      'drag_force_y': rocket_component.drag_force.y,
-      'drag_force_r': rocket_component.drag_force.r,
-      'drag_force_theta': rocket_component.drag_force.theta,
-      'gravity_force_x': rocket_component.gravity_force.x,
-      'gravity_force_y': rocket_component.gravity_force.y,
-      'gravity_force_r': rocket_component.gravity_force.r,
-      'gravity_force_theta': rocket_component.gravity_force.theta,
-      'lift_force_x': rocket_component.lift_force.x,
-      'lift_force_y': rocket_component.lift_force.y,
-      'lift_force_r': rocket_component.lift_force.r,
-      'lift_force_theta': rocket_component.lift_force.theta,
-      'thrust_force_x': rocket_component.thrust_force.x,
-      'thrust_force_y': rocket_component.thrust_force.y,
-      'thrust_force_r': rocket_component.thrust_force.r,
-      'thrust_force_theta': rocket_component.thrust_force.theta,
-      'atm_density': rocket_component.atmosphere.density,
-      'atm_gravity': rocket_component.atmosphere.gravity,
-      'atm_pressure': rocket_component.atmosphere.pressure,
-      'atm_temperature': rocket_component.atmosphere.temperature,
-      'atm_viscosity': rocket_component.atmosphere.viscosity
-    }])
-    self.data = pd.concat([self.data, data.round(3)], ignore_index=True)
-    return data
\ No newline at end of file
+    ],
+    'full': COLUMNS,
+  }
+
+  # Columns of a carried component's own attributes, the others are synced
+  # from its carrier, see follow
+  OWN_COLUMNS = ['id', 'mass_fuel', 'mass_structure']
+
+  # Events of a carrier that also happen to the components it carries
+  CARRIED_EVENTS = ('apogee', 'impact')
+
+  # RocketComponent attribute behind each stored column, other than time
+  ATTRIBUTES = {
+    'id': 'id',
+    'pos_x': 'position.x',
+    'pos_y': 'position.y',
+    'mass_fuel': 'mass_fuel',
+    'mass_structure': 'mass_structure',
+    **{f'{vector}_{component}': f'{vector}.{component}'
+      for vector in trajectory_query.VECTORS
+      for component in ('x', 'y', 'r', 'theta')},
+    **{f'atm_{attribute}': f'atmosphere.{attribute}'
+      for attribute in ('density', 'gravity', 'pressure', 'temperature',
+        'viscosity')},
+  }
+
+  def __init__(self, capacity: int = 256,
+    policy: 'RecordingPolicy' = None, columns='full') -> None:
+    """
+    Rows are appended into one growable NumPy array per stored column. The
+    buffers double in size when full, so adding a row is amortized O(1). The
+    DataFrame is only built when `data` is read.
+
+    :param int capacity: number of rows to preallocate
+    :param RecordingPolicy policy: decides which rows `add` records, None to
+    record every row
+    :param columns: name of one of PRESETS, or a list of COLUMNS to log, see
+    select_columns
+    """
+    self.policy = policy
+    self._events = [] # (row index, event name)
+    self._size = 0
+    self._capacity = max(1, int(capacity))
+    self._data = None
+    self.select_columns(columns)
+
+    # Log of the carrier whose rows are recorded as rows of this log, see
+    # follow
+    self.source = None
+    self._source_position = 0 # next source row to copy
+    self._own_values = None # OWN_COLUMNS values of the carried component
+
+    # Streaming output
+    self.writer = None
+    self.cursor = 0 # number of rows already handed to the writer
+    self.bytes_written = 0 # by writers that have been closed
+    # File the rows before cursor were written to, and its size after them,
+    # so reopening it continues the file, see open_output
+    self.output_path = None
+    self.output_offset = None
+
+
+  def __len__(self) -> int:
+    return self.size
+
+
+  @property
+  def size(self) -> int:
+    """
+    Number of rows, including the rows still to be copied from a followed
+    log
+    """
+    self.catch_up()
+    return self._size
+
+
+  @property
+  def events(self) -> list:
+    """
+    (row index, event name) of the rows logged with events
+    """
+    self.catch_up()
+    return self._events
+
+
+  def select_columns(self, columns='full') -> None:
+    """
+    Choose the columns to log. Only the selected attributes are read from
+    the rocket component on each step, stored and written; 'id' and 'time'
+    are always included. Vector magnitudes and angles and the placeholder
+    z columns left out can still be read, computed from the stored columns,
+    see trajectory_query.DERIVED_COLUMNS.
+
+    :param columns: name of one of PRESETS, or a list of COLUMNS
+    """
+    if self._size:
+      raise ValueError('Columns can only be selected before the first row')
+    if isinstance(columns, str):
+      try:
+        columns = self.PRESETS[columns]
+      except KeyError:
+        raise ValueError(f'Unknown column preset {columns!r}, expected one '
+          f'of {sorted(self.PRESETS)}') from None
+    unknown = set(columns) - set(self.COLUMNS)
+    if unknown:
+      raise ValueError(f'Unknown columns: {sorted(unknown)}')
+
+    selected = set(columns).union(self.REQUIRED_COLUMNS)
+    # Selected columns, in COLUMNS order
+    self.columns = [column for column in self.COLUMNS if column in selected]
+    self._columns = {
+      column: np.empty(self._capacity,
+        dtype=object if column == 'id' else np.float64)
+      for column in self.columns if column not in self.PLACEHOLDER_COLUMNS
+    }
+    # Columns read from the rocket component, in the order of _getter
+    self._attribute_columns = [column for column in self._columns
+      if column != 'time']
+    self._bind()
+    self._data = None
+
+
+  def _bind(self) -> None:
+    """
+    Point the per step shortcuts at the current buffers: the time buffer,
+    the buffers of _attribute_columns and one getter reading all of their
+    attributes at once
+    """
+    self._time = self._columns['time']
+    self._attribute_buffers = [self._columns[column]
+      for column in self._attribute_columns]
+    getter = attrgetter(*[self.ATTRIBUTES[column]
+      for column in self._attribute_columns])
+    if len(self._attribute_columns) == 1:
+      # attrgetter of one attribute returns the value itself
+      self._getter = lambda rocket_component: (getter(rocket_component),)
+    else:
+      self._getter = getter
+
+
+  @property
+  def stored_columns(self) -> tuple:
+    return tuple(self._columns)
+
+
+  def __getstate__(self) -> dict:
+    """
+    Pickled without the writer or unused buffer capacity. An open writer
+    must be flushed first, see flush_output; the unpickled log continues
+    its file when the output is reopened.
+    """
+    return self._state(0)
+
+
+  def checkpoint_state(self) -> dict:
+    """
+    State to pickle in a checkpoint, see Simulation.snapshot. Like
+    __getstate__, but without the rows already handed to the writer: only
+    their number is kept and the unpickled log reads them back from the log
+    file, so the checkpoint does not grow with the log. The file has to be
+    flushed first and still hold them then; rows from text formats are read
+    back rounded to 3 decimals, like `data`.
+    """
+    writer = self.writer
+    if writer is None and self.output_path is None or \
+      getattr(writer, 'rows_dropped', 0):
+      return self._state(0)
+    return self._state(self.cursor)
+
+
+  def _state(self, start: int) -> dict:
+    """
+    :param int start: rows before this one are left to the log file
+    """
+    self.catch_up()
+    state = self.__dict__.copy()
+    state['_columns'] = {column: values[start:self._size].copy()
+      for column, values in self._columns.items()}
+    state['_capacity'] = self._size
+    state['_data'] = None
+    state['writer'] = None
+    # Shortcuts to the buffers and the getter are rebuilt by __setstate__
+    for name in ('_time', '_attribute_buffers', '_getter'):
+      del state[name]
+    if self.writer is not None:
+      state['output_path'] = self.writer.path
+      state['output_offset'] = self.writer.file_size
+    if start:
+      # 'id' is the component's own on every row
+      state['_file_rows'] = (start, self._columns['id'][0]
+        if 'id' in self._columns else None)
+    return state
+
+
+  def __setstate__(self, state: dict) -> None:
+    file_rows = state.pop('_file_rows', None)
+    self.__dict__.update(state)
+    if file_rows is not None:
+      self._read_file_rows(*file_rows)
+    self._bind()
+
+
+  def _read_file_rows(self, count: int, id) -> None:
+    """
+    Put back the first rows left to the log file by checkpoint_state
+
+    :param int count: number of rows
+    :param id: value of the 'id' column
+    """
+    path = self.output_path
+    if os.path.getsize(path) < self.output_offset:
+      raise ValueError(f'{path} lost rows left to it by the checkpoint')
+    writer_class = rlw.get_writer_class(os.path.splitext(path)[1][1:])
+    values = writer_class.read_columns(path,
+      [column for column in self._columns if column != 'id'],
+      self.output_offset)
+    if len(values['time']) != count:
+      raise ValueError(f'{path} holds {len(values["time"])} rows instead of '
+        f'the {count} left to it by the checkpoint')
+    for column, tail in self._columns.items():
+      buffer = np.empty(max(1, self._capacity),
+        dtype=object if column == 'id' else np.float64)
+      buffer[:count] = id if column == 'id' else values[column]
+      buffer[count:self._capacity] = tail
+      self._columns[column] = buffer
+
+
+  @property
+  def data(self) -> 'pd.DataFrame':
+    """
+    DataFrame of every logged row and selected column, values rounded to 3
+    decimals
+    """
+    self.catch_up()
+    if self._data is None:
+      import pandas as pd
+      self._data = pd.DataFrame(
+        {column: self.column(column) for column in self.columns},
+        columns=self.columns).round(3)
+    return self._data
+
+
+  def column(self, name: str) -> np.ndarray:
+    """
+    Unrounded view of a single logged column. The view is only valid until
+    the next call to `add`. Columns that were not stored, see
+    trajectory_query.DERIVED_COLUMNS, are computed from the stored ones.
+
+    :param str name: column name
+    :return np.ndarray: logged values
+    """
+    self.catch_up()
+    return self._slice(name, 0, self._size)
+
+
+  def _slice(self, name: str, start: int, stop: int) -> np.ndarray:
+    """
+    Rows start to stop of a stored or derived column
+    """
+    values = self._columns.get(name)
+    if values is not None:
+      return values[start:stop]
+    return trajectory_query.derive(name,
+      lambda stored: self._columns[stored][start:stop], self._columns)
+
+
+  def state_at(self, times, columns: list = None) -> dict:
+    """
+    Logged state interpolated at arbitrary times, found by binary search,
+    see trajectory_query.interpolate
+
+    :param times: time, or array of times
+    :param list columns: columns to return, defaults to all
+    :return dict: column -> values shaped like times
+    """
+    return trajectory_query.interpolate(self, times, columns)
+
+
+  def resample(self, interval: float, start: float = None,
+    stop: float = None, columns: list = None) -> dict:
+    """
+    Logged state interpolated on a regular time grid, see
+    trajectory_query.resample
+
+    :param float interval: seconds between samples
+    :param float start: first sample, defaults to the first row
+    :param float stop: last sample at most, defaults to the last row
+    :param list columns: columns to return, defaults to all
+    :return dict: column -> values, one per sample
+    """
+    return trajectory_query.resample(self, interval, start, stop, columns)
+
+
+  def _grow(self) -> None:
+    """
+    Double the capacity of every column buffer
+    """
+    self._capacity = max(1, self._capacity * 2)
+    for column, values in self._columns.items():
+      grown = np.empty(self._capacity, dtype=values.dtype)
+      grown[:self._size] = values[:self._size]
+      self._columns[column] = grown
+    self._bind()
+
+
+  def add(self, rocket_component: 'rc.RocketComponent', time, events=()):
+    """
+    Add a RocketComponent data to the log, if the recording policy allows.
+    The first row and rows with events are always recorded.
+
+    :param rocket_component: component whose current state is recorded
+    :type rocket_component: RocketComponent
+    :param time: simulation time of the state
+    :type time: float
+    :param events: names of events that happened at this state, e.g.
+    'burnout', 'separation', 'apogee' or 'impact'
+    :type events: tuple
+    :return int: index of the added row, None if it was not recorded
+    """
+    if self.source is not None:
+      # The component logs itself again, it is no longer carried from here
+      self.unfollow(time)
+    policy = self.policy
+    if policy is not None and not events and self._size and \
+      not policy.should_record(rocket_component, time):
+      return None
+    if self._size == self._capacity:
+      self._grow()
+
+    index = self._size
+    self._time[index] = time
+    for values, value in zip(self._attribute_buffers,
+      self._getter(rocket_component)):
+      values[index] = value
+    self._size += 1
+    self._data = None
+    for event in events:
+      self._events.append((index, event))
+    if policy is not None:
+      policy.recorded(rocket_component, time)
+    return index
+
+
+  def truncate(self, size: int) -> None:
+    """
+    Drop the rows from index size on, e.g. to redo a step. Rows already
+    handed to the writer cannot be dropped.
+
+    :param int size: number of rows to keep
+    """
+    # Rows copied from a followed log are ordinary rows from here on
+    self.unfollow()
+    if size < self.cursor:
+      raise ValueError(
+        f'Rows before {self.cursor} were already handed to the writer')
+    if size >= self._size:
+      return
+    self._size = size
+    self._events = [event for event in self._events if event[0] < size]
+    self._data = None
+
+
+  # Carried Components
+  def follow(self, source: 'RocketLog', rocket_component: 'rc.RocketComponent',
+    time: float) -> bool:
+    """
+    Record the rows a carrier's log records from time on as rows of this
+    log, instead of adding one row per step while the component is
+    carried. The rows are copied in bulk when this log is next read,
+    written or added to, see catch_up. The copies keep the component's own
+    OWN_COLUMNS values, which do not change while it is carried, and the
+    carrier's CARRIED_EVENTS. When the carrier's log follows a log itself,
+    this log follows that one too, so every carried log of a stack follows
+    the log of the bottom stage.
+
+    :param RocketLog source: log of the carrying component
+    :param rocket_component: the carried component, holding the state of
+    its last own row
+    :type rocket_component: RocketComponent
+    :param float time: time of the first carried step
+    :return bool: False if this log cannot follow source, i.e. there is no
+    source, this log has a recording policy or source lacks some of its
+    columns; the step has to be logged then
+    """
+    if source is not None and source.source is not None:
+      source = source.source
+    if source is self.source and source is not None:
+      return True
+    # Rows of a previous carrier from this step on were not this
+    # component's
+    self.unfollow(time)
+    if source is None or self.policy is not None or \
+      set(self.columns).difference(self.OWN_COLUMNS, source.columns):
+      return False
+    self.source = source
+    self._source_position = int(np.searchsorted(source.column('time'), time))
+    self._own_values = {column:
+      attrgetter(self.ATTRIBUTES[column])(rocket_component)
+      for column in self.OWN_COLUMNS if column in self._columns}
+    return True
+
+
+  def unfollow(self, time: float = None) -> None:
+    """
+    Copy the rows still pending from the followed log and stop following it
+
+    :param float time: only copy the rows before this time, e.g. when the
+    component logs a row of its own at it
+    """
+    if self.source is None:
+      return
+    self.catch_up(time)
+    self.source = None
+    self._own_values = None
+
+
+  def catch_up(self, time: float = None) -> None:
+    """
+    Copy the rows the followed log recorded since the last copy, see follow
+
+    :param float time: only copy the rows before this time
+    """
+    source = self.source
+    if source is None:
+      return
+    times = source.column('time')
+    start = self._source_position
+    stop = len(times) if time is None else \
+      int(np.searchsorted(times, time))
+    if stop <= start:
+      return
+    count = stop - start
+    while self._size + count > self._capacity:
+      self._grow()
+    rows = slice(self._size, self._size + count)
+    for column, values in self._columns.items():
+      value = self._own_values.get(column)
+      values[rows] = source._slice(column, start, stop) if value is None \
+        else value
+    for index, name in source._events:
+      if start <= index < stop and name in self.CARRIED_EVENTS:
+        self._events.append((self._size + index - start, name))
+    self._size += count
+    self._source_position = stop
+    self._data = None
+
+
+  # Output Functions
+  def open_output(self, path: str, fmt: str = 'jsonl', batch_size: int = 100,
+    flush_interval: float = None, background: bool = False,
+    queue_size: int = 16, backpressure: str = 'block',
+    decimation: int = 10) -> 'rlw.RocketLogWriter':
+    """
+    Start streaming rows to a file. Rows already in the log are written too.
+
+    :param str path: file to write
+    :param str fmt: 'jsonl', 'csv' or 'traj' (binary, see trajectory_store)
+    :param int batch_size: number of pending rows that triggers a flush
+    :param float flush_interval: seconds between flushes, None to disable
+    :param bool background: write on a separate thread, see
+    BackgroundRocketLogWriter
+    :param int queue_size: batches that may wait for the background thread
+    :param str backpressure: 'block' or 'drop' when the queue is full
+    :param int decimation: keep one row out of this many when dropping
+    :return RocketLogWriter: the opened writer
+    """
+    self.close_output()
+    # Reopening the file of an earlier run or checkpoint continues it from
+    # the last handed over row, dropping anything written after it
+    append = path == self.output_path and os.path.exists(path)
+    if append:
+      os.truncate(path, self.output_offset)
+    else:
+      self.cursor = 0
+    self.writer = rlw.get_writer_class(fmt)(path, self.columns,
+      batch_size=batch_size, flush_interval=flush_interval, append=append)
+    if background:
+      self.writer = rlw.BackgroundRocketLogWriter(self.writer,
+        queue_size=queue_size, backpressure=backpressure,
+        decimation=decimation)
+    return self.writer
+
+
+  def output(self, force: bool = False) -> None:
+    """
+    Hand the rows added since the last hand over to the writer, once the
+    writer would flush them
+
+    :param bool force: hand them over regardless
+    """
+    if self.writer is None:
+      return
+    start, stop = self.cursor, self._size
+    if self.source is not None:
+      # Only copy the followed rows once the writer takes them
+      stop += max(0, len(self.source) - self._source_position)
+    if stop == start or not force and not self.writer.due(stop - start):
+      return
+    self.catch_up()
+    stop = self._size
+    # Events in the batch, never dropped by the writer
+    keep = []
+    for index, _ in reversed(self._events):
+      if index < start:
+        break
+      keep.append(index - start)
+    self.writer.write_columns(
+      [self._slice(column, start, stop) for column in self.columns],
+      keep=keep)
+    self.cursor = stop
+
+
+  def flush_output(self) -> None:
+    """
+    Hand every row to the writer and wait for them to reach the file
+    """
+    if self.writer is None:
+      return
+    self.output(force=True)
+    self.writer.flush()
+
+
+  def reset_output(self) -> None:
+    """
+    Forget the output file, so the next one starts with the first row
+    """
+    self.close_output()
+    self.cursor = 0
+    self.output_path = None
+    self.output_offset = None
+
+
+  def adopt_output(self, path: str) -> None:
+    """
+    Take a file that already holds every row as the output file, e.g. a
+    copy from a result cache, so reopening it continues after the last row
+
+    :param str path: the file
+    """
+    self.close_output()
+    self.cursor = self.size
+    self.output_path = path
+    self.output_offset = os.path.getsize(path)
+
+
+  def close_output(self) -> None:
+    """
+    Write any remaining rows, then close the writer
+    """
+    writer = self.writer
+    if writer is None:
+      return
+    try:
+      self.output(force=True)
+    finally:
+      self.writer = None
+      writer.close()
+    self.bytes_written += writer.bytes_written
+    self.output_path = writer.path
+    self.output_offset = writer.file_size
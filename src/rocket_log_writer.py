@@ -0,0 +1,532 @@
+from abc import ABC, abstractmethod
+import atexit
+from collections import deque
+import csv
+import io
+import json
+import os
+import queue
+import threading
+import time
+import weakref
+
+import numpy as np
+
+import trajectory_store as ts
+
+
+class RocketLogWriter(ABC):
+  """
+  Append-only writer for RocketLog rows. Rows are buffered in memory and
+  written to the end of the file once `batch_size` rows are pending or
+  `flush_interval` seconds have passed since the last flush, so each row is
+  serialized exactly once.
+  """
+
+  extension = 'log'
+  binary = False # write bytes instead of text
+
+  def __init__(self, path: str, columns: list, batch_size: int = 100,
+    flush_interval: float = None, append: bool = False) -> None:
+    """
+    :param str path: file to write, truncated on open
+    :param list columns: column names, in row order
+    :param int batch_size: number of pending rows that triggers a flush
+    :param float flush_interval: seconds (wall clock) between flushes, None
+    to only flush on batch_size
+    :param bool append: continue an existing file instead, without writing
+    the header again
+    """
+    if batch_size < 1:
+      raise ValueError('batch_size must be at least 1')
+    self.path = path
+    self.columns = list(columns)
+    self.batch_size = batch_size
+    self.flush_interval = flush_interval
+    self.rows_written = 0
+    self.bytes_written = 0
+
+    self._pending = []
+    self._pending_rows = 0
+    self._last_flush = time.monotonic()
+    mode = 'a' if append else 'w'
+    if self.binary:
+      self._file = open(path, mode + 'b')
+    else:
+      self._file = open(path, mode, newline='', encoding='utf-8')
+    # Size of the file before this writer
+    self.start_offset = os.path.getsize(path) if append else 0
+    if not append:
+      self._write_text(self.header())
+
+
+  def header(self) -> str:
+    """
+    Text written once at the start of the file
+    """
+    return ''
+
+
+  @classmethod
+  def read_columns(cls, path: str, columns: list, size: int) -> dict:
+    """
+    Read columns back from a file written by this class, e.g. to restore a
+    checkpoint. Text formats hold the values rounded to 3 decimals.
+
+    :param str path: file
+    :param list columns: names of float columns to read
+    :param int size: number of bytes from the start of the file to read
+    :return dict: column -> np.ndarray of the values
+    """
+    with open(path, 'rb') as file:
+      rows = cls.parse_rows(file.read(size).decode('utf-8'))
+    return {column: np.array([float(row[column]) for row in rows],
+      dtype=np.float64) for column in columns}
+
+
+  @classmethod
+  def parse_rows(cls, text: str) -> list:
+    """
+    Inverse of header and format_rows
+
+    :param str text: file contents
+    :return list: one dict of column -> value per row
+    """
+    raise NotImplementedError(f'{cls.__name__} cannot read its files back')
+
+
+  @abstractmethod
+  def format_rows(self, rows: list) -> str:
+    """
+    Serialize rows
+
+    :param list rows: tuples of values ordered like `columns`
+    :return str: text to append to the file
+    """
+
+
+  def write(self, rows: list) -> None:
+    """
+    Queue rows for writing, flushing if the batch size or interval is reached
+
+    :param list rows: tuples of values ordered like `columns`
+    """
+    self._pending.extend(rows)
+    self._pending_rows += len(rows)
+    self._flush_if_due()
+
+
+  def write_columns(self, values: list, keep=()) -> None:
+    """
+    Queue rows given column-wise. Floats are rounded to 3 decimals, like
+    RocketLog.data.
+
+    :param list values: one NumPy array per column, ordered like `columns`
+    :param keep: rows that must not be dropped, only used by writers that
+    drop rows
+    """
+    self.write(list(zip(*[
+      column.tolist() if column.dtype == object else column.round(3).tolist()
+      for column in values])))
+
+
+  def due(self, rows: int = 0) -> bool:
+    """
+    Whether queueing `rows` more rows would flush. RocketLog holds rows back
+    until then, so they are converted in batches instead of every step.
+
+    :param int rows: rows about to be queued
+    :return bool: True if the batch size or flush interval is reached
+    """
+    return self._pending_rows + rows >= self.batch_size or (
+      self.flush_interval is not None and
+      time.monotonic() - self._last_flush >= self.flush_interval)
+
+
+  def _flush_if_due(self) -> None:
+    if self.due():
+      self.flush()
+
+
+  def flush(self) -> None:
+    """
+    Append every pending row to the file
+    """
+    if self._pending:
+      self._write_text(self.format_pending())
+      self.rows_written += self._pending_rows
+      self._pending = []
+      self._pending_rows = 0
+    self._file.flush()
+    self._last_flush = time.monotonic()
+
+
+  def format_pending(self) -> str:
+    """
+    Serialize every pending row
+    """
+    return self.format_rows(self._pending)
+
+
+  def close(self) -> None:
+    """
+    Flush pending rows and close the file
+    """
+    if self._file.closed:
+      return
+    try:
+      self.flush()
+    finally:
+      self._file.close()
+
+
+  @property
+  def closed(self) -> bool:
+    return self._file.closed
+
+
+  @property
+  def file_size(self) -> int:
+    """
+    Size of the file once every flushed row is on disk
+    """
+    return self.start_offset + self.bytes_written
+
+
+  def _write_text(self, text: str) -> None:
+    if text:
+      self._file.write(text)
+      self.bytes_written += len(text) if self.binary \
+        else len(text.encode('utf-8'))
+
+
+
+class JsonLinesRocketLogWriter(RocketLogWriter):
+  """
+  Writes one JSON object per row
+  """
+
+  extension = 'jsonl'
+
+  def format_rows(self, rows: list) -> str:
+    columns = self.columns
+    return ''.join(
+      json.dumps(dict(zip(columns, row))) + '\n' for row in rows)
+
+
+  @classmethod
+  def parse_rows(cls, text: str) -> list:
+    return [json.loads(line) for line in text.splitlines()]
+
+
+
+class CsvRocketLogWriter(RocketLogWriter):
+  """
+  Writes a header line followed by one comma separated line per row
+  """
+
+  extension = 'csv'
+
+  def header(self) -> str:
+    return self.format_rows([self.columns])
+
+
+  def format_rows(self, rows: list) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator='\n').writerows(rows)
+    return buffer.getvalue()
+
+
+  @classmethod
+  def parse_rows(cls, text: str) -> list:
+    return list(csv.DictReader(io.StringIO(text, newline='')))
+
+
+
+class BinaryRocketLogWriter(RocketLogWriter):
+  """
+  Writes fixed size binary records, unrounded, see trajectory_store. Read
+  the file back with trajectory_store.TrajectoryReader.
+  """
+
+  extension = 'traj'
+  binary = True
+
+  def __init__(self, path: str, columns: list, batch_size: int = 100,
+    flush_interval: float = None, append: bool = False) -> None:
+    """
+    *Refer to superclass __init__ method*
+    """
+    self.dtype = ts.record_dtype(columns)
+    super().__init__(path, columns, batch_size=batch_size,
+      flush_interval=flush_interval, append=append)
+
+
+  def header(self) -> bytes:
+    return ts.pack_header(self.columns, self.dtype)
+
+
+  @classmethod
+  def read_columns(cls, path: str, columns: list, size: int) -> dict:
+    with open(path, 'rb') as file:
+      _, dtype, offset = ts.read_header(file)
+      records = np.fromfile(file, dtype=dtype,
+        count=(size - offset) // dtype.itemsize)
+    return {column: records[column].astype(np.float64) for column in columns}
+
+
+  def format_rows(self, rows: list) -> bytes:
+    return np.array(rows, dtype=self.dtype).tobytes()
+
+
+  def write(self, rows: list) -> None:
+    self.write_records(np.array(rows, dtype=self.dtype))
+
+
+  def write_columns(self, values: list, keep=()) -> None:
+    records = np.empty(len(values[0]), dtype=self.dtype)
+    for column, column_values in zip(self.columns, values):
+      records[column] = column_values
+    self.write_records(records)
+
+
+  def write_records(self, records: np.ndarray) -> None:
+    """
+    Queue records for writing
+
+    :param np.ndarray records: structured array with dtype `self.dtype`
+    """
+    self._pending.append(records)
+    self._pending_rows += len(records)
+    self._flush_if_due()
+
+
+  def format_pending(self) -> bytes:
+    return np.concatenate(self._pending).tobytes()
+
+
+
+# Background writers not closed yet, closed at interpreter exit
+_open_background_writers = weakref.WeakSet()
+
+
+@atexit.register
+def _close_background_writers() -> None:
+  for writer in list(_open_background_writers):
+    writer.close()
+
+
+class BackgroundRocketLogWriter:
+  """
+  Moves serialization and disk I/O of another writer onto a dedicated
+  thread. Batches are handed over through a bounded queue, so the
+  simulation only waits on the disk when the queue is full.
+
+  When the queue is full, backpressure 'block' waits for room. 'drop' never
+  waits: it thins the batch to every `decimation`th row (rows in `keep`,
+  such as events, are never dropped) and holds the rest back until the queue
+  has room, ahead of any later batch. Dropped rows are counted in
+  `rows_dropped`. Errors on the writer thread are raised on the
+  next call from the simulation thread. `close` writes every queued row and
+  joins the thread; writers still open at interpreter exit are closed then.
+  """
+
+  BACKPRESSURES = ('block', 'drop')
+
+  def __init__(self, writer: RocketLogWriter, queue_size: int = 16,
+    backpressure: str = 'block', decimation: int = 10) -> None:
+    """
+    :param RocketLogWriter writer: writer to run on the thread
+    :param int queue_size: batches that may wait for the thread
+    :param str backpressure: 'block' or 'drop', see class docstring
+    :param int decimation: keep one row out of this many when dropping
+    """
+    if backpressure not in self.BACKPRESSURES:
+      raise ValueError(f'Unknown backpressure {backpressure!r}, expected one '
+        f'of {self.BACKPRESSURES}')
+    if decimation < 1:
+      raise ValueError('decimation must be at least 1')
+    self.writer = writer
+    self.backpressure = backpressure
+    self.decimation = decimation
+    self.rows_dropped = 0
+    self.error = None
+
+    self._held = deque() # thinned batches waiting for room in the queue, see
+    # write_columns
+
+    self._last_handoff = time.monotonic()
+    self._queue = queue.Queue(maxsize=queue_size)
+    self._thread = threading.Thread(target=self._run,
+      name=f'RocketLogWriter({writer.path})', daemon=True)
+    self._thread.start()
+    _open_background_writers.add(self)
+
+
+  # Writer interface, see RocketLogWriter
+  @property
+  def path(self) -> str:
+    return self.writer.path
+
+
+  @property
+  def batch_size(self) -> int:
+    return self.writer.batch_size
+
+
+  @property
+  def rows_written(self) -> int:
+    return self.writer.rows_written
+
+
+  @property
+  def bytes_written(self) -> int:
+    return self.writer.bytes_written
+
+
+  @property
+  def file_size(self) -> int:
+    return self.writer.file_size
+
+
+  @property
+  def closed(self) -> bool:
+    return not self._thread.is_alive()
+
+
+  def due(self, rows: int = 0) -> bool:
+    writer = self.writer
+    return rows >= writer.batch_size or (
+      writer.flush_interval is not None and
+      time.monotonic() - self._last_handoff >= writer.flush_interval)
+
+
+  def write(self, rows: list) -> None:
+    if self.backpressure == 'block':
+      self._put(('rows', rows))
+    elif not self._offer(('rows', rows)):
+      kept = rows[::self.decimation]
+      self.rows_dropped += len(rows) - len(kept)
+      self._held.append(('rows', kept))
+
+
+  def write_columns(self, values: list, keep=()) -> None:
+    if self.backpressure == 'block':
+      self._put(('columns', values))
+    elif not self._offer(('columns', values)):
+      count = len(values[0])
+      rows = sorted(set(range(0, count, self.decimation)).union(keep))
+      self.rows_dropped += count - len(rows)
+      self._held.append(('columns', [column[rows] for column in values]))
+
+
+  def flush(self) -> None:
+    """
+    Wait for every queued batch to be written, then flush the file
+    """
+    self._put(('flush', None))
+    self._queue.join()
+    self._raise_error()
+
+
+  def close(self) -> None:
+    """
+    Write every queued batch, join the thread and close the file
+    """
+    if self.closed:
+      return
+    _open_background_writers.discard(self)
+    while self._held:
+      self._queue.put(self._held.popleft())
+    self._queue.put(None)
+    self._thread.join()
+    self.writer.close()
+    self._raise_error()
+
+
+  def _put(self, item: tuple) -> None:
+    """
+    Queue an item after the held back batches, waiting for room
+    """
+    self._raise_error()
+    if self.closed:
+      raise ValueError('I/O operation on closed writer')
+    while self._held:
+      self._queue.put(self._held.popleft())
+    self._queue.put(item)
+    self._last_handoff = time.monotonic()
+
+
+  def _offer(self, item: tuple) -> bool:
+    """
+    Queue an item after the held back batches, without waiting
+
+    :return bool: False if the queue is full, the item is not queued then
+    """
+    self._raise_error()
+    if self.closed:
+      raise ValueError('I/O operation on closed writer')
+    held = self._held
+    try:
+      while held:
+        self._queue.put_nowait(held[0])
+        held.popleft()
+      self._queue.put_nowait(item)
+    except queue.Full:
+      return False
+    self._last_handoff = time.monotonic()
+    return True
+
+
+  def _raise_error(self) -> None:
+    if self.error is not None:
+      error, self.error = self.error, None
+      raise error
+
+
+  def _run(self) -> None:
+    """
+    Writer thread: write batches until the close sentinel
+    """
+    while True:
+      item = self._queue.get()
+      try:
+        if item is None:
+          return
+        kind, value = item
+        if self.error is not None:
+          # Keep draining so the simulation thread never blocks on put
+          continue
+        if kind == 'columns':
+          self.writer.write_columns(value)
+        elif kind == 'rows':
+          self.writer.write(value)
+        else:
+          self.writer.flush()
+      except BaseException as error:
+        self.error = error
+      finally:
+        self._queue.task_done()
+
+
+
+WRITERS = {
+  JsonLinesRocketLogWriter.extension: JsonLinesRocketLogWriter,
+  CsvRocketLogWriter.extension: CsvRocketLogWriter,
+  BinaryRocketLogWriter.extension: BinaryRocketLogWriter,
+}
+
+
+def get_writer_class(fmt: str) -> type:
+  """
+  Look up the writer class for an output format
+
+  :param str fmt: output format, one of WRITERS
+  :return type: RocketLogWriter subclass
+  """
+  try:
+    return WRITERS[fmt]
+  except KeyError:
+    raise ValueError(
+      f'Unknown log format {fmt!r}, expected one of {sorted(WRITERS)}') \
+      from None
@@ -0,0 +1,234 @@
+import copy
+import heapq
+import itertools
+import math
+import sys
+
+from position import CartesianPosition
+
+
+class Scheduler:
+  """
+  Steps the bodies of a Simulation independently, each at its own rate.
+
+  A priority queue holds every body keyed by its current time, and the body
+  furthest behind is always stepped next. Burning bodies step at
+  `time_step`, coasting ones at `coast_time_step`, unless overridden per
+  component id in `step_sizes`. Steps are shortened to land exactly on
+  scheduled separations, burnout and time_max. A step that ends below the
+  ground is redone to end at the impact time, and the body is retired.
+  Total work therefore follows how dynamic each body is, not the number of
+  bodies times the finest step.
+  """
+
+  def __init__(self, simulation) -> None:
+    """
+    :param Simulation simulation: simulation to advance, see
+    Simulation.run_scheduled
+    """
+    self.simulation = simulation
+    self.time_step = simulation.time_step
+    self.coast_time_step = simulation.coast_time_step \
+      if simulation.coast_time_step is not None else simulation.time_step
+    self.step_sizes = simulation.step_sizes or {}
+    # Tolerance for floating point drift when comparing times
+    self.epsilon = 1e-9 * max(1, self.time_step)
+
+    self._queue = [] # (time, sequence, rocket component)
+    self._sequence = itertools.count() # breaks ties in insertion order
+
+
+  def push(self, rocket_component, time: float) -> None:
+    heapq.heappush(self._queue, (time, next(self._sequence), rocket_component))
+
+
+  def step_size(self, rocket_component) -> float:
+    """
+    :param RocketComponent rocket_component: body to step
+    :return float: its step size
+    """
+    if rocket_component.id in self.step_sizes:
+      return self.step_sizes[rocket_component.id]
+    if any(component.mass_fuel > 0 and component.fuel_flow_rate > 0
+      for component in rocket_component.get_rocket_components()):
+      return self.time_step
+    return self.coast_time_step
+
+
+  def time_to_burnout(self, rocket_component) -> float:
+    """
+    :param RocketComponent rocket_component: body to step
+    :return float: shortest step that burns all of its own fuel, inf if it is
+    not burning
+    """
+    mass_fuel = rocket_component.mass_fuel
+    fuel_flow_rate = rocket_component.fuel_flow_rate
+    if mass_fuel <= 0 or fuel_flow_rate <= 0:
+      return math.inf
+    step = mass_fuel / fuel_flow_rate
+    while mass_fuel - fuel_flow_rate * step > 0:
+      # At least one ulp up
+      step += step * sys.float_info.epsilon
+    return step
+
+
+  def next_separation(self, rocket_component) -> float:
+    """
+    :return float: time of the next separation scheduled for a decorator,
+    inf if none
+    """
+    times = [time for time, decorator in self.simulation.separations
+      if decorator is rocket_component]
+    return min(times, default=math.inf)
+
+
+  def run(self) -> float:
+    """
+    Advance every body to time_max or ground impact
+
+    :return float: time of the latest body
+    """
+    simulation = self.simulation
+    time_max = simulation.time_max
+    epsilon = self.epsilon
+    for rocket_component in simulation.rocket_components:
+      if rocket_component not in simulation.retired:
+        self.push(rocket_component, simulation.time)
+
+    time_end = simulation.time
+    while self._queue:
+      time, _, rocket_component = heapq.heappop(self._queue)
+
+      separation = self.next_separation(rocket_component)
+      if separation <= time + epsilon:
+        self.separate(rocket_component, time)
+        separation = self.next_separation(rocket_component)
+      if time >= time_max - epsilon:
+        time_end = max(time_end, time)
+        continue
+
+      time_step = min(self.step_size(rocket_component), time_max - time,
+        separation - time, self.time_to_burnout(rocket_component))
+      time = self.step(rocket_component, time, time_step)
+      if rocket_component not in simulation.retired:
+        self.push(rocket_component, time)
+      time_end = max(time_end, time)
+    return time_end
+
+
+  def step(self, rocket_component, time: float, time_step: float) -> float:
+    """
+    Step one body, redoing the step up to the impact time if it ends below
+    the ground. Bodies that land are retired.
+
+    :return float: time reached
+    """
+    simulation = self.simulation
+    components = rocket_component.get_rocket_components()
+    previous = [(component.position, component.velocity, component.mass_fuel,
+      len(component.rocket_log) if component.rocket_log is not None else 0,
+      copy.copy(component.flight_summary))
+      for component in components]
+
+    target = time + time_step
+    rocket_component.update(target, time_step)
+
+    position, velocity, mass_fuel, _, _ = previous[0]
+    landed = position.y > 0 and rocket_component.position.y <= 0
+    if landed:
+      target = self.redo_until_impact(rocket_component, components, previous,
+        time, time_step)
+
+    simulation.events.extend((rocket_component.id, name, target)
+      for name in rocket_component.detect_events(mass_fuel, velocity, position))
+    rocket_component.output_log()
+    simulation.reporter.report(target, [rocket_component])
+    if simulation.instrumentation is not None:
+      simulation.instrumentation.count('steps')
+
+    if landed:
+      simulation.retired.append(rocket_component)
+    return target
+
+
+  def redo_until_impact(self, rocket_component, components, previous,
+    time: float, time_step: float) -> float:
+    """
+    Replace a step that ended below the ground by one ending at the ground
+
+    :return float: impact time
+    """
+    position, velocity, mass_fuel, _, _ = previous[0]
+
+    # Euler step: y(h) = y + (v_y + a_y h) h, with a_y from the full step
+    acceleration = (rocket_component.velocity.y - velocity.y) / time_step
+    step = self.solve_impact_step(position.y, velocity.y, acceleration,
+      time_step)
+
+    # Restore the state before the step, dropping the rows it logged and
+    # what the flight summaries saw of it
+    for component, (component_position, component_velocity,
+      component_mass_fuel, size, flight_summary) in zip(components, previous):
+      if component.rocket_log is not None:
+        component.rocket_log.truncate(size)
+      if flight_summary is not None:
+        component.flight_summary.restore(flight_summary)
+      component.set_state(component_position, component_velocity,
+        component_mass_fuel)
+
+    # The summary observes the accepted state when it is logged below
+    rocket_log = rocket_component.rocket_log
+    flight_summary = rocket_component.flight_summary
+    rocket_component.rocket_log = None
+    rocket_component.flight_summary = None
+    try:
+      rocket_component.update(time + step, step)
+    finally:
+      rocket_component.rocket_log = rocket_log
+      rocket_component.flight_summary = flight_summary
+    # On the ground by definition at the impact time
+    rocket_component.position = CartesianPosition(
+      rocket_component.position.x, 0.0)
+    rocket_component.atmosphere.update(0.0)
+    rocket_component.log(time + step,
+      rocket_component.detect_events(mass_fuel, velocity, position))
+    return time + step
+
+
+  @staticmethod
+  def solve_impact_step(altitude: float, velocity: float, acceleration: float,
+    time_step: float) -> float:
+    """
+    Smallest h in (0, time_step] with altitude + (velocity +
+    acceleration * h) * h = 0
+
+    :return float: step to the ground
+    """
+    if acceleration == 0:
+      return min(time_step, -altitude / velocity) if velocity < 0 \
+        else time_step
+    discriminant = velocity ** 2 - 4 * acceleration * altitude
+    if discriminant < 0:
+      return time_step
+    root = math.sqrt(discriminant)
+    steps = [step for step in ((-velocity - root) / (2 * acceleration),
+      (-velocity + root) / (2 * acceleration)) if 0 < step <= time_step]
+    return min(steps, default=time_step)
+
+
+  def separate(self, rocket_component, time: float) -> None:
+    """
+    Decouple a decorator's carried component at a scheduled separation and
+    schedule it as a body of its own
+    """
+    simulation = self.simulation
+    simulation.separations = [(separation_time, decorator)
+      for separation_time, decorator in simulation.separations
+      if decorator is not rocket_component or
+      separation_time > time + self.epsilon]
+    carried = rocket_component.decouple_rocket_component(time)
+    if carried is None:
+      return
+    simulation.rocket_components.append(carried)
+    simulation.events.append((rocket_component.id, 'separation', time))
+    self.push(carried, time)
@@ -1,19 +1,63 @@
+import copy
+import copyreg
+import io
 from logging import Logger
 import numpy as np
+import os
+import pickle
+from typing import TYPE_CHECKING
 
-import pandas as pd
 
+from instrumentation import Instrumentation
+from progress_reporter import ProgressReporter, PrintReporter
+from recording_policy import RecordingPolicy
 from rocket_component import RocketComponent, HeadRocketComponent
+from rocket_log import RocketLog
+
+if TYPE_CHECKING:
+  from result_cache import ResultCache
 
 
 # Set up logger
 sim_logger = Logger('simulation')
 
+
+class _CheckpointPickler(pickle.Pickler):
+  """
+  Pickles rocket logs without the rows already in their log files, see
+  RocketLog.checkpoint_state
+  """
+
+  def reducer_override(self, obj):
+    if isinstance(obj, RocketLog):
+      return copyreg.__newobj__, (type(obj),), obj.checkpoint_state()
+    return NotImplemented
+
+
+
 class Simulation:
-  
+
+  INTEGRATORS = ('euler', 'adaptive', 'analytic', 'scheduled')
+
+  # Settings that change the trajectory, part of the ResultCache key along
+  # with the rocket components
+  CACHE_SETTINGS = ('time', 'time_max', 'time_step', 'integrator',
+    'output_times', 'rtol', 'atol', 'coast_time_step', 'step_sizes',
+    'separations')
+  # State restored from a ResultCache hit, along with the rocket components
+  RESULT_ATTRIBUTES = ('rocket_components', 'time', 'started', 'events',
+    'separations', 'retired', 'next_checkpoint')
+
   def __init__(self,
-    rocket_component: RocketComponent, time_max=100, time_step=1
-    ) -> None:
+    rocket_component: RocketComponent, time_max=100, time_step=1,
+    log_format='jsonl', log_batch_size=100, log_flush_interval=None,
+    log_directory=None, log_background=False, log_queue_size=16,
+    log_backpressure='block', integrator='euler', output_times=None, rtol=1e-6,
+    atol=1e-6, instrumentation: Instrumentation = None,
+    recording_policy: RecordingPolicy = None, log_columns=None,
+    reporter: ProgressReporter = None, checkpoint_path=None,
+    checkpoint_interval=None, coast_time_step=None, step_sizes=None,
+    cache: 'ResultCache' = None) -> None:
     """
     Initializes simulation
 
@@ -24,32 +68,210 @@ class Simulation:
         Max time of simulation, defaults to 100
       time_step: float
         Amount of time to past each iteration of the simulation
+      log_format: str
+        Format of the streamed log files, 'jsonl', 'csv' or 'traj' (binary,
+        read with trajectory_store.TrajectoryReader)
+      log_batch_size: int
+        Number of pending log rows that triggers a write
+      log_flush_interval: float
+        Seconds between log writes, None to only write on log_batch_size
+      log_directory: str
+        Directory for the log files, defaults to the src directory
+      log_background: bool
+        Serialize and write the log files on background threads, so disk
+        I/O overlaps with the simulation
+      log_queue_size: int
+        Number of row batches that may wait for a background writer
+      log_backpressure: str
+        What to do when a background writer's queue is full, 'block' to
+        wait for it or 'drop' to keep only every 10th row of the batch.
+        Event rows are always kept.
+      integrator: str
+        'euler' for fixed steps of time_step, 'adaptive' to integrate with
+        scipy's solve_ivp and stop at ground impact, or 'analytic' to jump
+        between output times with closed form solutions whenever drag, lift
+        and the atmosphere allow it, stepping like 'euler' otherwise, or
+        'scheduled' to step every body at its own rate with Scheduler,
+        separating stages at the times given to schedule_separation
+      output_times: array
+        Times to log in 'adaptive' and 'analytic' mode, defaults to every
+        time_step
+      rtol, atol: float
+        Relative and absolute error tolerances in 'adaptive' mode
+      instrumentation: Instrumentation
+        Collects per stage timings and counters during run, see
+        get_counters. None to disable.
+      recording_policy: RecordingPolicy
+        Which steps the rocket component logs record, each log gets its own
+        copy. Events are always recorded. None to record every step.
+      log_columns: str or list
+        Columns the rocket component logs store and write, a preset
+        ('kinematics', 'forces' or 'full') or a list of RocketLog.COLUMNS.
+        Vector magnitudes and angles left out are computed when read. None
+        to keep each log's own selection.
+      reporter: ProgressReporter
+        Receives the state after every step, defaults to a PrintReporter.
+        Use a SilentReporter, RateLimitedReporter or CallbackReporter to
+        keep stdout from slowing the simulation down.
+      checkpoint_path: str
+        File to save checkpoints to, see save_checkpoint and resume
+      checkpoint_interval: float
+        Simulation seconds between checkpoints in 'euler' mode, None to
+        disable
+      coast_time_step: float
+        Step size of bodies that are not burning in 'scheduled' mode,
+        defaults to time_step
+      step_sizes: dict
+        Step size per rocket component id in 'scheduled' mode, overriding
+        time_step and coast_time_step
+      cache: ResultCache
+        On-disk cache of results. When run finds the same inputs cached, it
+        restores the finished state into the rocket components instead of
+        simulating, and copies the cached log files. None to disable.
     """
+    if integrator not in self.INTEGRATORS:
+      raise ValueError(f'Unknown integrator {integrator!r}, expected one of '
+        f'{self.INTEGRATORS}')
     
     self.rocket_components = [rocket_component]
     # self.simulation_log = SimulationLog()
     self.time = 0 # unit seconds
     self.time_max = time_max # unit seconds
     self.time_step = time_step # unit: seconds
+    self.started = False # initial state logged, run continues from self.time
+
+    # Log output settings
+    self.log_format = log_format
+    self.log_batch_size = log_batch_size
+    self.log_flush_interval = log_flush_interval
+    self.log_directory = log_directory
+    self.log_background = log_background
+    self.log_queue_size = log_queue_size
+    self.log_backpressure = log_backpressure
+
+    # Integration settings
+    self.integrator = integrator
+    self.output_times = output_times
+    self.rtol = rtol
+    self.atol = atol
+    self.events = [] # (id, name, time) found by the adaptive, analytic and
+    # scheduled modes
+    self.coast_time_step = coast_time_step
+    self.step_sizes = step_sizes
+    self.separations = [] # (time, decorator) for the scheduled mode
+    self.retired = [] # rocket components that landed in the scheduled mode
+
+    self.instrumentation = instrumentation
+    self.reporter = reporter if reporter is not None else PrintReporter()
+
+    # Checkpoint settings
+    self.checkpoint_path = checkpoint_path
+    self.checkpoint_interval = checkpoint_interval
+    self.next_checkpoint = None # time of the next periodic checkpoint
+
+    self.cache = cache
+
+    if recording_policy is not None or log_columns is not None:
+      for component in self.get_all_rocket_components():
+        if component.rocket_log is None:
+          continue
+        if recording_policy is not None:
+          component.rocket_log.policy = copy.deepcopy(recording_policy)
+        if log_columns is not None:
+          component.rocket_log.select_columns(log_columns)
   
 
   def log_rockets(self) -> None:
-    list(map(lambda rocket_component: rocket_component.log(self.time),
-      self.rocket_components))
+    # Carried components included, they are logged every step too
+    for rocket_component in self.rocket_components:
+      for component in rocket_component.get_rocket_components():
+        component.log(self.time)
 
 
-  def print_rocket_components(self):
-    for rocket_component in self.rocket_components:
-      print(f'{self.time}: {rocket_component.string_info()}')
+  def report(self) -> None:
+    """
+    Hand the current state to the progress reporter
+    """
+    self.reporter.report(self.time, self.rocket_components)
 
 
   def run(self) -> None:
     """
     Start the simulation
     """
-    # Create initial rows for each rocket component's log
-    self.log_rockets()
-    self.print_rocket_components()
+    instrumentation = self.instrumentation
+    if instrumentation is not None:
+      instrumentation.start_allocation_count()
+
+    # Only fresh runs are cached, a resumed one continues its log files
+    cache_key = None
+    cached = False
+    if self.cache is not None and not self.started:
+      rocket_components = self.get_all_rocket_components()
+      cache_key = self.cache.key(self)
+      cached = self.load_cached_result(cache_key, rocket_components)
+
+    for rocket_component in self.get_all_rocket_components():
+      rocket_component.instrumentation = instrumentation
+      # Pick up parameters changed since the component was built
+      if not self.started:
+        rocket_component.build_force_models()
+
+    for rocket_component in self.rocket_components:
+      rocket_component.open_log_output(fmt=self.log_format,
+        batch_size=self.log_batch_size,
+        flush_interval=self.log_flush_interval,
+        directory=self.log_directory,
+        background=self.log_background,
+        queue_size=self.log_queue_size,
+        backpressure=self.log_backpressure)
+
+    try:
+      # Create initial rows for each rocket component's log, unless
+      # continuing an earlier run or checkpoint
+      if not self.started:
+        self.log_rockets()
+        self.report()
+        self.started = True
+
+      if cached:
+        # Finished state restored, the logs are written when closed
+        pass
+      elif self.integrator == 'adaptive':
+        self.run_adaptive()
+      elif self.integrator == 'analytic':
+        self.run_analytic()
+      elif self.integrator == 'scheduled':
+        self.run_scheduled()
+      else:
+        self.run_euler()
+      self.reporter.finish(self.time, self.rocket_components)
+    finally:
+      for rocket_component in self.rocket_components:
+        rocket_component.close_log_output()
+      if instrumentation is not None:
+        instrumentation.stop_allocation_count()
+        for rocket_component in self.get_all_rocket_components():
+          if rocket_component.rocket_log is not None:
+            instrumentation.count('log_bytes_written',
+              rocket_component.rocket_log.bytes_written)
+
+    if cache_key is not None and not cached:
+      self.cache.store(cache_key, self, rocket_components)
+    elif cached:
+      self.cache.store_log_files(cache_key, self, rocket_components)
+
+
+  def run_euler(self) -> None:
+    """
+    Step every rocket component forward by time_step until time_max
+    """
+    instrumentation = self.instrumentation
+    checkpoint_interval = self.checkpoint_interval
+    if checkpoint_interval is not None and self.next_checkpoint is None:
+      self.next_checkpoint = self.time + checkpoint_interval
+    # Tolerance for floating point drift when comparing times
+    epsilon = 1e-9 * max(1, self.time_step)
 
     # Loop through times
     for time in np.arange((self.time + self.time_step),
@@ -57,10 +279,341 @@ class Simulation:
       self.time = time
       self.update()
 
+      if instrumentation is not None:
+        instrumentation.lap()
       for rocket_component in self.rocket_components:
         rocket_component.output_log()
-      
-      self.print_rocket_components()
+      if instrumentation is not None:
+        instrumentation.lap('output_log')
+
+      self.report()
+      if instrumentation is not None:
+        instrumentation.lap('report')
+        instrumentation.count('steps')
+
+      if checkpoint_interval is not None and \
+        time >= self.next_checkpoint - epsilon:
+        self.next_checkpoint = time + checkpoint_interval
+        self.save_checkpoint(self.checkpoint_path)
+
+
+  # Checkpoint Functions
+  def __getstate__(self) -> dict:
+    # Reporters may hold streams or callbacks, a restored simulation gets
+    # the default one, see resume and fork
+    state = self.__dict__.copy()
+    state['reporter'] = None
+    return state
+
+
+  def __setstate__(self, state: dict) -> None:
+    self.__dict__.update(state)
+    self.reporter = PrintReporter()
+
+
+  def snapshot(self) -> bytes:
+    """
+    Capture the full state of the simulation: time, every rocket component
+    including carried ones, their atmospheres, logs and log file positions.
+    Open log files are flushed first, so a restored simulation continues
+    them exactly after the captured rows. Rows in log files are not part of
+    the snapshot, restoring it reads them back from the files.
+
+    :return bytes: pickled simulation, see resume and fork
+    """
+    for rocket_component in self.get_all_rocket_components():
+      if rocket_component.rocket_log is not None:
+        rocket_component.rocket_log.flush_output()
+    buffer = io.BytesIO()
+    _CheckpointPickler(buffer, protocol=pickle.HIGHEST_PROTOCOL).dump(self)
+    return buffer.getvalue()
+
+
+  def save_checkpoint(self, path: str) -> None:
+    """
+    Write a snapshot to a file. The file is replaced atomically, so a crash
+    while saving leaves the previous checkpoint intact.
+
+    :param str path: checkpoint file
+    """
+    data = self.snapshot()
+    temporary_path = f'{path}.tmp'
+    with open(temporary_path, 'wb') as file:
+      file.write(data)
+      file.flush()
+      os.fsync(file.fileno())
+    os.replace(temporary_path, path)
+
+
+  @classmethod
+  def resume(cls, path: str, reporter: ProgressReporter = None) \
+    -> 'Simulation':
+    """
+    Restore a simulation from a checkpoint file. Calling run continues from
+    the checkpoint time, appending to the log files the checkpoint was taken
+    from; rows written after the checkpoint are discarded.
+
+    :param str path: file written by save_checkpoint
+    :param ProgressReporter reporter: reporter to use, defaults to printing
+    :return Simulation: the restored simulation
+    """
+    with open(path, 'rb') as file:
+      simulation = pickle.load(file)
+    if reporter is not None:
+      simulation.reporter = reporter
+    return simulation
+
+
+  @classmethod
+  def fork(cls, snapshot, reporter: ProgressReporter = None, **settings) \
+    -> 'Simulation':
+    """
+    Start an independent branch from a snapshot, e.g. to try several
+    separation times after a common ascent without simulating the ascent
+    again:
+
+      ascent = simulation.snapshot()
+      for time in separation_times:
+        branch = Simulation.fork(ascent, time_max=time,
+          log_directory=f'branch_{time}')
+        branch.run()
+        ...
+
+    The branch's logs hold the rows of the common prefix, but its log files
+    start fresh and it does not save checkpoints unless given a
+    checkpoint_path.
+
+    :param snapshot: bytes from snapshot, or a checkpoint file path
+    :param ProgressReporter reporter: reporter to use, defaults to printing
+    :param settings: Simulation attributes to change, e.g. time_max or
+    log_directory
+    :return Simulation: the branch
+    """
+    if isinstance(snapshot, (str, os.PathLike)):
+      simulation = cls.resume(snapshot)
+    else:
+      simulation = pickle.loads(snapshot)
+    for rocket_component in simulation.get_all_rocket_components():
+      if rocket_component.rocket_log is not None:
+        rocket_component.rocket_log.reset_output()
+    simulation.checkpoint_path = None
+    simulation.checkpoint_interval = None
+    for name, value in settings.items():
+      if not hasattr(simulation, name):
+        raise ValueError(f'Unknown simulation setting {name!r}')
+      setattr(simulation, name, value)
+    if reporter is not None:
+      simulation.reporter = reporter
+    return simulation
+
+
+  # Result Cache Functions
+  def load_cached_result(self, key: str, rocket_components: list) -> bool:
+    """
+    Restore a finished run from the cache. Log files cached in this
+    simulation's log format are copied into place; other logs are written to
+    this simulation's log files from their first row.
+
+    :param str key: see ResultCache.key
+    :param list rocket_components: see get_all_rocket_components
+    :return bool: True if the result was cached
+    """
+    if not self.cache.load(key, self, rocket_components):
+      return False
+    for index, rocket_component in enumerate(rocket_components):
+      rocket_log = rocket_component.rocket_log
+      if rocket_log is None:
+        continue
+      rocket_log.bytes_written = 0
+      path = rocket_component.log_output_path(self.log_format,
+        self.log_directory)
+      if self.cache.copy_log_file(key, index, path):
+        rocket_log.adopt_output(path)
+      else:
+        rocket_log.reset_output()
+    return True
+
+
+  def get_all_rocket_components(self) -> list:
+    """
+    :return list: every rocket component in the simulation, including the
+    components carried by others
+    """
+    return [component for rocket_component in self.rocket_components
+      for component in rocket_component.get_rocket_components()]
+
+
+  # Query Functions
+  def state_at(self, times, id=None, columns: list = None) -> dict:
+    """
+    Logged state of the rocket components interpolated at arbitrary times,
+    see RocketLog.state_at
+
+    :param times: time, or array of times
+    :param id: rocket component id, None for every component with a log
+    :param list columns: columns to return, defaults to all
+    :return dict: column -> values for one id, or id -> such a dict
+    """
+    states = {rocket_component.id:
+      rocket_component.rocket_log.state_at(times, columns)
+      for rocket_component in self.get_logged_rocket_components(id)}
+    return states[id] if id is not None else states
+
+
+  def resample(self, interval: float, id=None, start: float = None,
+    stop: float = None, columns: list = None) -> dict:
+    """
+    Logged state of the rocket components interpolated on a regular time
+    grid, see RocketLog.resample
+
+    :param float interval: seconds between samples
+    :param id: rocket component id, None for every component with a log
+    :return dict: column -> values for one id, or id -> such a dict
+    """
+    states = {rocket_component.id: rocket_component.rocket_log.resample(
+      interval, start, stop, columns)
+      for rocket_component in self.get_logged_rocket_components(id)}
+    return states[id] if id is not None else states
+
+
+  def get_logged_rocket_components(self, id=None) -> list:
+    """
+    :param id: rocket component id, None for all
+    :return list: rocket components with a log, matching id
+    """
+    rocket_components = [rocket_component
+      for rocket_component in self.get_all_rocket_components()
+      if rocket_component.rocket_log is not None and
+      (id is None or rocket_component.id == id)]
+    if id is not None and not rocket_components:
+      raise KeyError(f'No logged rocket component with id {id!r}')
+    return rocket_components
+
+
+  def get_counters(self) -> dict:
+    """
+    Timings and counters collected during run
+
+    :return dict: see Instrumentation.as_dict, empty without instrumentation
+    """
+    if self.instrumentation is None:
+      return {}
+    return self.instrumentation.as_dict()
+
+
+  def run_adaptive(self) -> None:
+    """
+    Integrate each rocket component with AdaptiveIntegrator, logging the
+    state at each output time
+    """
+    from adaptive_integrator import AdaptiveIntegrator
+
+    output_times = self.get_output_times()
+    time_start = self.time
+    time_end = time_start
+    for rocket_component in self.rocket_components:
+      integrator = AdaptiveIntegrator(rocket_component, rtol=self.rtol,
+        atol=self.atol)
+
+      def on_output(time):
+        self.time = time
+        rocket_component.log(time)
+        rocket_component.output_log()
+        self.reporter.report(time, [rocket_component])
+
+      def on_event(name, time):
+        rocket_component.log(time, (name,))
+
+      time_end = max(time_end, integrator.run(time_start, self.time_max,
+        output_times, on_output, on_event=on_event))
+      self.events.extend((rocket_component.id, name, time)
+        for name, time in integrator.events)
+    self.time = time_end
+
+
+  def run_analytic(self) -> None:
+    """
+    Advance each rocket component with AnalyticPhase while its forces admit
+    a closed form solution, logging the state at each output time and event.
+    Other phases fall back to update steps of time_step.
+    """
+    from analytic_phase import AnalyticPhase
+
+    output_times = self.get_output_times()
+    time_start = self.time
+    time_end = time_start
+    for rocket_component in self.rocket_components:
+      analytic_phase = AnalyticPhase(rocket_component)
+      output_index = 0
+      time = time_start
+      # Tolerance for floating point drift when comparing times
+      epsilon = 1e-9 * max(1, self.time_step)
+      while time < self.time_max - epsilon:
+        next_output = output_times[output_index] \
+          if output_index < len(output_times) else self.time_max
+
+        if analytic_phase.is_applicable():
+          time, event = analytic_phase.advance(time, next_output)
+          if event is not None:
+            self.events.append((rocket_component.id, event, time))
+            rocket_component.log(time, (event,))
+          elif time >= next_output - epsilon:
+            rocket_component.log(time)
+          if event == 'impact':
+            break
+        else:
+          time_step = min(self.time_step, self.time_max - time)
+          time += time_step
+          rocket_component.update(time, time_step)
+
+        while output_index < len(output_times) and \
+          output_times[output_index] <= time + epsilon:
+          output_index += 1
+        rocket_component.output_log()
+        self.reporter.report(time, [rocket_component])
+
+      time_end = max(time_end, time)
+    self.time = time_end
+
+
+  def schedule_separation(self, time: float, rocket_component) -> None:
+    """
+    Decouple the component carried by a RocketComponentDecorator at a given
+    time in 'scheduled' mode. The carried component then flies as a body of
+    its own.
+
+    :param float time: separation time
+    :param RocketComponentDecorator rocket_component: carrying component
+    """
+    if getattr(rocket_component, 'rocket_component', None) is None:
+      raise ValueError(f'Rocket component {rocket_component.id} carries '
+        'nothing to separate')
+    self.separations.append((time, rocket_component))
+
+
+  def run_scheduled(self) -> None:
+    """
+    Advance every body at its own rate with Scheduler, handling scheduled
+    separations, burnout and ground impact at their exact times
+    """
+    from scheduler import Scheduler
+
+    self.time = Scheduler(self).run()
+
+
+  def get_output_times(self) -> np.ndarray:
+    """
+    Output times after the current time, up to time_max
+
+    :return np.ndarray: output_times, or every time_step if not set
+    """
+    output_times = self.output_times
+    if output_times is None:
+      output_times = np.arange((self.time + self.time_step),
+        (self.time_max + self.time_step), self.time_step)
+    output_times = np.asarray(output_times, dtype=np.float64)
+    return output_times[(output_times > self.time) &
+      (output_times <= self.time_max)]
 
 
   def update(self) -> None:
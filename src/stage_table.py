@@ -0,0 +1,162 @@
+from array import array
+
+import numpy as np
+
+
+class StageTable:
+  """
+  Structure of arrays holding the mass properties of a set of stages, indexed
+  by stage. Every RocketComponent owns a row; a RocketComponentDecorator and
+  the component it carries share one table, linked through the parent and
+  child columns.
+
+  mass_cumulative[i] is the mass of stage i plus everything it carries, so a
+  total mass lookup is O(1) regardless of stack depth. It is kept up to date
+  incrementally: changing a stage's mass only touches that stage and the
+  stages carrying it, and the stage that burns fuel is normally the bottom of
+  its stack.
+  """
+
+  def __init__(self) -> None:
+    # Columns, typed contiguous arrays
+    self.mass_fuel = array('d') # kg
+    self.mass_structure = array('d') # kg
+    self.mass_cumulative = array('d') # kg, self plus carried stages
+    self.parent = array('q') # index of the carrying stage, -1 if none
+    self.child = array('q') # index of the carried stage, -1 if none
+
+    self.rocket_components = []
+
+
+  def __len__(self) -> int:
+    return len(self.rocket_components)
+
+
+  def add_stage(self, rocket_component, mass_fuel: float = 0.0,
+    mass_structure: float = 0.0) -> int:
+    """
+    Add a row for a stage that is not attached to any other stage
+
+    :param RocketComponent rocket_component: component owning the row
+    :param float mass_fuel: fuel mass
+    :param float mass_structure: structure mass
+    :return int: index of the new row
+    """
+    index = len(self.rocket_components)
+    self.rocket_components.append(rocket_component)
+    self.mass_fuel.append(mass_fuel)
+    self.mass_structure.append(mass_structure)
+    self.mass_cumulative.append(mass_fuel + mass_structure)
+    self.parent.append(-1)
+    self.child.append(-1)
+    return index
+
+
+  # Mass Functions
+  def set_mass_fuel(self, index: int, value: float) -> None:
+    self.mass_fuel[index] = value
+    self._refresh(index)
+
+
+  def set_mass_structure(self, index: int, value: float) -> None:
+    self.mass_structure[index] = value
+    self._refresh(index)
+
+
+  def _refresh(self, index: int) -> None:
+    """
+    Recompute the cumulative mass of a stage and of the stages carrying it
+    """
+    mass_fuel = self.mass_fuel
+    mass_structure = self.mass_structure
+    mass_cumulative = self.mass_cumulative
+    child = self.child[index]
+    if child < 0 and self.parent[index] < 0:
+      # Lone stage
+      mass_cumulative[index] = mass_fuel[index] + mass_structure[index]
+      return
+    while index >= 0:
+      mass = mass_fuel[index] + mass_structure[index]
+      if child >= 0:
+        mass += mass_cumulative[child]
+      mass_cumulative[index] = mass
+      child = index
+      index = self.parent[index]
+
+
+  # Link Functions
+  def attach(self, parent_index: int, child_index: int) -> None:
+    """
+    Make the stage at parent_index carry the stage at child_index
+
+    :param int parent_index: carrying stage
+    :param int child_index: carried stage, must not be carried already
+    """
+    if self.parent[child_index] >= 0:
+      raise ValueError(f'Stage {child_index} is already attached')
+    if self.child[parent_index] >= 0:
+      self.detach(self.child[parent_index])
+    self.parent[child_index] = parent_index
+    self.child[parent_index] = child_index
+    self._refresh(parent_index)
+
+
+  def detach(self, child_index: int) -> None:
+    """
+    Separate a stage from the stage carrying it
+
+    :param int child_index: carried stage
+    """
+    parent_index = self.parent[child_index]
+    if parent_index < 0:
+      return
+    self.parent[child_index] = -1
+    self.child[parent_index] = -1
+    self._refresh(parent_index)
+
+
+  def root(self, index: int) -> int:
+    """
+    :param int index: stage index
+    :return int: index of the bottom stage of the stack containing index
+    """
+    while self.parent[index] >= 0:
+      index = self.parent[index]
+    return index
+
+
+  def merge(self, other: 'StageTable') -> None:
+    """
+    Move every row of another table into this one, re-pointing the owning
+    components at this table
+
+    :param StageTable other: table to absorb
+    """
+    if other is self:
+      return
+    offset = len(self)
+    self.mass_fuel.extend(other.mass_fuel)
+    self.mass_structure.extend(other.mass_structure)
+    self.mass_cumulative.extend(other.mass_cumulative)
+    self.parent.extend(index + offset if index >= 0 else -1
+      for index in other.parent)
+    self.child.extend(index + offset if index >= 0 else -1
+      for index in other.child)
+    for index, rocket_component in enumerate(other.rocket_components):
+      rocket_component.stage_table = self
+      rocket_component.stage_index = index + offset
+    self.rocket_components.extend(other.rocket_components)
+    other.__init__()
+
+
+  def to_numpy(self) -> dict:
+    """
+    :return dict: copy of every column as a NumPy array
+    """
+    return {
+      'mass_fuel': np.array(self.mass_fuel),
+      'mass_structure': np.array(self.mass_structure),
+      'mass_cumulative': np.array(self.mass_cumulative),
+      'parent': np.array(self.parent),
+      'child': np.array(self.child),
+    }
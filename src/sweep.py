@@ -0,0 +1,213 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import itertools
+from multiprocessing import shared_memory
+import math
+
+import numpy as np
+import pandas as pd
+
+from progress_reporter import SilentReporter
+from rocket_component import HeadRocketComponent, RocketComponentDecorator
+from simulation import Simulation
+
+
+# Fuel loads of the stages below the head, stage 1 carrying the head, see
+# build_stack
+STAGE_PARAMETERS = (
+  'stage_1_mass_fuel',
+  'stage_2_mass_fuel',
+)
+
+# RocketComponent attributes (and the Simulation time_step) a sweep may vary
+SWEEP_PARAMETERS = (
+  'mass_fuel',
+  'fuel_flow_rate',
+  'velocity_exhaust',
+  'alpha',
+  'time_step',
+) + STAGE_PARAMETERS
+
+# Values written for every run, in column order
+SUMMARY_FIELDS = (
+  'apogee', # max pos_y
+  'apogee_time',
+  'max_q', # max dynamic pressure
+  'max_q_time',
+  'max_velocity', # max velocity magnitude
+  'burnout_time', # NaN if fuel remains at time_max
+  'burnout_altitude', # pos_y at burnout, NaN if none
+  'burnout_velocity', # velocity magnitude at burnout
+  'impact_time', # NaN if still flying at time_max
+  'impact_range', # pos_x distance from the launch site at impact
+  'final_pos_x',
+  'final_pos_y',
+  'final_velocity_x',
+  'final_velocity_y',
+  'final_mass_fuel', # fuel left in every stage
+)
+
+
+def expand_grid(grid: dict) -> list:
+  """
+  Expand a grid of parameter values into one dict per combination
+
+  :param dict grid: parameter name -> list of values
+  :return list: parameter dicts, last parameter varying fastest
+  """
+  names = list(grid)
+  return [dict(zip(names, values))
+    for values in itertools.product(*(grid[name] for name in names))]
+
+
+def build_stack(parameters: dict) -> list:
+  """
+  Build the rocket described by a parameter set without logs: a
+  HeadRocketComponent, carried by one RocketComponentDecorator per stage
+  fuel load given. Stages stay attached for the whole flight. Engine
+  parameters and alpha apply to every stage.
+
+  :param dict parameters: values for any of SWEEP_PARAMETERS
+  :return list: rocket components, head first and bottom stage last
+  """
+  stages = [name for name in STAGE_PARAMETERS if name in parameters]
+  if stages != list(STAGE_PARAMETERS[:len(stages)]):
+    raise ValueError(f'Stage fuel loads must be given from '
+      f'{STAGE_PARAMETERS[0]} up, got {stages}')
+
+  alpha = parameters.get('alpha', math.pi / 2)
+  rocket_components = [HeadRocketComponent(0, alpha=alpha, keep_log=False,
+    summarize=True)]
+  for id, name in enumerate(stages, start=1):
+    rocket_components.append(RocketComponentDecorator(rocket_components[-1],
+      id, alpha=alpha, keep_log=False))
+    rocket_components[-1].mass_fuel = parameters[name]
+  for rocket_component in rocket_components:
+    for name in ('fuel_flow_rate', 'velocity_exhaust'):
+      if name in parameters:
+        setattr(rocket_component, name, parameters[name])
+  if 'mass_fuel' in parameters:
+    rocket_components[0].mass_fuel = parameters['mass_fuel']
+  return rocket_components
+
+
+def summarize_run(parameters: dict, time_max: float = 100) -> np.ndarray:
+  """
+  Simulate one rocket without a log and summarize the trajectory of its head
+  with a FlightSummary
+
+  :param dict parameters: values for any of SWEEP_PARAMETERS
+  :param float time_max: max time of the simulation
+  :return np.ndarray: values ordered like SUMMARY_FIELDS
+  """
+  unknown = set(parameters) - set(SWEEP_PARAMETERS)
+  if unknown:
+    raise ValueError(f'Unknown sweep parameters: {sorted(unknown)}')
+
+  rocket_components = build_stack(parameters)
+  rocket_component = rocket_components[0]
+  simulation = Simulation(rocket_components[-1], time_max=time_max,
+    time_step=parameters.get('time_step', 1), reporter=SilentReporter())
+  simulation.run()
+
+  summary = rocket_component.flight_summary
+  return np.array([
+    summary.apogee,
+    summary.apogee_time,
+    summary.max_q,
+    summary.max_q_time,
+    summary.max_velocity,
+    summary.burnout_time,
+    summary.burnout_altitude,
+    summary.burnout_velocity,
+    summary.impact_time,
+    summary.impact_range,
+    rocket_component.position.x,
+    rocket_component.position.y,
+    rocket_component.velocity.x,
+    rocket_component.velocity.y,
+    sum(component.mass_fuel for component in rocket_components),
+  ])
+
+
+def _run_into_shared_memory(name: str, shape: tuple, index: int,
+  parameters: dict, time_max: float) -> None:
+  """
+  Worker: summarize one run and write it into row `index` of the shared
+  results array
+  """
+  memory = shared_memory.SharedMemory(name=name)
+  try:
+    results = np.ndarray(shape, dtype=np.float64, buffer=memory.buf)
+    results[index] = summarize_run(parameters, time_max)
+    del results
+  finally:
+    memory.close()
+
+
+def sweep(parameters, time_max: float = 100, max_workers: int = None) \
+  -> pd.DataFrame:
+  """
+  Run one simulation per parameter set across a process pool. Workers write
+  their summaries straight into a shared memory array, so only the
+  parameters are pickled.
+
+  :param parameters: dict grid (see expand_grid) or list of parameter dicts
+  :param float time_max: max time of each simulation
+  :param int max_workers: number of processes, defaults to the CPU count
+  :return pd.DataFrame: the parameters followed by SUMMARY_FIELDS, one row per
+  run
+  """
+  runs = expand_grid(parameters) if isinstance(parameters, dict) \
+    else list(parameters)
+  shape = (len(runs), len(SUMMARY_FIELDS))
+  if not runs:
+    return pd.DataFrame(columns=list(SUMMARY_FIELDS))
+
+  memory = shared_memory.SharedMemory(create=True,
+    size=int(np.prod(shape)) * np.dtype(np.float64).itemsize)
+  try:
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+      futures = [
+        executor.submit(_run_into_shared_memory, memory.name, shape, index,
+          run, time_max)
+        for index, run in enumerate(runs)
+      ]
+      for future in futures:
+        future.result()
+    results = np.ndarray(shape, dtype=np.float64, buffer=memory.buf).copy()
+  finally:
+    memory.close()
+    memory.unlink()
+
+  return pd.concat([pd.DataFrame(runs),
+    pd.DataFrame(results, columns=list(SUMMARY_FIELDS))], axis=1)
+
+
+### MAIN ###
+def main(argv=None):
+  parser = argparse.ArgumentParser(
+    description='Sweep RocketComponent parameters over a grid in parallel')
+  for name in SWEEP_PARAMETERS:
+    parser.add_argument(f'--{name.replace("_", "-")}', dest=name, type=float,
+      nargs='+', help=f'values of {name} to sweep')
+  parser.add_argument('--time-max', type=float, default=100,
+    help='max time of each simulation')
+  parser.add_argument('--workers', type=int, default=None,
+    help='number of worker processes')
+  parser.add_argument('--output', default=None,
+    help='CSV file to write, printed if omitted')
+  args = parser.parse_args(argv)
+
+  grid = {name: getattr(args, name) for name in SWEEP_PARAMETERS
+    if getattr(args, name) is not None}
+  results = sweep(grid, time_max=args.time_max, max_workers=args.workers)
+  if args.output:
+    results.to_csv(args.output, index=False)
+  else:
+    print(results.to_string(index=False))
+  return results
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,179 @@
+"""
+Time-indexed queries over logged trajectories
+
+Sources are anything with a `column(name)` method returning the logged
+values in time order: a RocketLog, or a TrajectoryReader over a binary file.
+Query times are located with a binary search on the time column, and only
+the rows around them are read, so querying k times in a log of n rows costs
+O(k log n). For a memory mapped TrajectoryReader that means only those pages
+of the file are touched.
+
+Columns a log did not store, such as the magnitude and angle of a vector when
+only its x and y were selected, are derived from the stored columns at read
+time, see DERIVED_COLUMNS.
+"""
+import math
+
+import numpy as np
+
+
+# Columns that are not interpolated: the value of the row at or before the
+# query time is returned
+STEP_COLUMNS = ('id',)
+
+# Logged vectors, each stored as _x, _y, _r and _theta columns
+VECTORS = ('velocity', 'drag_force', 'gravity_force', 'lift_force',
+  'thrust_force')
+
+
+def _zeros(column):
+  return np.zeros(len(column('time')))
+
+
+def _magnitude(vector: str):
+  return lambda column: np.hypot(column(f'{vector}_x'), column(f'{vector}_y'))
+
+
+def _angle(vector: str):
+  return lambda column: np.arctan2(column(f'{vector}_y'), column(f'{vector}_x'))
+
+
+# Columns that can be computed from other columns when they were not stored:
+# name -> (columns needed, function(column) of a lookup returning those
+# columns as arrays)
+DERIVED_COLUMNS = {
+  'pos_z': (('time',), _zeros),
+  'velocity_z': (('time',), _zeros),
+  **{f'{vector}_r': ((f'{vector}_x', f'{vector}_y'), _magnitude(vector))
+    for vector in VECTORS},
+  **{f'{vector}_theta': ((f'{vector}_x', f'{vector}_y'), _angle(vector))
+    for vector in VECTORS},
+}
+
+
+def derive(name: str, column, stored) -> np.ndarray:
+  """
+  Compute a column that was not stored from the ones that were
+
+  :param str name: column to compute
+  :param column: function returning a stored column by name, as an array
+  :param stored: names of the stored columns
+  :return np.ndarray: values of the column
+  """
+  if name not in DERIVED_COLUMNS:
+    raise KeyError(f'Column {name!r} is neither stored nor derivable')
+  needed, function = DERIVED_COLUMNS[name]
+  missing = [column_name for column_name in needed
+    if column_name not in stored]
+  if missing:
+    raise KeyError(f'Column {name!r} needs {missing}, which were not stored')
+  return function(column)
+
+
+def column_at(source, name: str, rows) -> np.ndarray:
+  """
+  Values of a column at some rows, derived from the stored columns at just
+  those rows if it was not stored
+
+  :param source: RocketLog or TrajectoryReader
+  :param str name: column name
+  :param rows: row indices
+  :return np.ndarray: one value per row
+  """
+  stored = source.stored_columns
+  if name in stored:
+    return np.asarray(source.column(name)[rows])
+  return derive(name,
+    lambda stored_name: np.asarray(source.column(stored_name)[rows],
+      dtype=np.float64), stored)
+
+
+def interpolate(source, times, columns: list = None) -> dict:
+  """
+  State at arbitrary times, linearly interpolated between the logged rows
+  around each time. Angle columns (ending in '_theta') are interpolated the
+  short way around the circle. Times outside the logged range give NaN.
+
+  :param source: RocketLog or TrajectoryReader, time column sorted
+  :param times: query time, or array of them
+  :param list columns: columns to return, defaults to every logged column,
+  any of DERIVED_COLUMNS may be asked for too
+  :return dict: column -> array shaped like times, 'time' holds the query
+  times
+  """
+  if columns is None:
+    columns = source.columns
+  times = np.asarray(times, dtype=np.float64)
+  shape = times.shape
+  times = times.ravel()
+
+  logged = source.column('time')
+  count = len(logged)
+  result = {'time': times.reshape(shape)}
+  if count == 0:
+    for column in columns:
+      if column != 'time':
+        result[column] = np.full(shape, math.nan)
+    return result
+
+  # Row at or before each time, and the one after it
+  after = np.searchsorted(logged, times, side='right')
+  before = np.clip(after - 1, 0, count - 1)
+  after = np.clip(after, 0, count - 1)
+  time_before = np.asarray(logged[before], dtype=np.float64)
+  time_after = np.asarray(logged[after], dtype=np.float64)
+  span = time_after - time_before
+  weight = np.divide(times - time_before, span, out=np.zeros_like(times),
+    where=span > 0)
+  outside = (times < logged[0]) | (times > logged[count - 1])
+
+  for column in columns:
+    if column == 'time':
+      continue
+    value_before = column_at(source, column, before)
+    if column in STEP_COLUMNS:
+      result[column] = value_before.reshape(shape)
+      continue
+    value_before = value_before.astype(np.float64)
+    difference = column_at(source, column, after).astype(np.float64) - \
+      value_before
+    if column.endswith('_theta'):
+      difference = (difference + math.pi) % (2 * math.pi) - math.pi
+    value = value_before + weight * difference
+    value[outside] = math.nan
+    result[column] = value.reshape(shape)
+  return result
+
+
+def resample_times(source, interval: float, start: float = None,
+  stop: float = None) -> np.ndarray:
+  """
+  :param source: RocketLog or TrajectoryReader
+  :param float interval: seconds between samples
+  :param float start: first sample, defaults to the first logged time
+  :param float stop: last sample at most, defaults to the last logged time
+  :return np.ndarray: start, start + interval, ... up to stop
+  """
+  if interval <= 0:
+    raise ValueError('interval must be positive')
+  logged = source.column('time')
+  if len(logged) == 0:
+    return np.empty(0)
+  start = float(logged[0]) if start is None else start
+  stop = float(logged[len(logged) - 1]) if stop is None else stop
+  if stop < start:
+    return np.empty(0)
+  # Tolerance for floating point drift, so stop itself is included
+  count = math.floor((stop - start) / interval + 1e-9) + 1
+  return start + interval * np.arange(count)
+
+
+def resample(source, interval: float, start: float = None, stop: float = None,
+  columns: list = None) -> dict:
+  """
+  State on a regular time grid, see interpolate and resample_times
+
+  :return dict: column -> array, one value per sample
+  """
+  return interpolate(source, resample_times(source, interval, start, stop),
+    columns)
@@ -0,0 +1,188 @@
+"""
+Binary trajectory files
+
+  magic (8 bytes) | header length (uint32, little endian) | JSON header |
+  fixed size records
+
+The JSON header holds the column names and the record dtype, and is padded
+with spaces so the records start on a RECORD_ALIGNMENT byte boundary. Records
+are appended as the simulation runs, so a file can be read while it is still
+being written; a trailing partial record is ignored.
+"""
+import json
+import os
+import struct
+
+import numpy as np
+
+import trajectory_query
+
+
+MAGIC = b'RKTTRAJ1'
+RECORD_ALIGNMENT = 64
+VERSION = 1
+
+
+def record_dtype(columns: list) -> np.dtype:
+  """
+  Fixed size record layout for RocketLog columns. 'id' is stored as a 64 bit
+  integer, every other column as a 64 bit float, all little endian.
+
+  :param list columns: column names, in record order
+  :return np.dtype: structured record dtype
+  """
+  return np.dtype([(column, '<i8' if column == 'id' else '<f8')
+    for column in columns])
+
+
+def pack_header(columns: list, dtype: np.dtype) -> bytes:
+  """
+  :param list columns: column names
+  :param np.dtype dtype: record dtype, see record_dtype
+  :return bytes: file header, records follow directly after it
+  """
+  header = json.dumps({
+    'version': VERSION,
+    'columns': list(columns),
+    'dtype': [[name, dtype.fields[name][0].str] for name in dtype.names],
+  }).encode('utf-8')
+  length = len(MAGIC) + 4 + len(header)
+  header += b' ' * (-length % RECORD_ALIGNMENT)
+  return MAGIC + struct.pack('<I', len(header)) + header
+
+
+def read_header(file) -> tuple:
+  """
+  :param file: binary file positioned at the start of a trajectory file
+  :return tuple: (header dict, dtype, offset of the first record)
+  """
+  if file.read(len(MAGIC)) != MAGIC:
+    raise ValueError(f'{file.name} is not a trajectory file')
+  length, = struct.unpack('<I', file.read(4))
+  header = json.loads(file.read(length).decode('utf-8'))
+  if header['version'] != VERSION:
+    raise ValueError(
+      f"Unsupported trajectory file version {header['version']}")
+  dtype = np.dtype([(name, code) for name, code in header['dtype']])
+  return header, dtype, len(MAGIC) + 4 + length
+
+
+
+class TrajectoryReader:
+  """
+  Read-only view of a binary trajectory file written by
+  BinaryRocketLogWriter. The records are memory mapped, so columns and time
+  windows are read from disk on access instead of loading the whole file.
+  """
+
+  def __init__(self, path: str) -> None:
+    """
+    :param str path: trajectory file
+    """
+    self.path = path
+    with open(path, 'rb') as file:
+      self.header, self.dtype, self.offset = read_header(file)
+    self.columns = self.header['columns']
+    self.records = None
+    self.refresh()
+
+
+  def refresh(self) -> None:
+    """
+    Remap the file, picking up records appended since it was opened
+    """
+    count = (os.path.getsize(self.path) - self.offset) // self.dtype.itemsize
+    if count > 0:
+      self.records = np.memmap(self.path, dtype=self.dtype, mode='r',
+        offset=self.offset, shape=(count,))
+    else:
+      self.records = np.empty(0, dtype=self.dtype)
+
+
+  def __len__(self) -> int:
+    return len(self.records)
+
+
+  @property
+  def stored_columns(self) -> tuple:
+    return self.dtype.names
+
+
+  def column(self, name: str) -> np.ndarray:
+    """
+    :param str name: column name, or one of trajectory_query.DERIVED_COLUMNS
+    computed from the stored ones
+    :return np.ndarray: memory mapped view of the column, or the computed
+    values
+    """
+    if name in self.dtype.names:
+      return self.records[name]
+    return trajectory_query.derive(name, self.records.__getitem__,
+      self.dtype.names)
+
+
+  def time_range(self, start: float = None, stop: float = None,
+    columns: list = None) -> np.ndarray:
+    """
+    Records with start <= time <= stop. Only the pages of the time column
+    touched by the binary search and the selected records are read.
+
+    :param float start: first time, None for the beginning of the file
+    :param float stop: last time, None for the end of the file
+    :param list columns: columns to keep, None for all
+    :return np.ndarray: memory mapped structured view of the records
+    """
+    times = self.records['time']
+    first = 0 if start is None else np.searchsorted(times, start, side='left')
+    last = len(times) if stop is None else \
+      np.searchsorted(times, stop, side='right')
+    records = self.records[first:last]
+    if columns is not None:
+      records = records[list(columns)]
+    return records
+
+
+  def state_at(self, times, columns: list = None) -> dict:
+    """
+    State interpolated at arbitrary times, see trajectory_query.interpolate.
+    Only the records around each time are read from disk.
+
+    :param times: time, or array of times
+    :param list columns: columns to return, defaults to all
+    :return dict: column -> values shaped like times
+    """
+    return trajectory_query.interpolate(self, times, columns)
+
+
+  def resample(self, interval: float, start: float = None,
+    stop: float = None, columns: list = None) -> dict:
+    """
+    State interpolated on a regular time grid, see trajectory_query.resample
+
+    :param float interval: seconds between samples
+    :param float start: first sample, defaults to the first record
+    :param float stop: last sample at most, defaults to the last record
+    :param list columns: columns to return, defaults to all
+    :return dict: column -> values, one per sample
+    """
+    return trajectory_query.resample(self, interval, start, stop, columns)
+
+
+  def to_dataframe(self, start: float = None, stop: float = None,
+    columns: list = None):
+    """
+    Load a time window into a DataFrame, see time_range
+
+    :return pd.DataFrame: selected records
+    """
+    import pandas as pd
+    records = self.time_range(start, stop, columns)
+    return pd.DataFrame({name: np.asarray(records[name])
+      for name in records.dtype.names})
+
+
+  def close(self) -> None:
+    """
+    Release the memory map
+    """
+    self.records = np.empty(0, dtype=self.dtype)
@@ -1,10 +1,22 @@
 import math
 
+# Number of Vectors created while count_allocations is set, see
+# Instrumentation.start_allocation_count
+allocations = 0
+count_allocations = False
+
 class Vector:
   """
   The vector class will create a vector object from a calculated value. It will
   create magnitude, direction, and component attributes.
 
+  x and y are always stored. A vector defined by r and theta converts to
+  cartesian on creation, while a vector defined by x and y only computes r
+  and theta the first time one of them is read, so vectors that are only used
+  through x and y never pay for sqrt/atan2. r and theta remember the x and y
+  they were computed from and are recomputed once either changed, so x and y
+  may be assigned directly.
+
   Attributes:
     x : float
       value of x in cartesian coordinate system
@@ -16,14 +28,16 @@ class Vector:
       value of theta (in radians) in polar coordinate system
   """
 
+  __slots__ = ('x', 'y', '_r', '_theta', '_polar_x', '_polar_y')
+
   def __init__(self, *, x=None, y=None, r=None, theta=None):
     """
-    Initializes a vector from either cartesian or polar coordinate 
+    Initializes a vector from either cartesian or polar coordinate
     representation.
-    NOTE: Keyword arguments REQUIRED. Either define a vector with x and y 
-    keywords for cartesian components, or r and theta for polar coordinates. 
+    NOTE: Keyword arguments REQUIRED. Either define a vector with x and y
+    keywords for cartesian components, or r and theta for polar coordinates.
     Initializer will throw a ValueError if both coordinate systems are used.
-    
+
     Parameters:
       x : float
       value of x in cartesian coordinate system
@@ -34,6 +48,9 @@ class Vector:
       theta : float
         value of theta (in radians) in polar coordinate system
     """
+    global allocations
+    if count_allocations:
+      allocations += 1
     if x is not None or y is not None:
       if r is not None or theta is not None:
         raise ValueError('Cannot define a Vector by Rectangualr and Polar \
@@ -41,22 +58,80 @@ class Vector:
       else:
         self.x = x
         self.y = y
-        self.update_polar()
+        self._r = None
+        self._theta = None
+        self._polar_x = self._polar_y = None
     elif r is not None and theta is not None:
-      self.r = r
-      self.theta = theta
+      self._r = r
+      self._theta = theta
       self.update_cartesian()
     else:
       raise ValueError('Define a Vector by either x and y or r and theta')
 
 
+  @classmethod
+  def from_direction(cls, r: float, theta: float, cos_theta: float,
+    sin_theta: float) -> 'Vector':
+    """
+    Polar vector whose direction's cosine and sine are already known, e.g. a
+    force along a fixed axis, so no trigonometry is needed
+
+    :param float r: magnitude
+    :param float theta: angle, in radians
+    :param float cos_theta: math.cos(theta)
+    :param float sin_theta: math.sin(theta)
+    :return Vector: the vector
+    """
+    global allocations
+    if count_allocations:
+      allocations += 1
+    vector = cls.__new__(cls)
+    vector._r = r
+    vector._theta = theta
+    vector.x = vector._polar_x = r * cos_theta
+    vector.y = vector._polar_y = r * sin_theta
+    return vector
+
+
+  @property
+  def r(self) -> float:
+    if self.x != self._polar_x or self.y != self._polar_y:
+      self.update_polar()
+    return self._r
+
+
+  @r.setter
+  def r(self, value: float) -> None:
+    if self.x != self._polar_x or self.y != self._polar_y:
+      self.update_polar()
+    self._r = value
+    self.update_cartesian()
+
+
+  @property
+  def theta(self) -> float:
+    if self.x != self._polar_x or self.y != self._polar_y:
+      self.update_polar()
+    return self._theta
+
+
+  @theta.setter
+  def theta(self, value: float) -> None:
+    if self.x != self._polar_x or self.y != self._polar_y:
+      self.update_polar()
+    self._theta = value
+    self.update_cartesian()
+
+
   def update_polar(self) -> None:
     """
     Creates or updates polar coordinate attributes using cartesian coordinate
     attributes
     """
-    self.r = math.sqrt((self.x ** 2) + (self.y ** 2))
-    self.theta = math.atan2(self.y, self.x)
+    self._r = math.sqrt((self.x ** 2) + (self.y ** 2))
+    self._theta = math.atan2(self.y, self.x)
+    self._polar_x = self.x
+    self._polar_y = self.y
 
 
   def update_cartesian(self) -> None:
@@ -64,5 +139,53 @@ class Vector:
     Creates or updates cartesian coordinate attributes using polar coordinate
     attributes
     """
-    self.x = self.r * math.cos(self.theta)
-    self.y = self.r * math.sin(self.theta)
+    self.x = self._polar_x = self._r * math.cos(self._theta)
+    self.y = self._polar_y = self._r * math.sin(self._theta)
+
+
+  # Arithmetic
+  def __add__(self, other: 'Vector') -> 'Vector':
+    return Vector(x=self.x + other.x, y=self.y + other.y)
+
+
+  def __iadd__(self, other: 'Vector') -> 'Vector':
+    """
+    Add other to this vector in place
+    """
+    self.x += other.x
+    self.y += other.y
+    return self
+
+
+  def __mul__(self, factor: float) -> 'Vector':
+    return Vector(x=self.x * factor, y=self.y * factor)
+
+
+  __rmul__ = __mul__
+
+
+  def __imul__(self, factor: float) -> 'Vector':
+    return self.scale(factor)
+
+
+  def scale(self, factor: float) -> 'Vector':
+    """
+    Multiply this vector by factor in place
+
+    :param float factor: scale factor
+    :return Vector: self
+    """
+    self.x *= factor
+    self.y *= factor
+    return self
+
+
+  def copy(self) -> 'Vector':
+    """
+    :return Vector: a new vector equal to this one, in cartesian form
+    """
+    return Vector(x=self.x, y=self.y)
+
+
+  def __repr__(self) -> str:
+    return f'Vector(x={self.x!r}, y={self.y!r})'
@@ -0,0 +1,73 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.progress_reporter import SilentReporter
+from src.rocket_component import HeadRocketComponent
+from src.simulation import Simulation
+
+
+def short_burn() -> HeadRocketComponent:
+  """
+  :return HeadRocketComponent: tilted component that burns out after about
+  13.8 s, without pressure thrust afterwards, so it reaches an apogee and
+  falls back within a minute
+  """
+  rocket_component = HeadRocketComponent(0, alpha=1.4)
+  rocket_component.mass_fuel = 20000
+  rocket_component.pressure_exhaust = 101325.0
+  return rocket_component
+
+
+class TestAdaptiveIntegrator(unittest.TestCase):
+
+  def setUp(self):
+    self.directory = tempfile.TemporaryDirectory()
+    self.addCleanup(self.directory.cleanup)
+
+
+  def run_simulation(self, integrator: str, time_step: float,
+    time_max: float) -> tuple:
+    rocket_component = short_burn()
+    simulation = Simulation(rocket_component, time_max=time_max,
+      time_step=time_step, integrator=integrator,
+      log_directory=self.directory.name, reporter=SilentReporter())
+    simulation.run()
+    return rocket_component, simulation
+
+
+  def test_matches_fine_euler(self):
+    adaptive, _ = self.run_simulation('adaptive', 1, time_max=58)
+    euler, _ = self.run_simulation('euler', 0.001, time_max=58)
+    times = [5, 13, 20, 36, 55]
+    columns = ['pos_x', 'pos_y', 'velocity_x', 'velocity_y', 'mass_fuel']
+    expected = euler.rocket_log.state_at(times, columns)
+    actual = adaptive.rocket_log.state_at(times, columns)
+    for column in columns:
+      with self.subTest(column=column):
+        np.testing.assert_allclose(actual[column], expected[column],
+          rtol=1e-3, atol=2.0)
+
+
+  def test_reports_events(self):
+    rocket_component, simulation = self.run_simulation('adaptive', 1,
+      time_max=300)
+    self.assertEqual([name for _, name, _ in simulation.events],
+      ['burnout', 'apogee', 'impact'])
+    times = {name: time for _, name, time in simulation.events}
+    self.assertAlmostEqual(times['burnout'], 20000 / 1450, places=6)
+    # Integration stops at ground impact
+    self.assertEqual(simulation.time, times['impact'])
+    self.assertAlmostEqual(rocket_component.position.y, 0, places=3)
+
+    # Every event is logged as its own row at its exact time
+    log = rocket_component.rocket_log
+    logged = {name: log.column('time')[index] for index, name in log.events}
+    self.assertEqual(logged, times)
+    apogee = log.state_at(times['apogee'], ['velocity_y'])
+    self.assertAlmostEqual(float(apogee['velocity_y']), 0, places=3)
+
+
+if __name__ == '__main__':
+  unittest.main()
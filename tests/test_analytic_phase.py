@@ -0,0 +1,65 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.analytic_phase import AnalyticPhase
+from src.progress_reporter import SilentReporter
+from src.rocket_component import HeadRocketComponent
+from src.simulation import Simulation
+
+
+def drag_free(alpha: float = 1.4) -> HeadRocketComponent:
+  """
+  :return HeadRocketComponent: component without drag or pressure thrust, so
+  only thrust along alpha and gravity act on it
+  """
+  rocket_component = HeadRocketComponent(0, alpha=alpha)
+  rocket_component.mass_fuel = 100000
+  rocket_component.drag_coefficient = 0
+  rocket_component.pressure_exhaust = 101325.0
+  return rocket_component
+
+
+class TestAnalyticPhase(unittest.TestCase):
+
+  def setUp(self):
+    self.directory = tempfile.TemporaryDirectory()
+    self.addCleanup(self.directory.cleanup)
+
+
+  def run_simulation(self, integrator: str, time_step: float):
+    rocket_component = drag_free()
+    Simulation(rocket_component, time_max=100, time_step=time_step,
+      integrator=integrator, log_directory=self.directory.name,
+      reporter=SilentReporter()).run()
+    return rocket_component.rocket_log
+
+
+  def test_engages_without_drag(self):
+    rocket_component = drag_free()
+    rocket_component.build_force_models()
+    self.assertTrue(AnalyticPhase(rocket_component).is_applicable())
+    rocket_component.drag_coefficient = 0.75
+    rocket_component.build_force_models()
+    self.assertFalse(AnalyticPhase(rocket_component).is_applicable())
+
+
+  def test_matches_fine_euler(self):
+    analytic = self.run_simulation('analytic', 1)
+    euler = self.run_simulation('euler', 0.001)
+    self.assertEqual([name for _, name in analytic.events], ['burnout'])
+    self.assertAlmostEqual(analytic.column('time')[analytic.events[0][0]],
+      100000 / 1450, places=9)
+    times = [10, 30, 68.9, 75, 100]
+    columns = ['pos_x', 'pos_y', 'velocity_x', 'velocity_y', 'mass_fuel']
+    expected = euler.state_at(times, columns)
+    actual = analytic.state_at(times, columns)
+    for column in columns:
+      with self.subTest(column=column):
+        np.testing.assert_allclose(actual[column], expected[column],
+          rtol=1e-4, atol=1.0)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,80 @@
+from functools import partial
+import unittest
+
+import numpy as np
+
+from src.atmosphere import Atmosphere, ScaledAtmosphere, StandardAtmosphere
+
+
+# U.S. Standard Atmosphere, 1976, Table I, at geometric altitudes:
+# altitude (m), temperature (K), pressure (Pa), density (kg/m^3),
+# gravity (m/s^2), viscosity (N*s/m^2)
+PUBLISHED = (
+  (0, 288.150, 101325.0, 1.2250, 9.8067, 1.7894e-5),
+  (11000, 216.774, 22699.9, 0.36480, 9.7728, 1.4223e-5),
+  (20000, 216.650, 5529.3, 0.088910, 9.7452, 1.4216e-5),
+)
+
+
+class TestStandardAtmosphere(unittest.TestCase):
+
+  def test_published_values(self):
+    for altitude, temperature, pressure, density, gravity, viscosity \
+      in PUBLISHED:
+      with self.subTest(altitude=altitude):
+        atmosphere = StandardAtmosphere(altitude)
+        # Temperatures are kept in C like the constant Atmosphere
+        self.assertAlmostEqual(atmosphere.temperature, temperature - 273.15,
+          places=2)
+        self.assertAlmostEqual(atmosphere.pressure / pressure, 1, places=4)
+        self.assertAlmostEqual(atmosphere.density / density, 1, places=4)
+        self.assertAlmostEqual(atmosphere.gravity, gravity, places=4)
+        self.assertAlmostEqual(atmosphere.viscosity / viscosity, 1,
+          places=3)
+
+
+  def test_arrays_match_scalars(self):
+    altitudes = np.array([row[0] for row in PUBLISHED], dtype=np.float64)
+    atmosphere = StandardAtmosphere(0)
+    for name in ('density', 'gravity', 'pressure', 'temperature',
+      'viscosity'):
+      with self.subTest(name=name):
+        values = getattr(atmosphere, f'calc_{name}')(altitudes)
+        np.testing.assert_allclose(values,
+          [getattr(StandardAtmosphere(altitude), name)
+            for altitude in altitudes], rtol=1e-12)
+
+
+
+class TestScaledAtmosphere(unittest.TestCase):
+
+  def test_scales_density_only(self):
+    for altitude in (0, 11000, 20000):
+      with self.subTest(altitude=altitude):
+        model = StandardAtmosphere(altitude)
+        scaled = ScaledAtmosphere(altitude, model=StandardAtmosphere,
+          density_scale=1.05)
+        self.assertAlmostEqual(scaled.density / model.density, 1.05,
+          places=12)
+        for name in ('gravity', 'pressure', 'temperature', 'viscosity'):
+          self.assertEqual(getattr(scaled, name), getattr(model, name))
+        self.assertAlmostEqual(scaled.calc_density(altitude),
+          scaled.density, places=12)
+
+
+  def test_update_and_model_flags(self):
+    model = partial(ScaledAtmosphere, model=StandardAtmosphere,
+      density_scale=0.9)
+    scaled = model(0)
+    self.assertFalse(scaled.constant)
+    scaled.update(20000)
+    self.assertAlmostEqual(scaled.density,
+      StandardAtmosphere(20000).density * 0.9, places=12)
+    # The constant model stays constant, and is the default
+    constant = ScaledAtmosphere(5000, density_scale=2)
+    self.assertTrue(constant.constant)
+    self.assertEqual(constant.density, Atmosphere(5000).density * 2)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,63 @@
+import math
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.batch_simulation import BatchSimulation
+from src.progress_reporter import SilentReporter
+from src.rocket_component import HeadRocketComponent
+from src.simulation import Simulation
+
+
+# BatchSimulation.RECORDED name -> RocketLog column
+COLUMNS = {
+  'position_x': 'pos_x',
+  'position_y': 'pos_y',
+  'velocity_x': 'velocity_x',
+  'velocity_y': 'velocity_y',
+  'mass_fuel': 'mass_fuel',
+}
+
+
+class TestBatchSimulation(unittest.TestCase):
+
+  def test_matches_scalar_simulation(self):
+    # Vertical, tilted, burning out part way through and burning out within
+    # the first step
+    cases = ((math.pi / 2, 375000), (1.4, 200000), (1.2, 30000), (0.9, 1000))
+    rocket_components = []
+    for alpha, mass_fuel in cases:
+      rocket_component = HeadRocketComponent(0, alpha=alpha)
+      rocket_component.mass_fuel = mass_fuel
+      rocket_components.append(rocket_component)
+
+    batch = BatchSimulation.from_rocket_components(rocket_components,
+      time_max=60, time_step=0.5)
+    batch.run()
+
+    with tempfile.TemporaryDirectory() as directory:
+      for index, rocket_component in enumerate(rocket_components):
+        Simulation(rocket_component, time_max=60, time_step=0.5,
+          log_directory=directory, reporter=SilentReporter()).run()
+        trajectory = batch.trajectory(index)
+        log = rocket_component.rocket_log
+        np.testing.assert_array_equal(trajectory['time'], log.column('time'))
+        for name, column in COLUMNS.items():
+          with self.subTest(case=cases[index], column=column):
+            np.testing.assert_array_equal(trajectory[name],
+              log.column(column))
+
+
+  def test_parameter_lengths_must_match(self):
+    with self.assertRaises(ValueError):
+      BatchSimulation(alpha=[1.0, 1.2], mass_fuel=[1.0, 2.0, 3.0])
+
+
+  def test_unknown_parameter(self):
+    with self.assertRaises(ValueError):
+      BatchSimulation(n=2, thrust=1.0)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,147 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.progress_reporter import ProgressReporter, SilentReporter
+from src.rocket_component import HeadRocketComponent
+from src.simulation import Simulation
+
+
+class Interrupted(Exception):
+  pass
+
+
+
+class InterruptingReporter(ProgressReporter):
+  """
+  Stops the simulation by raising at a given time
+  """
+
+  def __init__(self, time: float) -> None:
+    self.time = time
+
+
+  def report(self, time: float, rocket_components: list) -> None:
+    if time >= self.time:
+      raise Interrupted(time)
+
+
+
+def read(path: str) -> bytes:
+  with open(path, 'rb') as file:
+    return file.read()
+
+
+class TestCheckpoint(unittest.TestCase):
+
+  def setUp(self):
+    directory = tempfile.TemporaryDirectory()
+    self.addCleanup(directory.cleanup)
+    self.directory = directory.name
+
+
+  def log_path(self, name: str, fmt: str = 'csv') -> str:
+    return os.path.join(self.directory, name, f'rocket_component_0.{fmt}')
+
+
+  def simulation(self, name: str, reporter: ProgressReporter = None,
+    **settings) -> Simulation:
+    """
+    :param str name: subdirectory for the log file
+    :return Simulation: tilted flight logging to CSV in small batches
+    """
+    os.makedirs(os.path.join(self.directory, name), exist_ok=True)
+    settings.setdefault('time_max', 40)
+    settings.setdefault('log_format', 'csv')
+    return Simulation(HeadRocketComponent(0, alpha=1.4), time_step=0.5,
+      log_batch_size=4,
+      log_directory=os.path.join(self.directory, name),
+      reporter=reporter or SilentReporter(), **settings)
+
+
+  def test_resume_matches_uninterrupted_run(self):
+    self.simulation('full').run()
+
+    checkpoint_path = os.path.join(self.directory, 'checkpoint.pickle')
+    simulation = self.simulation('resumed', InterruptingReporter(27.5),
+      checkpoint_path=checkpoint_path, checkpoint_interval=10)
+    with self.assertRaises(Interrupted):
+      simulation.run()
+    # Rows past the last checkpoint were written before the interruption
+    self.assertIn(b'\n0,27.5,', read(self.log_path('resumed')))
+
+    resumed = Simulation.resume(checkpoint_path, reporter=SilentReporter())
+    self.assertEqual(resumed.time, 20)
+    resumed.run()
+    self.assertEqual(read(self.log_path('resumed')),
+      read(self.log_path('full')))
+
+
+  def test_fork_writes_own_log_directory(self):
+    self.simulation('full').run()
+
+    ascent = self.simulation('ascent', time_max=20)
+    ascent.run()
+    ascent_log = read(self.log_path('ascent'))
+    snapshot = ascent.snapshot()
+
+    os.makedirs(os.path.join(self.directory, 'branch'))
+    branch = Simulation.fork(snapshot, reporter=SilentReporter(),
+      time_max=40, log_directory=os.path.join(self.directory, 'branch'))
+    branch.run()
+    # The branch's file holds the common prefix followed by its own rows
+    self.assertEqual(read(self.log_path('branch')),
+      read(self.log_path('full')))
+    self.assertEqual(read(self.log_path('ascent')), ascent_log)
+
+
+  def test_snapshot_leaves_rows_to_log_files(self):
+    for fmt in ('csv', 'jsonl', 'traj'):
+      with self.subTest(fmt=fmt):
+        simulation = self.simulation(fmt, log_format=fmt)
+        simulation.run()
+        snapshot = simulation.snapshot()
+        log = simulation.rocket_components[0].rocket_log
+        # Only the row count is kept, not the rows
+        self.assertLess(len(snapshot), len(pickle.dumps(simulation)) / 2)
+
+        restored = pickle.loads(snapshot).rocket_components[0].rocket_log
+        self.assertEqual(restored.cursor, len(log))
+        self.assertEqual(restored.events, log.events)
+        pd.testing.assert_frame_equal(restored.data, log.data)
+        if fmt == 'traj':
+          np.testing.assert_array_equal(restored.column('velocity_y'),
+            log.column('velocity_y'))
+
+
+  def test_snapshot_size_does_not_grow_with_log(self):
+    simulation = self.simulation('growth', time_max=20)
+    simulation.run()
+    early = len(simulation.snapshot())
+    simulation.time_max = 40
+    simulation.run()
+    self.assertLess(len(simulation.snapshot()), early * 1.1)
+
+
+  def test_snapshot_needs_log_file_rows(self):
+    simulation = self.simulation('truncated', time_max=20)
+    simulation.run()
+    snapshot = simulation.snapshot()
+    path = self.log_path('truncated')
+    os.truncate(path, os.path.getsize(path) // 2)
+    with self.assertRaises(ValueError):
+      pickle.loads(snapshot)
+
+
+  def test_fork_unknown_setting(self):
+    snapshot = self.simulation('ascent', time_max=1).snapshot()
+    with self.assertRaises(ValueError):
+      Simulation.fork(snapshot, time_maximum=40)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,123 @@
+import math
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.position import CartesianPosition
+from src.progress_reporter import SilentReporter
+from src.rocket_component import HeadRocketComponent
+from src.simulation import Simulation
+
+
+MASS_FUEL = 500.0
+
+
+class TestFlightSummary(unittest.TestCase):
+
+  def setUp(self):
+    self.directory = tempfile.TemporaryDirectory()
+    self.addCleanup(self.directory.cleanup)
+
+
+  def run_flight(self, integrator: str) -> HeadRocketComponent:
+    """
+    Short burn on a tilted launch, coasting to an apogee around 14 km and
+    back to the ground after about 107 s
+
+    :param str integrator: see Simulation.INTEGRATORS
+    :return HeadRocketComponent: the summarized component
+    """
+    # Own position, the default one is shared between components
+    rocket_component = HeadRocketComponent(0, alpha=1.4, summarize=True,
+      position=CartesianPosition(0, 0))
+    rocket_component.mass_fuel = MASS_FUEL
+    rocket_component.pressure_exhaust = 101325.0
+    rocket_component.drag_coefficient = 0
+    Simulation(rocket_component, time_max=150, time_step=0.5,
+      integrator=integrator, log_directory=self.directory.name,
+      reporter=SilentReporter()).run()
+    return rocket_component
+
+
+  def test_matches_log(self):
+    for integrator in ('euler', 'adaptive'):
+      with self.subTest(integrator=integrator):
+        rocket_component = self.run_flight(integrator)
+        self.check_against_log(rocket_component.flight_summary,
+          rocket_component.rocket_log, rocket_component.fuel_flow_rate)
+
+
+  def check_against_log(self, summary, log, fuel_flow_rate: float) -> None:
+    """
+    Every logged row is an observed state, so the figures are the extrema of
+    the rows or interpolated between the two rows around them
+    """
+    time = log.column('time')
+    pos_x = log.column('pos_x')
+    pos_y = log.column('pos_y')
+    speed = log.column('velocity_r')
+    q = log.column('atm_density') * speed ** 2 / 2
+    events = dict((name, row) for row, name in log.events)
+
+    # Burnout: the fuel runs out at the constant flow rate
+    self.assertAlmostEqual(summary.burnout_time, MASS_FUEL / fuel_flow_rate,
+      places=12)
+    self.assertAlmostEqual(summary.burnout_altitude,
+      np.interp(summary.burnout_time, time, pos_y), places=6)
+
+    # Impact: where pos_y crosses 0 in the step of the impact row, unless
+    # the integrator found it exactly
+    row = events['impact']
+    impact_time = time[row]
+    if pos_y[row] <= 0:
+      fraction = pos_y[row - 1] / (pos_y[row - 1] - pos_y[row])
+      impact_time = time[row - 1] + fraction * (time[row] - time[row - 1])
+    self.assertAlmostEqual(summary.impact_time, impact_time, places=9)
+    self.assertAlmostEqual(summary.impact_range,
+      abs(np.interp(impact_time, time, pos_x) - pos_x[0]), places=6)
+    flying = time <= summary.impact_time
+
+    # Apogee: at or above the highest row, within the step around it
+    highest = int(np.argmax(pos_y))
+    self.assertGreaterEqual(summary.apogee, pos_y[highest])
+    self.assertLess(summary.apogee - pos_y[highest], 1.0)
+    self.assertLessEqual(abs(summary.apogee_time - time[highest]), 0.5)
+    self.assertLessEqual(abs(summary.apogee_time - time[events['apogee']]),
+      0.5)
+
+    # Max-q and max velocity: the largest rows before the impact, or the
+    # impact itself
+    self.assertAlmostEqual(summary.max_velocity,
+      max(speed[flying].max(), summary.impact_velocity), places=9)
+    self.assertLessEqual(summary.max_velocity_time, summary.impact_time)
+    row = int(np.argmax(np.where(flying, q, -math.inf)))
+    self.assertGreaterEqual(summary.max_q, q[row])
+    if summary.max_q_time < summary.impact_time:
+      self.assertEqual(summary.max_q_time, time[row])
+      self.assertAlmostEqual(summary.max_q, q[row], places=6)
+    else:
+      self.assertEqual(summary.max_q_time, summary.impact_time)
+
+
+  def test_states_after_impact_are_ignored(self):
+    rocket_component = self.run_flight('euler')
+    summary = rocket_component.flight_summary
+    figures = summary.as_dict()
+    rocket_component.position.y = -1000.0
+    rocket_component.velocity.x *= 10
+    summary.observe(rocket_component, 200.0)
+    self.assertEqual(summary.as_dict(), figures)
+
+
+  def test_nothing_observed(self):
+    rocket_component = HeadRocketComponent(0, summarize=True,
+      position=CartesianPosition(0, 0))
+    figures = rocket_component.flight_summary.as_dict()
+    self.assertEqual(figures['apogee'], -math.inf)
+    for field in ('burnout_time', 'impact_time', 'impact_range'):
+      self.assertTrue(math.isnan(figures[field]))
+
+
+if __name__ == '__main__':
+  unittest.main()
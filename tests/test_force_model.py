@@ -0,0 +1,140 @@
+import math
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.force_model import GRAVITATIONAL_CONSTANT, MASS_EARTH, RADIUS_EARTH
+from src.position import CartesianPosition
+from src.progress_reporter import SilentReporter
+from src.rocket_component import HeadRocketComponent
+from src.simulation import Simulation
+from src.vector import Vector
+
+
+def reference_forces(rocket_component, percent_thrust: float = 1) -> dict:
+  """
+  Every force computed straight from the component's current attributes,
+  the way calc_forces did before the force models
+
+  :return dict: force attribute -> Vector
+  """
+  density = rocket_component.atmosphere.density
+  speed = rocket_component.velocity.r
+  alpha = rocket_component.alpha
+  drag = rocket_component.drag_coefficient * density * \
+    math.pi * (rocket_component.width / 2) ** 2 * speed ** 2 / 2
+  lift = rocket_component.lift_coefficient * density * \
+    rocket_component.length * rocket_component.width * speed ** 2 / 2
+  gravity = GRAVITATIONAL_CONSTANT * MASS_EARTH * \
+    rocket_component.get_total_mass() / \
+    ((RADIUS_EARTH + rocket_component.position.y) ** 2)
+  thrust = percent_thrust * rocket_component.fuel_flow_rate * \
+    rocket_component.velocity_exhaust + (rocket_component.atmosphere.pressure -
+    rocket_component.pressure_exhaust) * rocket_component.area_exhaust
+  return {
+    'thrust_force': Vector(r=thrust, theta=alpha),
+    'lift_force': Vector(r=lift, theta=math.pi / 2 + alpha),
+    'drag_force': Vector(r=drag, theta=alpha + math.pi),
+    'gravity_force': Vector(r=gravity, theta=3 * math.pi / 2),
+  }
+
+
+
+class ReferenceRocketComponent(HeadRocketComponent):
+  """
+  Computes its forces with reference_forces instead of the force models
+  """
+
+  def calc_forces(self, percent_thrust: float = 1, lap=None) -> None:
+    if self._force_pipeline is None:
+      self.build_force_pipeline(percent_thrust)
+    for attribute, force in reference_forces(self, percent_thrust).items():
+      setattr(self, attribute, force)
+
+
+
+class TestForceModels(unittest.TestCase):
+
+  def setUp(self):
+    self.directory = tempfile.TemporaryDirectory()
+    self.addCleanup(self.directory.cleanup)
+
+
+  def component(self, component_class: type = HeadRocketComponent) \
+    -> HeadRocketComponent:
+    # Own position and velocity, the defaults are shared between components
+    rocket_component = component_class(0, alpha=1.4,
+      position=CartesianPosition(0, 0), velocity=Vector(x=30, y=200))
+    rocket_component.mass_fuel = 5000
+    return rocket_component
+
+
+  def assert_forces_match_reference(self, rocket_component,
+    percent_thrust: float = 1) -> None:
+    rocket_component.calc_forces(percent_thrust)
+    for attribute, force in reference_forces(rocket_component,
+      percent_thrust).items():
+      with self.subTest(force=attribute):
+        actual = getattr(rocket_component, attribute)
+        np.testing.assert_allclose((actual.x, actual.y), (force.x, force.y),
+          rtol=1e-12, atol=1e-9)
+
+
+  def test_changing_alpha_turns_thrust(self):
+    rocket_component = self.component()
+    rocket_component.calc_forces()
+    self.assertAlmostEqual(rocket_component.thrust_force.theta, 1.4)
+    rocket_component.alpha = 0.3
+    rocket_component.calc_forces()
+    thrust_force = rocket_component.thrust_force
+    self.assertAlmostEqual(thrust_force.theta, 0.3)
+    self.assertAlmostEqual(thrust_force.y / thrust_force.x, math.tan(0.3))
+    self.assertAlmostEqual(rocket_component.drag_force.theta, 0.3 + math.pi)
+
+
+  def test_changed_parameters_change_forces(self):
+    for name, value in (('alpha', 0.3), ('fuel_flow_rate', 700),
+      ('velocity_exhaust', 12000), ('width', 2.0), ('length', 30),
+      ('drag_coefficient', 0.4), ('lift_coefficient', 0.2),
+      ('pressure_exhaust', 50000.0), ('area_exhaust', 4.0)):
+      with self.subTest(parameter=name):
+        rocket_component = self.component()
+        rocket_component.calc_forces()
+        setattr(rocket_component, name, value)
+        self.assertEqual(getattr(rocket_component, name), value)
+        self.assert_forces_match_reference(rocket_component)
+
+
+  def test_pipeline_matches_reference(self):
+    rocket_component = self.component()
+    rocket_component.lift_coefficient = 0.2
+    for altitude, velocity, mass_fuel, percent_thrust in (
+      (0, (30, 200), 5000, 1), (12000, (300, -40), 5000, 0.5),
+      (40000, (800, 900), 0, 0), (90000, (-20, 10), 0, 0)):
+      with self.subTest(altitude=altitude, mass_fuel=mass_fuel):
+        rocket_component.set_state(CartesianPosition(0, altitude),
+          Vector(x=velocity[0], y=velocity[1]), mass_fuel, percent_thrust)
+        self.assert_forces_match_reference(rocket_component, percent_thrust)
+
+
+  def test_run_matches_reference(self):
+    logs = []
+    for component_class in (HeadRocketComponent, ReferenceRocketComponent):
+      # Without lift, which Euler steps do not keep stable
+      rocket_component = self.component(component_class)
+      Simulation(rocket_component, time_max=10, time_step=0.1,
+        log_directory=self.directory.name, reporter=SilentReporter()).run()
+      logs.append(rocket_component.rocket_log)
+    log, reference = logs
+    self.assertEqual(log.events, reference.events)
+    for column in log.stored_columns:
+      if column == 'id':
+        continue
+      with self.subTest(column=column):
+        np.testing.assert_allclose(log.column(column),
+          reference.column(column), rtol=1e-9, atol=1e-9)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,83 @@
+import os
+import subprocess
+import sys
+import textwrap
+import unittest
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ('pandas', 'scipy')
+
+
+def run_python(code: str) -> str:
+  """
+  Run code in a fresh interpreter from the repo root
+
+  :param str code: source to run
+  :return str: the interpreter's stdout
+  """
+  result = subprocess.run([sys.executable, '-c', textwrap.dedent(code)],
+    cwd=ROOT, capture_output=True, text=True, timeout=120)
+  if result.returncode != 0:
+    raise AssertionError(result.stderr)
+  return result.stdout
+
+
+class TestImportTime(unittest.TestCase):
+
+  def imported_heavy_modules(self, code: str) -> str:
+    """
+    :param str code: source to run before checking sys.modules
+    :return str: printed sorted list of heavy packages imported by code
+    """
+    output = run_python(textwrap.dedent(code) +
+      'print(sorted({name.split(".")[0] for name in sys.modules} & '
+      f'set({HEAVY_MODULES!r})))\n')
+    return output.strip().splitlines()[-1]
+
+
+  def test_import_package(self):
+    self.assertEqual(self.imported_heavy_modules("""
+      import sys
+      import src
+      """), '[]')
+
+
+  def test_physics_only_run(self):
+    self.assertEqual(self.imported_heavy_modules("""
+      import contextlib
+      import io
+      import sys
+      from src.rocket_component import HeadRocketComponent
+      from src.simulation import Simulation
+
+      simulation = Simulation(HeadRocketComponent(0, keep_log=False),
+        time_max=10, time_step=1)
+      with contextlib.redirect_stdout(io.StringIO()):
+        simulation.run()
+      """), '[]')
+
+
+  def test_bare_names_share_modules(self):
+    self.assertEqual(run_python("""
+      import sys
+      import src.simulation
+      print(sys.modules['rocket_component'] is src.rocket_component and
+        src.simulation.RocketComponent is
+        src.rocket_component.RocketComponent)
+      """).strip(), 'True')
+
+
+  def test_bare_names_outside_package(self):
+    self.assertEqual(run_python("""
+      import src
+      try:
+        import scheduler
+      except ImportError:
+        print('not found')
+      """).strip(), 'not found')
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+
+from src import vector
+from src.instrumentation import Instrumentation
+from src.progress_reporter import SilentReporter
+from src.rocket_component import HeadRocketComponent
+from src.simulation import Simulation
+from src.vector import Vector
+
+
+class TestInstrumentation(unittest.TestCase):
+
+  def setUp(self):
+    self.directory = tempfile.TemporaryDirectory()
+    self.addCleanup(self.directory.cleanup)
+
+
+  def test_run_counters(self):
+    instrumentation = Instrumentation()
+    allocations = vector.allocations
+    simulation = Simulation(HeadRocketComponent(0, alpha=1.4), time_max=50,
+      time_step=1, log_directory=self.directory.name,
+      instrumentation=instrumentation, reporter=SilentReporter())
+    simulation.run()
+    counters = simulation.get_counters()
+
+    counts = counters['counts']
+    self.assertEqual(counts['steps'], 50)
+    self.assertGreaterEqual(counts['vector_allocations'], 50)
+    self.assertEqual(counts['vector_allocations'],
+      vector.allocations - allocations)
+    self.assertEqual(counts['log_bytes_written'], os.path.getsize(
+      os.path.join(self.directory.name, 'rocket_component_0.jsonl')))
+
+    # One lap per step for each force in the pipeline and each other stage
+    for stage in ('calc_thrust_force', 'calc_drag_force',
+      'calc_gravity_force', 'integration', 'atmosphere', 'log', 'output_log',
+      'report'):
+      with self.subTest(stage=stage):
+        self.assertEqual(counters['calls'][stage], 50)
+        self.assertGreaterEqual(counters['time'][stage], 0)
+    # Lift is zero for this component, so it never ran
+    self.assertNotIn('calc_lift_force', counters['calls'])
+
+
+  def test_allocation_count_stops(self):
+    instrumentation = Instrumentation()
+    instrumentation.start_allocation_count()
+    self.assertTrue(vector.count_allocations)
+    Vector(x=1, y=2) + Vector(x=3, y=4)
+    instrumentation.stop_allocation_count()
+    self.assertFalse(vector.count_allocations)
+    self.assertEqual(instrumentation.counts['vector_allocations'], 3)
+
+    allocations = vector.allocations
+    Vector(x=1, y=2) + Vector(x=3, y=4)
+    Vector(r=1, theta=0.5).copy()
+    self.assertEqual(vector.allocations, allocations)
+    # Stopping again changes nothing
+    instrumentation.stop_allocation_count()
+    self.assertEqual(instrumentation.counts['vector_allocations'], 3)
+
+
+if __name__ == '__main__':
+  unittest.main()
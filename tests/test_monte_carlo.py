@@ -0,0 +1,97 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.ensemble_statistics import EnsembleStatistics, P2Quantiles, \
+  RunningMoments
+from src.monte_carlo import monte_carlo, sample_parameters, simulate_bins
+
+
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+class TestEnsembleStatistics(unittest.TestCase):
+
+  def test_p2_matches_numpy_quantile(self):
+    rng = np.random.default_rng(0)
+    samples = {
+      'normal': rng.normal(10, 2, size=(5000, 3, 2)),
+      'exponential': rng.exponential(2, size=(5000, 3, 2)),
+    }
+    for name, sample in samples.items():
+      with self.subTest(distribution=name):
+        quantiles = P2Quantiles(sample.shape[1:], QUANTILES)
+        for value in sample:
+          quantiles.update(value)
+        # Within a few percent, or 2% of the spread near zero
+        for quantile, estimate in quantiles.estimates().items():
+          np.testing.assert_allclose(estimate,
+            np.quantile(sample, quantile, axis=0), rtol=0.03,
+            atol=0.02 * sample.std())
+
+
+  def test_p2_exact_below_five_samples(self):
+    sample = np.random.default_rng(1).normal(size=(4, 2))
+    quantiles = P2Quantiles((2,), QUANTILES)
+    for value in sample:
+      quantiles.update(value)
+    for quantile, estimate in quantiles.estimates().items():
+      np.testing.assert_array_equal(estimate,
+        np.quantile(sample, quantile, axis=0))
+
+
+  def test_running_moments(self):
+    sample = np.random.default_rng(2).normal(1e6, 3, size=(1000, 4))
+    moments = RunningMoments((4,))
+    for batch in np.array_split(sample, 7):
+      moments.update(batch)
+    np.testing.assert_allclose(moments.mean, sample.mean(axis=0), rtol=1e-12)
+    np.testing.assert_allclose(moments.std, sample.std(axis=0, ddof=1),
+      rtol=1e-9)
+
+
+  def test_failed_runs_left_out(self):
+    statistics = EnsembleStatistics([0, 1], ('pos_y',))
+    samples = np.ones((3, 2, 1))
+    samples[1, 0, 0] = np.nan
+    statistics.update(samples)
+    self.assertEqual((statistics.count, statistics.failed), (2, 1))
+
+
+
+class TestMonteCarlo(unittest.TestCase):
+
+  def test_sample_parameters(self):
+    dispersions = {'alpha': ('normal', 1.5, 0.01),
+      'mass_fuel': ('uniform', 1000, 2000)}
+    self.assertEqual(sample_parameters(3, 7, dispersions),
+      sample_parameters(3, 7, dispersions))
+    self.assertNotEqual(sample_parameters(3, 7, dispersions),
+      sample_parameters(4, 7, dispersions))
+
+
+  def test_independent_of_workers(self):
+    results = [monte_carlo(40, time_max=20, seed=5, max_workers=workers,
+      chunk_size=chunk_size).to_dataframe()
+      for workers, chunk_size in ((1, 40), (3, 7))]
+    pd.testing.assert_frame_equal(results[0], results[1], check_exact=True)
+
+
+  def test_time_max_not_reached_exactly(self):
+    # The last step time accumulates to 0.8999..., just short of 0.9
+    statistics = monte_carlo(4, time_max=0.9, time_step=0.3, bin_width=0.45,
+      max_workers=1)
+    self.assertEqual((statistics.count, statistics.failed), (4, 0))
+    samples = simulate_bins({}, statistics.times, time_max=0.9,
+      time_step=0.3)
+    self.assertTrue(np.isfinite(samples).all())
+
+
+  def test_unknown_parameter(self):
+    with self.assertRaises(ValueError):
+      monte_carlo(1, dispersions={'thrust': ('normal', 1, 1)})
+
+
+if __name__ == '__main__':
+  unittest.main()
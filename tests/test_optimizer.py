@@ -0,0 +1,93 @@
+import math
+import unittest
+
+from src.optimizer import CachingMap, evaluate, min_fuel, optimize_trajectory
+from src.sweep import SUMMARY_FIELDS, build_stack, summarize_run
+
+
+class TestOptimizer(unittest.TestCase):
+
+  def test_history(self):
+    result = optimize_trajectory({'alpha': (1.2, math.pi / 2)},
+      fixed={'mass_fuel': 20000}, time_max=20, max_workers=1, maxiter=3,
+      popsize=4, seed=0)
+    history = result['history']
+    self.assertGreaterEqual(len(history), 1)
+    self.assertEqual([entry['generation'] for entry in history],
+      list(range(1, len(history) + 1)))
+    self.assertEqual(history[-1]['value'], result['value'])
+    self.assertEqual(history[-1]['parameters'], result['parameters'])
+    for entry in history:
+      self.assertTrue(math.isfinite(entry['convergence']))
+    values = [entry['value'] for entry in history]
+    self.assertEqual(values, sorted(values, reverse=True))
+
+
+  def test_objective_needs_targets(self):
+    for objective in ('target_burnout', 'min_fuel'):
+      with self.subTest(objective=objective):
+        with self.assertRaises(ValueError):
+          optimize_trajectory({'alpha': (1.2, 1.5)}, objective=objective,
+            max_workers=1)
+
+
+  def test_unknown_parameter(self):
+    with self.assertRaises(ValueError):
+      optimize_trajectory({'mass': (1, 2)}, max_workers=1)
+
+
+  def test_caching_map(self):
+    calls = []
+
+    def function(x):
+      calls.append(x)
+      return sum(x)
+
+    workers = CachingMap(None)
+    self.assertEqual(workers(function, [(1, 2), (3, 4), (1, 2)]), [3, 7, 3])
+    self.assertEqual(workers(function, [(3, 4), (5, 6)]), [7, 11])
+    self.assertEqual(calls, [(1.0, 2.0), (3.0, 4.0), (5.0, 6.0)])
+    self.assertEqual(workers.evaluations, 3)
+    self.assertEqual(workers.cache_hits, 2)
+
+
+
+class TestStageFuelLoads(unittest.TestCase):
+
+  def test_build_stack(self):
+    head, stage_1, stage_2 = build_stack({'mass_fuel': 1000, 'alpha': 1.4,
+      'stage_1_mass_fuel': 2000, 'stage_2_mass_fuel': 3000,
+      'velocity_exhaust': 20000})
+    self.assertIs(stage_2.rocket_component, stage_1)
+    self.assertIs(stage_1.rocket_component, head)
+    self.assertEqual([rocket_component.mass_fuel
+      for rocket_component in (head, stage_1, stage_2)], [1000, 2000, 3000])
+    for rocket_component in (head, stage_1, stage_2):
+      self.assertEqual(rocket_component.alpha, 1.4)
+      self.assertEqual(rocket_component.velocity_exhaust, 20000)
+
+
+  def test_stages_in_order(self):
+    with self.assertRaises(ValueError):
+      build_stack({'stage_2_mass_fuel': 3000})
+
+
+  def test_stage_burns_first(self):
+    summary = dict(zip(SUMMARY_FIELDS, summarize_run({'mass_fuel': 1450,
+      'stage_1_mass_fuel': 14500}, time_max=20)))
+    # The head burns its own fuel for a second after the stage burns out
+    self.assertAlmostEqual(summary['burnout_time'], 11)
+    self.assertEqual(summary['final_mass_fuel'], 0)
+
+
+  def test_min_fuel_counts_stages(self):
+    parameters = {'mass_fuel': 1000, 'stage_1_mass_fuel': 3000}
+    summary = {'final_mass_fuel': 500, 'apogee': 100}
+    self.assertEqual(min_fuel(summary, parameters, target_altitude=50), 3500)
+    value = evaluate((1000.0, 3000.0), ('mass_fuel', 'stage_1_mass_fuel'),
+      'min_fuel', {'target_altitude': 1}, {}, 20)
+    self.assertEqual(value, 4000)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,60 @@
+from contextlib import redirect_stdout
+import io
+import tempfile
+import unittest
+
+from src.position import CartesianPosition
+from src.progress_reporter import (CallbackReporter, PrintReporter,
+  SilentReporter)
+from src.rocket_component import HeadRocketComponent, RocketComponentDecorator
+from src.simulation import Simulation
+
+
+class TestProgressReporter(unittest.TestCase):
+
+  def setUp(self):
+    self.directory = tempfile.TemporaryDirectory()
+    self.addCleanup(self.directory.cleanup)
+
+
+  def run_simulation(self, reporter) -> None:
+    Simulation(HeadRocketComponent(0), time_max=3, time_step=1,
+      log_directory=self.directory.name, reporter=reporter).run()
+
+
+  def test_print_format(self):
+    # One line per component, as print_rocket_components printed them
+    head = HeadRocketComponent(0, position=CartesianPosition(0, 0))
+    booster = RocketComponentDecorator(head, 1)
+    stream = io.StringIO()
+    PrintReporter(stream).report(2.5, [booster, head])
+    self.assertEqual(stream.getvalue(),
+      f'2.5: {booster.string_info()}\n2.5: {head.string_info()}\n')
+
+
+  def test_print_every_step(self):
+    states = []
+    self.run_simulation(CallbackReporter(lambda time, rocket_components:
+      states.append(f'{time}: {rocket_components[0].string_info()}\n')))
+    stream = io.StringIO()
+    self.run_simulation(PrintReporter(stream))
+    self.assertEqual(len(states), 4)
+    self.assertEqual(stream.getvalue(), ''.join(states))
+    self.assertTrue(stream.getvalue().startswith('0: 0, (0, 0), (0, 0)\n'))
+
+    # Without a stream it prints to stdout
+    stdout = io.StringIO()
+    with redirect_stdout(stdout):
+      self.run_simulation(PrintReporter())
+    self.assertEqual(stdout.getvalue(), stream.getvalue())
+
+
+  def test_silent(self):
+    stdout = io.StringIO()
+    with redirect_stdout(stdout):
+      self.run_simulation(SilentReporter())
+    self.assertEqual(stdout.getvalue(), '')
+
+
+if __name__ == '__main__':
+  unittest.main()
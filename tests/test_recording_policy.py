@@ -0,0 +1,110 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.position import CartesianPosition
+from src.progress_reporter import SilentReporter
+from src.recording_policy import AnyOf, EveryInterval, EveryNthStep, \
+  GETTERS, OnChange
+from src.rocket_component import HeadRocketComponent
+from src.rocket_log import RocketLog
+from src.simulation import Simulation
+
+
+class TestRecordingPolicy(unittest.TestCase):
+
+  def setUp(self):
+    self.directory = tempfile.TemporaryDirectory()
+    self.addCleanup(self.directory.cleanup)
+
+
+  def run_simulation(self, recording_policy=None):
+    """
+    Tilted flight burning out at 14 s and reaching its apogee at 34 s, in
+    steps of 1 s
+
+    :return RocketLog: log of the flight
+    """
+    rocket_component = HeadRocketComponent(0, alpha=1.4)
+    rocket_component.mass_fuel = 20000
+    rocket_component.pressure_exhaust = 101325.0
+    Simulation(rocket_component, time_max=50, time_step=1,
+      log_directory=self.directory.name, recording_policy=recording_policy,
+      reporter=SilentReporter()).run()
+    return rocket_component.rocket_log
+
+
+  def assert_rows(self, log, times: list) -> None:
+    """
+    The log holds exactly the rows at times, each matching the row of an
+    unfiltered run, and every event of that run
+    """
+    full = self.run_simulation()
+    np.testing.assert_array_equal(log.column('time'), times)
+    rows = np.searchsorted(full.column('time'), times)
+    for column in log.columns[1:]:
+      np.testing.assert_array_equal(log.column(column),
+        full.column(column)[rows], err_msg=column)
+    events = [(float(log.column('time')[index]), name)
+      for index, name in log.events]
+    self.assertEqual(events, [(float(full.column('time')[index]), name)
+      for index, name in full.events])
+
+
+  def test_events_of_the_flight(self):
+    log = self.run_simulation()
+    self.assertEqual([(float(log.column('time')[index]), name)
+      for index, name in log.events], [(14.0, 'burnout'), (34.0, 'apogee')])
+
+
+  def test_every_nth_step(self):
+    # Counting restarts at the forced event rows
+    self.assert_rows(self.run_simulation(EveryNthStep(10)),
+      [0, 10, 14, 24, 34, 44])
+
+
+  def test_every_interval(self):
+    self.assert_rows(self.run_simulation(EveryInterval(2.5)),
+      [0, 3, 6, 9, 12, 14, 17, 20, 23, 26, 29, 32, 34, 37, 40, 43, 46, 49])
+
+
+  def test_on_change(self):
+    log = self.run_simulation(OnChange(pos_y=5000))
+    self.assert_rows(log, [0, 4, 7, 10, 13, 14, 34])
+    # No recorded row moved less than the threshold from the previous one,
+    # unless it was forced by an event
+    forced = {index for index, _ in log.events}
+    steps = np.abs(np.diff(log.column('pos_y')))
+    for index, step in enumerate(steps, start=1):
+      if index not in forced:
+        self.assertGreaterEqual(step, 5000)
+
+
+  def test_any_of(self):
+    self.assert_rows(
+      self.run_simulation(AnyOf(EveryNthStep(10), OnChange(mass_fuel=5000))),
+      [0, 4, 8, 12, 14, 24, 34, 44])
+
+
+  def test_getters_match_logged_columns(self):
+    self.assertEqual(set(GETTERS), set(RocketLog.ATTRIBUTES) - {'id'})
+    # Own position, the default one is shared between components
+    rocket_component = HeadRocketComponent(0, alpha=1.4,
+      position=CartesianPosition(3, 7))
+    log = RocketLog()
+    log.add(rocket_component, 0.0)
+    for column, getter in GETTERS.items():
+      with self.subTest(column=column):
+        self.assertEqual(getter(rocket_component), log.column(column)[0])
+
+
+  def test_invalid_arguments(self):
+    with self.assertRaises(ValueError):
+      EveryNthStep(0)
+    with self.assertRaises(ValueError):
+      OnChange(altitude=10)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,188 @@
+from operator import attrgetter
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+from unittest import mock
+
+from src import result_cache
+from src.progress_reporter import SilentReporter
+from src.result_cache import ResultCache, code_version, fingerprint
+from src.rocket_component import HeadRocketComponent, RocketComponentDecorator
+from src.simulation import Simulation
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Builds the simulation whose key is compared across processes
+SIMULATION = """
+from src.progress_reporter import SilentReporter
+from src.recording_policy import EveryNthStep
+from src.rocket_component import HeadRocketComponent, RocketComponentDecorator
+from src.simulation import Simulation
+
+head = HeadRocketComponent(0, alpha=1.4, summarize=True)
+simulation = Simulation(RocketComponentDecorator(head, 1), time_max=20,
+  time_step=0.5, recording_policy=EveryNthStep(2), reporter=SilentReporter())
+"""
+
+
+class State:
+  """
+  Object pickled through its instance dict, as before Python 3.11 added
+  object.__getstate__
+  """
+  __getstate__ = None
+
+  def __init__(self, value) -> None:
+    self.value = value
+
+
+
+class TestFingerprint(unittest.TestCase):
+
+  def test_without_getstate(self):
+    self.assertEqual(fingerprint(State(1.5)), fingerprint(State(1.5)))
+    self.assertNotEqual(fingerprint(State(1.5)), fingerprint(State(2.5)))
+
+
+  def test_without_instance_state(self):
+    self.assertEqual(fingerprint(attrgetter('x')), fingerprint(attrgetter('x')))
+    self.assertNotEqual(fingerprint(attrgetter('x')),
+      fingerprint(attrgetter('y')))
+
+
+
+class TestResultCache(unittest.TestCase):
+
+  def setUp(self):
+    directory = tempfile.TemporaryDirectory()
+    self.addCleanup(directory.cleanup)
+    self.directory = directory.name
+    self.cache = ResultCache(os.path.join(self.directory, 'cache'))
+
+
+  def simulation(self, alpha: float = 1.4, log_format: str = 'jsonl',
+    name: str = 'logs') -> Simulation:
+    log_directory = os.path.join(self.directory, name)
+    os.makedirs(log_directory, exist_ok=True)
+    head = HeadRocketComponent(0, alpha=alpha)
+    return Simulation(RocketComponentDecorator(head, 1), time_max=20,
+      time_step=0.5, log_format=log_format, log_directory=log_directory,
+      reporter=SilentReporter(), cache=self.cache)
+
+
+  def read_logs(self, name: str, extension: str = 'jsonl') -> list:
+    contents = []
+    for id in (0, 1):
+      with open(os.path.join(self.directory, name,
+        f'rocket_component_{id}.{extension}'), 'rb') as file:
+        contents.append(file.read())
+    return contents
+
+
+  def test_key_stable_across_processes(self):
+    namespace = {}
+    exec(SIMULATION, namespace)
+    key = self.cache.key(namespace['simulation'])
+    for seed in ('0', '1'):
+      with self.subTest(seed=seed):
+        result = subprocess.run([sys.executable, '-c', SIMULATION +
+          textwrap.dedent("""
+          from src.result_cache import ResultCache
+          print(ResultCache().key(simulation))
+          """)], cwd=ROOT, capture_output=True, text=True, timeout=120,
+          env=dict(os.environ, PYTHONHASHSEED=seed))
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), key)
+
+
+  def test_key_changes_with_inputs(self):
+    key = self.cache.key(self.simulation())
+    self.assertEqual(self.cache.key(self.simulation()), key)
+    self.assertNotEqual(self.cache.key(self.simulation(alpha=1.3)), key)
+
+
+  def test_source_change_invalidates(self):
+    source = os.path.join(self.directory, 'source')
+    os.makedirs(source)
+    with open(os.path.join(source, 'module.py'), 'w') as file:
+      file.write('VALUE = 1\n')
+    version = code_version(source)
+    self.assertEqual(code_version(source), version)
+    with open(os.path.join(source, 'module.py'), 'w') as file:
+      file.write('VALUE = 2\n')
+    self.assertNotEqual(code_version(source), version)
+
+    key = self.cache.key(self.simulation())
+    with mock.patch.object(result_cache, 'code_version',
+      return_value='edited'):
+      self.assertNotEqual(self.cache.key(self.simulation()), key)
+
+
+  def test_hit_restores_state_and_log_files(self):
+    missed = self.simulation(name='miss')
+    missed.run()
+    self.assertEqual((self.cache.hits, self.cache.misses), (0, 1))
+
+    hit = self.simulation(name='hit')
+    with mock.patch.object(Simulation, 'run_euler') as run_euler:
+      hit.run()
+    run_euler.assert_not_called()
+    self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+    self.assertEqual(hit.time, missed.time)
+    head, missed_head = hit.rocket_components[0].rocket_component, \
+      missed.rocket_components[0].rocket_component
+    self.assertEqual(head.position.y, missed_head.position.y)
+    self.assertTrue(head.rocket_log.data.equals(missed_head.rocket_log.data))
+    self.assertEqual(self.read_logs('hit'), self.read_logs('miss'))
+
+    # A hit in another format writes its logs, and keeps them for the next
+    self.simulation(log_format='csv', name='csv').run()
+    self.simulation(log_format='csv', name='csv_hit').run()
+    self.assertEqual(self.read_logs('csv_hit', 'csv'),
+      self.read_logs('csv', 'csv'))
+    self.assertEqual(len(self.cache.files()[self.cache.key(
+      self.simulation())]), 5)
+
+
+  def test_lru_eviction(self):
+    keys = []
+    for index, alpha in enumerate((1.2, 1.3, 1.4)):
+      simulation = self.simulation(alpha=alpha)
+      keys.append(self.cache.key(simulation))
+      simulation.run()
+      # Stored in order, a second apart
+      os.utime(self.cache.path(keys[-1]), (1000 + index, 1000 + index))
+    self.assertEqual([key for _, _, key in self.cache.entries()], keys)
+
+    # Using the oldest entry makes the second one least recently used
+    self.simulation(alpha=1.2).run()
+    sizes = {key: size for _, size, key in self.cache.entries()}
+    self.cache.max_bytes = sizes[keys[0]] + sizes[keys[2]]
+    self.cache.evict()
+    self.assertEqual(sorted(self.cache.files()), sorted([keys[0], keys[2]]))
+    self.assertLessEqual(self.cache.size(), self.cache.max_bytes)
+    self.assertFalse(any(path.startswith(os.path.join(self.cache.directory,
+      keys[1])) for path in os.listdir(self.cache.directory)))
+
+
+  def test_invalidate(self):
+    keys = []
+    for alpha in (1.2, 1.3, 1.4):
+      simulation = self.simulation(alpha=alpha)
+      keys.append(self.cache.key(simulation))
+      simulation.run()
+    self.assertEqual(self.cache.invalidate(keys[0]), 1)
+    self.assertNotIn(keys[0], self.cache)
+    self.assertNotIn(keys[0], self.cache.files())
+    self.assertEqual(self.cache.invalidate(keys[0]), 0)
+    self.assertEqual(self.cache.invalidate(), 2)
+    self.assertEqual(len(self.cache), 0)
+    self.assertEqual(os.listdir(self.cache.directory), [])
+
+
+if __name__ == '__main__':
+  unittest.main()
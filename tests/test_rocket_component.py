@@ -0,0 +1,143 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.progress_reporter import SilentReporter
+from src.rocket_component import HeadRocketComponent, RocketComponentDecorator
+from src.simulation import Simulation
+
+
+def two_stage(head_fuel: float, booster_fuel: float) -> tuple:
+  """
+  Head on a booster, without drag and with no thrust after burnout, so the
+  stack coasts up to an apogee
+
+  :return tuple: head and booster
+  """
+  head = HeadRocketComponent(0)
+  booster = RocketComponentDecorator(head, 1)
+  for rocket_component, mass_fuel in ((head, head_fuel),
+    (booster, booster_fuel)):
+    rocket_component.mass_fuel = mass_fuel
+    rocket_component.pressure_exhaust = 101325.0
+    rocket_component.drag_coefficient = 0
+  return head, booster
+
+
+def three_stage(summarize: bool) -> list:
+  """
+  Head on a middle stage on a booster, coasting up to an apogee and back to
+  the ground like two_stage
+
+  :param bool summarize: give every component a flight summary, so carried
+  components log each step instead of following their carrier's log
+  :return list: head, middle stage and booster
+  """
+  head = HeadRocketComponent(0, summarize=summarize)
+  middle = RocketComponentDecorator(head, 1, summarize=summarize)
+  booster = RocketComponentDecorator(middle, 2, summarize=summarize)
+  for rocket_component, mass_fuel in ((head, 500), (middle, 500),
+    (booster, 3000)):
+    rocket_component.mass_fuel = mass_fuel
+    rocket_component.pressure_exhaust = 101325.0
+    rocket_component.drag_coefficient = 0
+  return [head, middle, booster]
+
+
+class TestRocketComponentDecorator(unittest.TestCase):
+
+  def setUp(self):
+    self.directory = tempfile.TemporaryDirectory()
+    self.addCleanup(self.directory.cleanup)
+
+
+  def run_simulation(self, rocket_component, time_max: float,
+    time_step: float) -> None:
+    Simulation(rocket_component, time_max=time_max, time_step=time_step,
+      log_directory=self.directory.name, reporter=SilentReporter()).run()
+
+
+  def test_positional_arguments(self):
+    head = HeadRocketComponent(0)
+    booster = RocketComponentDecorator(head)
+    self.assertEqual(booster.id, 0)
+    self.assertIs(booster.rocket_component, head)
+    booster = RocketComponentDecorator(HeadRocketComponent(1), 4, 1.2)
+    self.assertEqual(booster.id, 4)
+    self.assertEqual(booster.alpha, 1.2)
+
+
+  def test_carried_component_logs_every_step(self):
+    head, booster = two_stage(5000, 60000)
+    self.run_simulation(booster, time_max=60, time_step=1)
+    np.testing.assert_array_equal(head.rocket_log.column('time'),
+      booster.rocket_log.column('time'))
+    # While the booster burns, the head rides along
+    np.testing.assert_array_equal(head.rocket_log.column('pos_y')[:40],
+      booster.rocket_log.column('pos_y')[:40])
+
+
+  def test_events_fire_once(self):
+    for time_step in (0.5, 1, 2):
+      with self.subTest(time_step=time_step):
+        head, booster = two_stage(5000, 5000)
+        self.run_simulation(booster, time_max=400, time_step=time_step)
+        for rocket_component in (head, booster):
+          events = [name for _, name in rocket_component.rocket_log.events]
+          self.assertEqual(events, ['burnout', 'apogee'])
+
+
+  def test_carried_logs_match_logging_every_step(self):
+    for integrator in ('euler', 'scheduled'):
+      with self.subTest(integrator=integrator):
+        runs = []
+        for summarize in (True, False):
+          directory = os.path.join(self.directory.name,
+            f'{integrator}_{summarize}')
+          os.mkdir(directory)
+          rocket_components = three_stage(summarize)
+          simulation = Simulation(rocket_components[-1], time_max=300,
+            time_step=0.5, integrator=integrator, log_directory=directory,
+            log_batch_size=7, reporter=SilentReporter())
+          if integrator == 'scheduled':
+            simulation.schedule_separation(2.5, rocket_components[2])
+            simulation.schedule_separation(5, rocket_components[1])
+          simulation.run()
+          runs.append((directory, rocket_components))
+
+        (every_step, logged), (following, followed) = runs
+        for expected, actual in zip(logged, followed):
+          expected_log, actual_log = expected.rocket_log, actual.rocket_log
+          self.assertEqual(actual_log.events, expected_log.events)
+          self.assertIn('apogee', [name for _, name in actual_log.events])
+          self.assertEqual(list(actual_log.column('id')),
+            list(expected_log.column('id')))
+          for column in actual_log.columns[1:]:
+            np.testing.assert_array_equal(actual_log.column(column),
+              expected_log.column(column), err_msg=column)
+          name = f'rocket_component_{actual.id}.jsonl'
+          with open(os.path.join(every_step, name)) as expected_file, \
+            open(os.path.join(following, name)) as actual_file:
+            self.assertEqual(actual_file.read(), expected_file.read())
+
+
+  def test_carried_log_copies_rows_when_read(self):
+    head, booster = two_stage(5000, 60000)
+    booster.log(0)
+    head.log(0)
+    for time in range(1, 21):
+      booster.update(time, 1)
+    # Only the initial row was added to the head's log, the carried rows are
+    # copied from the booster's log when they are read
+    self.assertIs(head.rocket_log.source, booster.rocket_log)
+    self.assertEqual(head.rocket_log._size, 1)
+    self.assertEqual(len(head.rocket_log), len(booster.rocket_log))
+    np.testing.assert_array_equal(head.rocket_log.column('mass_fuel'),
+      np.full(21, 5000.0))
+    self.assertEqual(set(head.rocket_log.column('id')), {0})
+
+
+if __name__ == '__main__':
+  unittest.main()
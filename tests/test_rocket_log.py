@@ -0,0 +1,110 @@
+import unittest
+
+import numpy as np
+
+from src.position import CartesianPosition
+from src.rocket_component import HeadRocketComponent
+from src.rocket_log import RocketLog
+from src.vector import Vector
+
+
+class TestRocketLog(unittest.TestCase):
+
+  def fill(self, log: RocketLog, count: int) -> list:
+    """
+    Add count rows of a component whose position changes every row
+
+    :return list: row indices returned by add
+    """
+    # Own position, the default one is shared between components
+    rocket_component = HeadRocketComponent(0, position=CartesianPosition(0, 0))
+    indices = []
+    for row in range(count):
+      rocket_component.position.x = row * 1.5
+      rocket_component.position.y = row * 0.25
+      rocket_component.mass_fuel = 1000.0 - row
+      indices.append(log.add(rocket_component, row * 0.1))
+    return indices
+
+
+  def test_add_returns_row_index(self):
+    log = RocketLog(capacity=4)
+    self.assertEqual(self.fill(log, 10), list(range(10)))
+    self.assertEqual(log.size, 10)
+
+
+  def test_growth_past_capacity(self):
+    log = RocketLog(capacity=2)
+    self.fill(log, 37)
+    self.assertGreaterEqual(log._capacity, 37)
+    np.testing.assert_array_equal(log.column('time'),
+      np.arange(37) * 0.1)
+    np.testing.assert_array_equal(log.column('pos_x'), np.arange(37) * 1.5)
+    np.testing.assert_array_equal(log.column('mass_fuel'),
+      1000.0 - np.arange(37))
+
+
+  def test_data_matches_rows(self):
+    log = RocketLog(capacity=2)
+    self.fill(log, 9)
+    data = log.data
+    self.assertEqual(list(data.columns), log.columns)
+    self.assertEqual(len(data), 9)
+    self.assertEqual(list(data['id']), [0] * 9)
+    for column in log.columns[1:]:
+      np.testing.assert_allclose(data[column].to_numpy(dtype=float),
+        log.column(column), atol=5e-4)
+    # Rows added later show up in a fresh frame
+    self.fill(log, 1)
+    self.assertEqual(len(log.data), 10)
+
+
+  def test_presets(self):
+    for preset, columns in RocketLog.PRESETS.items():
+      with self.subTest(preset=preset):
+        log = RocketLog(columns=preset)
+        self.assertEqual(log.columns, columns)
+        self.fill(log, 3)
+        # Placeholder columns are filled in, not stored
+        self.assertEqual(set(log.stored_columns),
+          set(columns) - set(RocketLog.PLACEHOLDER_COLUMNS))
+        self.assertEqual(list(log.data.columns), columns)
+
+
+  def test_selected_columns(self):
+    log = RocketLog(columns=['pos_y', 'velocity_r'])
+    # id and time are always logged, in COLUMNS order
+    self.assertEqual(log.columns, ['id', 'time', 'pos_y', 'velocity_r'])
+    self.fill(log, 4)
+    np.testing.assert_array_equal(log.column('pos_y'), np.arange(4) * 0.25)
+    with self.assertRaises(KeyError):
+      log.column('pos_x')
+    with self.assertRaises(ValueError):
+      log.select_columns('full')
+    with self.assertRaises(ValueError):
+      RocketLog(columns='everything')
+    with self.assertRaises(ValueError):
+      RocketLog(columns=['pos_w'])
+
+
+  def test_derived_columns(self):
+    full = RocketLog()
+    log = RocketLog(columns='kinematics')
+    # Own position and velocity, the defaults are shared between components
+    rocket_component = HeadRocketComponent(0, position=CartesianPosition(0, 0),
+      velocity=Vector(x=0, y=0))
+    for row in range(5):
+      rocket_component.velocity = Vector(x=3.0 - row, y=row * 2.0)
+      full.add(rocket_component, row * 0.1)
+      log.add(rocket_component, row * 0.1)
+    for column in ('velocity_r', 'velocity_theta', 'pos_z', 'velocity_z'):
+      with self.subTest(column=column):
+        self.assertNotIn(column, log.stored_columns)
+        np.testing.assert_allclose(log.column(column), full.column(column),
+          rtol=1e-12, atol=1e-15)
+    np.testing.assert_allclose(log.state_at(0.25, ['velocity_r'])['velocity_r'],
+      full.state_at(0.25, ['velocity_r'])['velocity_r'], rtol=1e-12)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,195 @@
+import csv
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+import numpy as np
+
+from src.progress_reporter import SilentReporter
+from src.position import CartesianPosition
+from src.rocket_component import HeadRocketComponent
+from src.rocket_log import RocketLog
+from src.rocket_log_writer import BackgroundRocketLogWriter, \
+  JsonLinesRocketLogWriter
+from src.simulation import Simulation
+
+
+def run_logged(directory: str, **options) -> HeadRocketComponent:
+  """
+  Run a short tilted flight streaming its log into directory
+
+  :param str directory: log directory
+  :param options: further Simulation arguments
+  :return HeadRocketComponent: the simulated component
+  """
+  rocket_component = HeadRocketComponent(0, alpha=1.4)
+  Simulation(rocket_component, time_max=40, time_step=0.25,
+    log_directory=directory, log_batch_size=16, reporter=SilentReporter(),
+    **options).run()
+  return rocket_component
+
+
+def read_jsonl(path: str) -> list:
+  with open(path, encoding='utf-8') as file:
+    return [json.loads(line) for line in file]
+
+
+class SlowRocketLogWriter(JsonLinesRocketLogWriter):
+  """
+  Waits for `gate` before writing each batch, like a stalled disk
+  """
+
+  def __init__(self, *args, **kwargs) -> None:
+    super().__init__(*args, **kwargs)
+    self.started = threading.Event()
+    self.gate = threading.Event()
+
+
+  def write_columns(self, values: list, keep=()) -> None:
+    self.started.set()
+    self.gate.wait(10)
+    super().write_columns(values, keep)
+
+
+
+class TestRocketLogWriters(unittest.TestCase):
+
+  def setUp(self):
+    self.directory = tempfile.TemporaryDirectory()
+    self.addCleanup(self.directory.cleanup)
+
+
+  def path(self, fmt: str) -> str:
+    return os.path.join(self.directory.name, f'rocket_component_0.{fmt}')
+
+
+  def assert_matches_data(self, rows: list, log) -> None:
+    """
+    :param list rows: dicts of column -> value read back from a file
+    :param RocketLog log: log the file was written from
+    """
+    data = log.data
+    self.assertEqual(len(rows), len(data))
+    self.assertEqual(list(rows[0]), list(data.columns))
+    for column in data.columns:
+      with self.subTest(column=column):
+        np.testing.assert_array_equal(
+          np.array([row[column] for row in rows], dtype=np.float64),
+          data[column].to_numpy(dtype=np.float64))
+
+
+  def test_jsonl_round_trip(self):
+    log = run_logged(self.directory.name, log_format='jsonl').rocket_log
+    self.assert_matches_data(read_jsonl(self.path('jsonl')), log)
+
+
+  def test_csv_round_trip(self):
+    log = run_logged(self.directory.name, log_format='csv').rocket_log
+    with open(self.path('csv'), newline='', encoding='utf-8') as file:
+      rows = [{column: float(value) for column, value in row.items()}
+        for row in csv.DictReader(file)]
+    self.assert_matches_data(rows, log)
+
+
+  def test_open_and_close_output(self):
+    # Own position, the default one is shared between components
+    rocket_component = HeadRocketComponent(0, position=CartesianPosition(0, 0))
+    log = RocketLog()
+    log.add(rocket_component, 0.0)
+    path = self.path('jsonl')
+    writer = log.open_output(path, 'jsonl', batch_size=3)
+    self.assertIs(log.writer, writer)
+    for row in range(1, 5):
+      rocket_component.position.y = float(row)
+      log.add(rocket_component, row * 0.5)
+      log.output()
+    # The first three rows reached the batch size, the fourth is pending
+    self.assertEqual(log.cursor, 3)
+    log.close_output()
+    self.assertIsNone(log.writer)
+    self.assertEqual(log.cursor, 5)
+    self.assertEqual(log.output_path, path)
+    self.assertEqual(log.output_offset, os.path.getsize(path))
+    self.assertEqual(log.bytes_written, os.path.getsize(path))
+    self.assert_matches_data(read_jsonl(path), log)
+    # Closing twice is harmless, reopening the same file continues it
+    log.close_output()
+    log.open_output(path, 'jsonl')
+    rocket_component.position.y = 5.0
+    log.add(rocket_component, 2.5)
+    log.close_output()
+    self.assert_matches_data(read_jsonl(path), log)
+
+
+  def test_background_round_trip(self):
+    log = run_logged(self.directory.name, log_format='jsonl',
+      log_background=True, log_queue_size=2).rocket_log
+    self.assert_matches_data(read_jsonl(self.path('jsonl')), log)
+
+
+  def slow_background_writer(self, backpressure: str):
+    sink = SlowRocketLogWriter(self.path('jsonl'), ['time', 'value'],
+      batch_size=1)
+    writer = BackgroundRocketLogWriter(sink, queue_size=1,
+      backpressure=backpressure, decimation=4)
+    self.addCleanup(writer.close)
+    self.addCleanup(sink.gate.set)
+    return sink, writer
+
+
+  @staticmethod
+  def batch(start: int, count: int = 8) -> list:
+    time_values = np.arange(start, start + count, dtype=np.float64)
+    return [time_values, time_values * 2]
+
+
+  def test_drop_never_blocks(self):
+    sink, writer = self.slow_background_writer('drop')
+    # The thread holds the first batch, the second fills the queue
+    writer.write_columns(self.batch(0))
+    self.assertTrue(sink.started.wait(10))
+    writer.write_columns(self.batch(8))
+    start = time.monotonic()
+    for batch in range(2, 12):
+      writer.write_columns(self.batch(batch * 8), keep=[5])
+    self.assertLess(time.monotonic() - start, 1.0)
+    # Every held back batch kept rows 0 and 4, and row 5 from keep
+    self.assertEqual(writer.rows_dropped, 10 * 5)
+    sink.gate.set()
+    writer.close()
+    rows = read_jsonl(self.path('jsonl'))
+    self.assertEqual(len(rows), 12 * 8 - writer.rows_dropped)
+    times = [row['time'] for row in rows]
+    self.assertEqual(times, sorted(times))
+    expected = list(range(16)) + [batch * 8 + row
+      for batch in range(2, 12) for row in (0, 4, 5)]
+    self.assertEqual(times, expected)
+
+
+  def test_block_waits_for_room(self):
+    sink, writer = self.slow_background_writer('block')
+    writer.write_columns(self.batch(0))
+    self.assertTrue(sink.started.wait(10))
+    writer.write_columns(self.batch(8))
+    returned = threading.Event()
+
+    def write():
+      writer.write_columns(self.batch(16))
+      returned.set()
+
+    thread = threading.Thread(target=write, daemon=True)
+    thread.start()
+    self.assertFalse(returned.wait(0.2))
+    sink.gate.set()
+    self.assertTrue(returned.wait(10))
+    thread.join()
+    writer.close()
+    self.assertEqual(writer.rows_dropped, 0)
+    self.assertEqual(len(read_jsonl(self.path('jsonl'))), 24)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,60 @@
+import tempfile
+import unittest
+
+from src.progress_reporter import SilentReporter
+from src.rocket_component import HeadRocketComponent
+from src.scheduler import Scheduler
+from src.simulation import Simulation
+from src.vector import Vector
+
+
+class TestScheduler(unittest.TestCase):
+
+  def setUp(self):
+    self.directory = tempfile.TemporaryDirectory()
+    self.addCleanup(self.directory.cleanup)
+
+
+  def test_time_to_burnout(self):
+    rocket_component = HeadRocketComponent(0)
+    scheduler = Scheduler(Simulation(rocket_component, time_max=1,
+      reporter=SilentReporter()))
+    for mass_fuel, fuel_flow_rate in ((375000, 1450), (1, 3), (0.1, 0.7)):
+      with self.subTest(mass_fuel=mass_fuel, fuel_flow_rate=fuel_flow_rate):
+        rocket_component.mass_fuel = mass_fuel
+        rocket_component.fuel_flow_rate = fuel_flow_rate
+        step = scheduler.time_to_burnout(rocket_component)
+        self.assertLessEqual(mass_fuel - fuel_flow_rate * step, 0)
+        self.assertAlmostEqual(step, mass_fuel / fuel_flow_rate, places=12)
+    rocket_component.mass_fuel = 0
+    self.assertEqual(scheduler.time_to_burnout(rocket_component),
+      float('inf'))
+
+
+  def test_flight_summary_sees_accepted_impact(self):
+    for time_step in (1, 3):
+      with self.subTest(time_step=time_step):
+        rocket_component = HeadRocketComponent(0, summarize=True,
+          velocity=Vector(x=10, y=100))
+        rocket_component.mass_fuel = 0
+        rocket_component.drag_coefficient = 0
+        rocket_component.pressure_exhaust = 101325.0
+        simulation = Simulation(rocket_component, time_max=100,
+          time_step=time_step, integrator='scheduled',
+          log_directory=self.directory.name, reporter=SilentReporter())
+        simulation.run()
+
+        impact_time = dict((name, time)
+          for _, name, time in simulation.events)['impact']
+        flight_summary = rocket_component.flight_summary
+        self.assertEqual(flight_summary.impact_time, impact_time)
+        self.assertEqual(flight_summary.impact_range,
+          rocket_component.position.x)
+        self.assertEqual(flight_summary.impact_velocity,
+          rocket_component.velocity.r)
+        self.assertEqual(rocket_component.rocket_log.column('time')[-1],
+          impact_time)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+
+from src.rocket_component import HeadRocketComponent, RocketComponentDecorator
+from src.stage_table import StageTable
+
+
+class TestStageTable(unittest.TestCase):
+
+  def test_cumulative_mass(self):
+    table = StageTable()
+    bottom = table.add_stage(None, 100.0, 10.0)
+    middle = table.add_stage(None, 50.0, 5.0)
+    top = table.add_stage(None, 20.0, 2.0)
+    table.attach(bottom, middle)
+    table.attach(middle, top)
+    self.assertEqual(list(table.mass_cumulative), [187.0, 77.0, 22.0])
+    self.assertEqual(table.root(top), bottom)
+
+    table.set_mass_fuel(top, 0.0)
+    self.assertEqual(list(table.mass_cumulative), [167.0, 57.0, 2.0])
+    table.set_mass_structure(bottom, 0.0)
+    self.assertEqual(list(table.mass_cumulative), [157.0, 57.0, 2.0])
+
+    table.detach(middle)
+    self.assertEqual(list(table.mass_cumulative), [100.0, 57.0, 2.0])
+    self.assertEqual(table.root(top), middle)
+
+
+  def test_attach_twice(self):
+    table = StageTable()
+    bottom = table.add_stage(None)
+    top = table.add_stage(None)
+    table.attach(bottom, top)
+    with self.assertRaises(ValueError):
+      table.attach(table.add_stage(None), top)
+
+
+
+class TestStageMassPropagation(unittest.TestCase):
+
+  def setUp(self):
+    self.head = HeadRocketComponent(0)
+    self.head.mass_fuel = 1000
+    self.head.mass_structure = 100
+    self.middle = RocketComponentDecorator(self.head, 1)
+    self.middle.mass_fuel = 5000
+    self.middle.mass_structure = 500
+    self.booster = RocketComponentDecorator(self.middle, 2)
+    self.booster.mass_fuel = 20000
+    self.booster.mass_structure = 2000
+
+
+  def test_merged_into_one_table(self):
+    table = self.booster.stage_table
+    for rocket_component in (self.head, self.middle):
+      self.assertIs(rocket_component.stage_table, table)
+    self.assertEqual(len(table), 3)
+    self.assertEqual(table.root(self.head.stage_index),
+      self.booster.stage_index)
+
+
+  def test_total_mass(self):
+    self.assertEqual(self.head.get_total_mass(), 1100)
+    self.assertEqual(self.middle.get_total_mass(), 6600)
+    self.assertEqual(self.booster.get_total_mass(), 28600)
+
+
+  def test_carried_mass_change(self):
+    self.head.mass_fuel = 400
+    self.assertEqual(self.middle.get_total_mass(), 6000)
+    self.assertEqual(self.booster.get_total_mass(), 28000)
+    self.middle.mass_structure = 600
+    self.assertEqual(self.head.get_total_mass(), 500)
+    self.assertEqual(self.booster.get_total_mass(), 28100)
+
+
+  def test_decouple(self):
+    middle = self.booster.decouple_rocket_component()
+    self.assertIs(middle, self.middle)
+    self.assertEqual(self.booster.get_total_mass(), 22000)
+    self.assertEqual(self.middle.get_total_mass(), 6600)
+    # The separated stack no longer adds to the booster
+    self.head.mass_fuel = 0
+    self.assertEqual(self.middle.get_total_mass(), 5600)
+    self.assertEqual(self.booster.get_total_mass(), 22000)
+
+
+  def test_replace_rocket_component(self):
+    other = HeadRocketComponent(3)
+    other.mass_fuel = 10
+    other.mass_structure = 1
+    self.booster.set_rocket_component(other)
+    self.assertEqual(self.booster.get_total_mass(), 22011)
+    self.assertEqual(self.middle.get_total_mass(), 6600)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from src import sweep as sweep_module
+from src.sweep import SUMMARY_FIELDS, expand_grid, summarize_run, sweep
+
+
+class TestSweep(unittest.TestCase):
+
+  def test_grid_matches_in_process_runs(self):
+    grid = {'mass_fuel': [500, 1500], 'alpha': [1.2, 1.5]}
+    results = sweep(grid, time_max=30, max_workers=2)
+    runs = expand_grid(grid)
+    self.assertEqual(len(results), len(runs))
+    self.assertEqual(list(results.columns),
+      list(grid) + list(SUMMARY_FIELDS))
+    for index, parameters in enumerate(runs):
+      with self.subTest(parameters=parameters):
+        row = results.iloc[index]
+        self.assertEqual({name: row[name] for name in grid}, parameters)
+        np.testing.assert_array_equal(
+          row[list(SUMMARY_FIELDS)].to_numpy(dtype=np.float64),
+          summarize_run(parameters, time_max=30))
+
+
+  def test_shared_memory_unlinked_when_a_worker_raises(self):
+    created = []
+    SharedMemory = sweep_module.shared_memory.SharedMemory
+
+    def track(*args, **kwargs):
+      memory = SharedMemory(*args, **kwargs)
+      if kwargs.get('create'):
+        created.append(memory.name)
+      return memory
+
+    runs = [{'mass_fuel': 500}, {'mass_fuel': 500, 'unknown': 1}]
+    with mock.patch.object(sweep_module.shared_memory, 'SharedMemory',
+      side_effect=track):
+      with self.assertRaises(ValueError):
+        sweep(runs, time_max=5, max_workers=2)
+    self.assertEqual(len(created), 1)
+    with self.assertRaises(FileNotFoundError):
+      SharedMemory(name=created[0])
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,123 @@
+import math
+import unittest
+
+import numpy as np
+
+from src.position import CartesianPosition
+from src.rocket_component import HeadRocketComponent
+from src.rocket_log import RocketLog
+from src.vector import Vector
+
+
+TIMES = [0.0, 1.0, 2.0, 4.0]
+POS_Y = [0.0, 10.0, 30.0, 70.0]
+# Flying to the left, turning through the negative x axis
+VELOCITIES = [(-1.0, 0.2), (-1.0, 0.1), (-1.0, -0.1), (-1.0, -0.2)]
+
+
+def logged() -> RocketLog:
+  """
+  :return RocketLog: rows at TIMES, with pos_x twice the time
+  """
+  # Own position, the default one is shared between components
+  rocket_component = HeadRocketComponent(7, position=CartesianPosition(0, 0))
+  log = RocketLog()
+  for time, pos_y, (velocity_x, velocity_y) in zip(TIMES, POS_Y, VELOCITIES):
+    rocket_component.position.x = 2 * time
+    rocket_component.position.y = pos_y
+    rocket_component.velocity = Vector(x=velocity_x, y=velocity_y)
+    log.add(rocket_component, time)
+  return log
+
+
+class TestStateAt(unittest.TestCase):
+
+  def setUp(self):
+    self.log = logged()
+
+
+  def test_exact_hits_return_logged_rows(self):
+    state = self.log.state_at(TIMES)
+    np.testing.assert_array_equal(state['time'], TIMES)
+    for column in ('pos_x', 'pos_y', 'velocity_x', 'velocity_theta',
+      'mass_fuel'):
+      with self.subTest(column=column):
+        np.testing.assert_array_equal(state[column], self.log.column(column))
+    self.assertEqual(list(state['id']), [7] * 4)
+
+
+  def test_interpolates_between_rows(self):
+    state = self.log.state_at([0.5, 1.25, 3.0], ['pos_x', 'pos_y'])
+    self.assertEqual(set(state), {'time', 'pos_x', 'pos_y'})
+    np.testing.assert_allclose(state['pos_x'], [1.0, 2.5, 6.0])
+    np.testing.assert_allclose(state['pos_y'], [5.0, 15.0, 50.0])
+
+
+  def test_scalar_and_shaped_times(self):
+    self.assertEqual(self.log.state_at(1.5, ['pos_y'])['pos_y'].shape, ())
+    self.assertAlmostEqual(float(self.log.state_at(1.5)['pos_y']), 20.0)
+    state = self.log.state_at([[0.5, 1.5], [2.5, 3.5]], ['pos_y'])
+    self.assertEqual(state['pos_y'].shape, (2, 2))
+    np.testing.assert_allclose(state['pos_y'], [[5.0, 20.0], [40.0, 60.0]])
+
+
+  def test_angles_interpolate_the_short_way(self):
+    theta = float(self.log.state_at(1.5, ['velocity_theta'])['velocity_theta'])
+    # Halfway between just above and just below pi, not through zero
+    self.assertAlmostEqual(abs(theta), math.pi)
+
+
+  def test_id_steps(self):
+    self.assertEqual(self.log.state_at(0.5, ['id'])['id'], 7)
+
+
+  def test_out_of_range_is_nan(self):
+    state = self.log.state_at([-0.5, 0.0, 4.0, 4.5], ['pos_y', 'velocity_r'])
+    np.testing.assert_array_equal(np.isnan(state['pos_y']),
+      [True, False, False, True])
+    np.testing.assert_array_equal(np.isnan(state['velocity_r']),
+      [True, False, False, True])
+
+
+  def test_empty_log_is_nan(self):
+    state = RocketLog().state_at([0.0, 1.0], ['pos_y'])
+    self.assertTrue(np.isnan(state['pos_y']).all())
+
+
+
+class TestResample(unittest.TestCase):
+
+  def setUp(self):
+    self.log = logged()
+
+
+  def test_grid_covers_the_log(self):
+    samples = self.log.resample(0.5, columns=['pos_y'])
+    np.testing.assert_allclose(samples['time'], np.arange(9) * 0.5)
+    np.testing.assert_allclose(samples['pos_y'],
+      [0, 5, 10, 20, 30, 40, 50, 60, 70])
+
+
+  def test_start_and_stop(self):
+    samples = self.log.resample(1.5, start=0.5, stop=3.5, columns=['pos_x'])
+    np.testing.assert_allclose(samples['time'], [0.5, 2.0, 3.5])
+    np.testing.assert_allclose(samples['pos_x'], [1.0, 4.0, 7.0])
+    # Samples past the log are NaN
+    samples = self.log.resample(1.0, start=3.0, stop=5.0, columns=['pos_x'])
+    np.testing.assert_array_equal(np.isnan(samples['pos_x']),
+      [False, False, True])
+
+
+  def test_stop_before_start_is_empty(self):
+    samples = self.log.resample(1.0, start=3.0, stop=2.0, columns=['pos_x'])
+    self.assertEqual(len(samples['time']), 0)
+    self.assertEqual(len(RocketLog().resample(1.0)['time']), 0)
+
+
+  def test_interval_must_be_positive(self):
+    with self.assertRaises(ValueError):
+      self.log.resample(0)
+
+
+if __name__ == '__main__':
+  unittest.main()
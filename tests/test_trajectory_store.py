@@ -0,0 +1,125 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.position import CartesianPosition
+from src.progress_reporter import SilentReporter
+from src.rocket_component import HeadRocketComponent
+from src.rocket_log import RocketLog
+from src.simulation import Simulation
+from src.trajectory_store import TrajectoryReader
+
+
+class TestTrajectoryReader(unittest.TestCase):
+
+  def setUp(self):
+    self.directory = tempfile.TemporaryDirectory()
+    self.addCleanup(self.directory.cleanup)
+    self.path = os.path.join(self.directory.name, 'rocket_component_0.traj')
+
+
+  def run_logged(self, **options) -> RocketLog:
+    """
+    Run a short tilted flight streaming a binary log
+
+    :param options: further Simulation arguments
+    :return RocketLog: log of the simulated component
+    """
+    rocket_component = HeadRocketComponent(0, alpha=1.4)
+    Simulation(rocket_component, time_max=40, time_step=0.25,
+      log_directory=self.directory.name, log_format='traj',
+      log_batch_size=16, reporter=SilentReporter(), **options).run()
+    return rocket_component.rocket_log
+
+
+  def open_reader(self) -> TrajectoryReader:
+    reader = TrajectoryReader(self.path)
+    self.addCleanup(reader.close)
+    return reader
+
+
+  def test_round_trip(self):
+    log = self.run_logged()
+    reader = self.open_reader()
+    self.assertEqual(reader.columns, log.columns)
+    self.assertEqual(len(reader), len(log))
+    # Binary records are not rounded
+    for column in log.columns:
+      with self.subTest(column=column):
+        np.testing.assert_array_equal(
+          np.asarray(reader.column(column), dtype=np.float64),
+          log.column(column).astype(np.float64))
+
+
+  def test_time_range(self):
+    log = self.run_logged()
+    reader = self.open_reader()
+    records = reader.time_range(10, 12.5, ['time', 'pos_y'])
+    self.assertEqual(records.dtype.names, ('time', 'pos_y'))
+    np.testing.assert_array_equal(records['time'],
+      np.arange(10, 12.75, 0.25))
+    times = log.column('time')
+    np.testing.assert_array_equal(records['pos_y'],
+      log.column('pos_y')[(times >= 10) & (times <= 12.5)])
+    self.assertEqual(len(reader.time_range()), len(log))
+    self.assertEqual(len(reader.time_range(start=39.5)), 3)
+    self.assertEqual(len(reader.time_range(stop=-1)), 0)
+
+    frame = reader.to_dataframe(5, 6, ['time', 'velocity_y'])
+    self.assertEqual(list(frame.columns), ['time', 'velocity_y'])
+    np.testing.assert_array_equal(frame['time'], [5, 5.25, 5.5, 5.75, 6])
+
+
+  def test_derived_columns(self):
+    full = self.run_logged()
+    full_size = os.path.getsize(self.path)
+    log = self.run_logged(log_columns='kinematics')
+    self.assertLess(os.path.getsize(self.path), full_size / 3)
+    reader = self.open_reader()
+    self.assertEqual(reader.columns, RocketLog.KINEMATICS)
+    self.assertEqual(reader.stored_columns, tuple(RocketLog.KINEMATICS))
+    for column in ('pos_x', 'pos_y', 'velocity_x', 'velocity_y'):
+      with self.subTest(column=column):
+        np.testing.assert_array_equal(reader.column(column),
+          full.column(column))
+
+    # Magnitudes and angles are computed from the stored x and y
+    np.testing.assert_allclose(reader.column('velocity_r'),
+      full.column('velocity_r'), rtol=1e-12)
+    np.testing.assert_allclose(log.column('velocity_theta'),
+      full.column('velocity_theta'), rtol=1e-12)
+    np.testing.assert_array_equal(reader.column('pos_z'), 0)
+    np.testing.assert_allclose(
+      reader.state_at([10.1, 20.7], ['velocity_r'])['velocity_r'],
+      full.state_at([10.1, 20.7], ['velocity_r'])['velocity_r'], rtol=1e-12)
+    self.assertTrue(np.isnan(reader.state_at(100.0, ['pos_y'])['pos_y']))
+    with self.assertRaises(KeyError):
+      reader.column('drag_force_r')
+
+
+  def test_refresh_picks_up_appended_records(self):
+    rocket_component = HeadRocketComponent(0,
+      position=CartesianPosition(0, 0))
+    log = RocketLog(columns='kinematics')
+    log.open_output(self.path, 'traj', batch_size=4)
+    self.addCleanup(log.close_output)
+    for row in range(10):
+      log.add(rocket_component, float(row))
+      log.output()
+    log.writer.flush()
+
+    reader = self.open_reader()
+    self.assertEqual(len(reader), 8)
+    for row in range(10, 12):
+      log.add(rocket_component, float(row))
+      log.output()
+    log.writer.flush()
+    self.assertEqual(len(reader), 8)
+    reader.refresh()
+    np.testing.assert_array_equal(reader.column('time'), np.arange(12.0))
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,106 @@
+import math
+import pickle
+import unittest
+
+from src.vector import Vector
+
+
+class EagerVector:
+  """
+  Vector as it was before the polar form became lazy: both forms computed on
+  creation, arithmetic spelled out on the components
+  """
+
+  def __init__(self, *, x=None, y=None, r=None, theta=None):
+    if x is not None:
+      self.x, self.y = x, y
+      self.r = math.sqrt((x ** 2) + (y ** 2))
+      self.theta = math.atan2(y, x)
+    else:
+      self.r, self.theta = r, theta
+      self.x = r * math.cos(theta)
+      self.y = r * math.sin(theta)
+
+
+
+class TestVector(unittest.TestCase):
+
+  def assert_same(self, vector: Vector, expected: EagerVector) -> None:
+    for name in ('x', 'y', 'r', 'theta'):
+      self.assertEqual(getattr(vector, name), getattr(expected, name), name)
+
+
+  def test_polar_follows_assigned_components(self):
+    vector = Vector(x=3.0, y=4.0)
+    self.assertEqual(vector.r, 5.0)
+    vector.x = 0.0
+    self.assertEqual(vector.r, 4.0)
+    self.assertEqual(vector.theta, math.pi / 2)
+    vector.y = -2.0
+    self.assertEqual(vector.r, 2.0)
+    self.assertEqual(vector.theta, -math.pi / 2)
+    # Also when the polar form was given
+    vector = Vector(r=2.0, theta=0.0)
+    vector.y = 2.0
+    self.assertAlmostEqual(vector.theta, math.pi / 4, places=15)
+    self.assertAlmostEqual(vector.r, math.sqrt(8), places=15)
+
+
+  def test_polar_setters(self):
+    vector = Vector(x=3.0, y=4.0)
+    vector.r = 10.0
+    self.assertAlmostEqual(vector.x, 6.0, places=12)
+    self.assertAlmostEqual(vector.y, 8.0, places=12)
+    vector.x = 0.0
+    vector.theta = 0.0
+    self.assertAlmostEqual(vector.x, 8.0, places=12)
+    self.assertAlmostEqual(vector.y, 0.0, places=12)
+
+
+  def test_arithmetic_matches_eager_vector(self):
+    a, b, factor = (1.5, -2.25), (-0.75, 4.0), 2.5
+    self.assert_same(Vector(x=a[0], y=a[1]) + Vector(x=b[0], y=b[1]),
+      EagerVector(x=a[0] + b[0], y=a[1] + b[1]))
+    self.assert_same(Vector(x=a[0], y=a[1]) * factor,
+      EagerVector(x=a[0] * factor, y=a[1] * factor))
+    self.assert_same(factor * Vector(x=a[0], y=a[1]),
+      EagerVector(x=a[0] * factor, y=a[1] * factor))
+
+    vector = Vector(x=a[0], y=a[1])
+    self.assertEqual(vector.r, EagerVector(x=a[0], y=a[1]).r)
+    vector += Vector(x=b[0], y=b[1])
+    self.assert_same(vector, EagerVector(x=a[0] + b[0], y=a[1] + b[1]))
+    vector *= factor
+    self.assert_same(vector,
+      EagerVector(x=(a[0] + b[0]) * factor, y=(a[1] + b[1]) * factor))
+    self.assert_same(vector.copy(), EagerVector(x=vector.x, y=vector.y))
+
+    self.assert_same(Vector(r=3.0, theta=1.2), EagerVector(r=3.0, theta=1.2))
+    self.assert_same(
+      Vector.from_direction(3.0, 1.2, math.cos(1.2), math.sin(1.2)),
+      EagerVector(r=3.0, theta=1.2))
+
+
+  def test_pickle(self):
+    for vector in (Vector(x=1.0, y=-2.0), Vector(r=2.0, theta=0.3)):
+      vector.r # Both forms computed
+      for protocol in range(2, pickle.HIGHEST_PROTOCOL + 1):
+        with self.subTest(vector=vector, protocol=protocol):
+          copy = pickle.loads(pickle.dumps(vector, protocol))
+          self.assertEqual((copy.x, copy.y, copy.r, copy.theta),
+            (vector.x, vector.y, vector.r, vector.theta))
+          copy.x = 5.0
+          self.assertEqual(copy.theta, math.atan2(copy.y, 5.0))
+    vector = pickle.loads(pickle.dumps(Vector(x=3.0, y=4.0)))
+    self.assertEqual(vector.r, 5.0)
+
+
+  def test_mixed_definition_raises(self):
+    with self.assertRaises(ValueError):
+      Vector(x=1.0, theta=0.5)
+    with self.assertRaises(ValueError):
+      Vector(r=1.0)
+
+
+if __name__ == '__main__':
+  unittest.main()